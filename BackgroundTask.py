@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+
+"""
+Runs long operations on a worker thread so the Tk window stays responsive.
+
+The operation is passed a ProgressMonitor as its progress keyword argument and calls progress.update() as it works
+e.g. every few thousand GSI lines.  Updates, the result and any error are put on a queue that BackgroundTask drains
+from the Tk main loop with after(), so the callbacks always run on the Tk thread.  Calling cancel() makes the next
+progress.update() raise OperationCancelledError inside the operation.
+"""
+
+import threading
+
+try:
+    from Queue import Queue, Empty
+except ImportError:
+    from queue import Queue, Empty  # python 3
+
+from GSIExceptions import OperationCancelledError
+
+POLL_INTERVAL_MS = 100
+
+
+class ProgressMonitor:
+
+    def __init__(self, callback=None):
+
+        """ callback(stage, count, total) is called from the worker thread on every update """
+
+        self.callback = callback
+        self.cancel_event = threading.Event()
+
+    def update(self, stage, count, total=None):
+
+        """ Report count of total (if known) items done for stage e.g. ('Lines parsed', 20000, None) """
+
+        if self.cancel_event.is_set():
+            raise OperationCancelledError()
+
+        if self.callback is not None:
+            self.callback(stage, count, total)
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+
+class BackgroundTask:
+
+    def __init__(self, master, function, args=(), on_progress=None, on_done=None, on_error=None, on_cancel=None):
+
+        """
+        Run function(*args, progress=ProgressMonitor) on a worker thread.  Each on_ callback is called on the Tk thread:
+        on_progress(stage, count, total), on_done(result), on_error(exception) and on_cancel()
+        """
+
+        self.master = master
+        self.function = function
+        self.args = args
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_cancel = on_cancel
+
+        self.messages = Queue()
+        self.progress = ProgressMonitor(lambda stage, count, total: self.messages.put(('progress',
+                                                                                        (stage, count, total))))
+        self.thread = threading.Thread(target=self.run)
+        self.thread.daemon = True
+        self.finished = False
+
+    def start(self):
+
+        self.thread.start()
+        self.master.after(POLL_INTERVAL_MS, self.poll)
+
+        return self
+
+    def cancel(self):
+        self.progress.cancel()
+
+    def run(self):
+
+        # worker thread - only talks to the Tk thread through the queue
+        try:
+            result = self.function(*self.args, progress=self.progress)
+
+        except OperationCancelledError:
+            self.messages.put(('cancelled', None))
+
+        except Exception as ex:
+            self.messages.put(('error', ex))
+
+        else:
+            self.messages.put(('done', result))
+
+    def poll(self):
+
+        latest_progress = None
+
+        while True:
+
+            try:
+                message, value = self.messages.get_nowait()
+            except Empty:
+                break
+
+            if message == 'progress':
+                # only the most recent progress is worth showing
+                latest_progress = value
+                continue
+
+            self.finished = True
+            callback = {'done': self.on_done, 'error': self.on_error, 'cancelled': self.on_cancel}[message]
+
+            if callback is not None:
+                if message == 'cancelled':
+                    callback()
+                else:
+                    callback(value)
+
+        if latest_progress is not None and self.on_progress is not None and not self.finished:
+            self.on_progress(*latest_progress)
+
+        if not self.finished:
+            self.master.after(POLL_INTERVAL_MS, self.poll)
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+
+"""
+Batch processing of a whole directory of GSI and coordinate files across a process pool.
+
+Each GSI file is formatted, its control and change points extracted and a control only GSI written.  Each coordinate
+file is loaded and its points counted.  A file that fails (e.g. CorruptedGSIFileError) is reported in its BatchResult
+and doesn't stop the rest of the batch.
+"""
+
+import logging
+import multiprocessing
+import os
+from collections import namedtuple
+from functools import partial
+
+from GSI import GSI
+from CoordinateFile import CoordinateFile
+
+GSI_EXTENSIONS = ('.gsi',)
+COORDINATE_EXTENSIONS = ('.crd', '.std', '.asc')
+CONTROL_ONLY_SUFFIX = '_CONTROL_ONLY.gsi'
+
+BatchResult = namedtuple('BatchResult', ['filename', 'file_type', 'control_points', 'change_points',
+                                         'control_only_filename', 'record_count', 'error'])
+
+
+def find_batch_files(directory):
+
+    """ GSI and coordinate files in directory, sorted by name.  Previously created control only GSI's are skipped """
+
+    batch_files = []
+
+    for name in sorted(os.listdir(directory)):
+
+        extension = os.path.splitext(name)[1].lower()
+
+        if name.endswith(CONTROL_ONLY_SUFFIX):
+            continue
+
+        if extension in GSI_EXTENSIONS + COORDINATE_EXTENSIONS:
+            batch_files.append(os.path.join(directory, name))
+
+    return batch_files
+
+
+def process_gsi_file(filename, cache=None):
+
+    gsi = GSI(logging.getLogger('CompNet Assist'))
+    gsi.format_gsi(filename, cache)
+    control_only_filename = gsi.create_control_only_gsi()
+
+    return BatchResult(filename, 'GSI', gsi.get_control_points(), gsi.get_change_points(), control_only_filename,
+                       len(gsi.formatted_lines), None)
+
+
+def process_coordinate_file(filename, cache=None):
+
+    coordinate_file = CoordinateFile(filename, cache)
+
+    return BatchResult(filename, 'COORDINATE', [], [], None, len(coordinate_file.coordinate_dictionary), None)
+
+
+def process_file(filename, cache=None):
+
+    """ Process a single file of the batch, catching any error so it can be reported back rather than raised """
+
+    try:
+        if os.path.splitext(filename)[1].lower() in GSI_EXTENSIONS:
+            return process_gsi_file(filename, cache)
+
+        return process_coordinate_file(filename, cache)
+
+    except Exception as ex:
+        error = getattr(ex, 'msg', None) or str(ex) or type(ex).__name__
+        return BatchResult(filename, None, [], [], None, 0, '{}: {}'.format(type(ex).__name__, error))
+
+
+def run_batch(filenames, processes=None, cache=None, progress=None):
+
+    """
+    Process filenames across a pool of processes (one per CPU core by default).  Returns a BatchResult per file in
+    the same order as filenames.  cache is an optional ParseCache shared by the workers.
+    progress - optional ProgressMonitor told how many files have been processed
+    """
+
+    if not filenames:
+        return []
+
+    processes = min(processes or multiprocessing.cpu_count(), len(filenames))
+
+    # a single file isn't worth starting a pool for
+    if processes == 1:
+        results = map(partial(_process_file_keyed, cache=cache), filenames)
+        return [result for filename, result in report_progress(results, len(filenames), progress)]
+
+    pool = multiprocessing.Pool(processes)
+
+    try:
+        results = pool.imap_unordered(partial(_process_file_keyed, cache=cache), filenames)
+        results = dict(report_progress(results, len(filenames), progress))
+
+    except Exception:
+        # e.g. cancelled - don't wait for the rest of the files
+        pool.terminate()
+        raise
+
+    finally:
+        pool.close()
+        pool.join()
+
+    return [results[filename] for filename in filenames]
+
+
+def report_progress(results, total, progress):
+
+    for count, result in enumerate(results, 1):
+
+        if progress is not None:
+            progress.update('Files processed', count, total)
+
+        yield result
+
+
+def _process_file_keyed(filename, cache=None):
+    return filename, process_file(filename, cache)
+
+
+def run_batch_directory(directory, processes=None, cache=None, progress=None):
+    return run_batch(find_batch_files(directory), processes, cache, progress)
+
+
+def format_batch_report(results):
+
+    report_lines = []
+    failures = [result for result in results if result.error]
+
+    for result in results:
+
+        name = os.path.basename(result.filename)
+
+        if result.error:
+            report_lines.append('{}:  FAILED - {}'.format(name, result.error))
+
+        elif result.file_type == 'GSI':
+            report_lines.append('{}:  {} lines'.format(name, result.record_count))
+            report_lines.append('    Control: ' + ', '.join(result.control_points))
+            report_lines.append('    Change points: ' + ', '.join(result.change_points))
+
+        else:
+            report_lines.append('{}:  {} points'.format(name, result.record_count))
+
+    report_lines.append('')
+    report_lines.append('{} files processed, {} failed'.format(len(results), len(failures)))
+
+    return '\n'.join(report_lines) + '\n'
@@ -0,0 +1,417 @@
+# -*- coding: utf-8 -*-
+
+"""
+Benchmarks of CompNet Assist on synthetic files of 10^3 to 10^7 records.
+
+Generates GSI-16 files (station setups followed by face left/face right pairs of shots, with timestamps) and CRD, STD,
+asc and FIX coordinate files of a given size, then times each operation on them and reports its throughput and peak
+memory.  Each operation runs in a fresh child process so its peak memory isn't mixed up with the others.
+
+    python Benchmark.py
+    python Benchmark.py --sizes 1000 100000 10000000 --operations gsi_parse crd_compare --directory /tmp/bench
+
+The generators can also be used on their own e.g. generate_gsi('big.GSI', 1000000)
+"""
+
+import argparse
+import logging
+import math
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import tempfile
+from collections import OrderedDict
+
+from Instrumentation import Profiler, timer
+
+try:
+    range = xrange
+except NameError:
+    pass  # python 3
+
+logger = logging.getLogger('CompNet Assist')
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+# targets observed from each station setup, as face left/face right pairs
+TARGETS_PER_SETUP = 20
+
+# control points observed from every setup, so they are change points once there are more than 7 setups
+CONTROL_TARGETS = ('CTL01', 'CTL02', 'CTL03')
+
+# MGA56 area of the sample files
+BASE_EASTING = 285000.0
+BASE_NORTHING = 6215000.0
+BASE_HEIGHT = 120.0
+AREA_SIZE = 5000.0
+
+
+def gsi_word(word_id, info, value):
+
+    """ A 23 character GSI-16 word e.g. gsi_word('84', '..10', 1000000) -> '84..10+0000000001000000' """
+
+    if isinstance(value, str):
+        return '{}{}+{}'.format(word_id, info, value.rjust(16, '0'))
+
+    return '{}{}{}{:016d}'.format(word_id, info, '-' if value < 0 else '+', abs(value))
+
+
+def gsi_line(line_number, point_id, words):
+    return '*11{:04d}+{} {} \n'.format(line_number % 10000, point_id.rjust(16, '0'), ' '.join(words))
+
+
+def angle_value(degrees):
+
+    """ GSI angle value in DDDMMSSs (tenths of a second) e.g. 215.22444 -> 21513280 """
+
+    tenths_of_seconds = int(round((degrees % 360.0) * 36000))
+    degrees, tenths_of_seconds = divmod(tenths_of_seconds, 36000)
+    minutes, tenths_of_seconds = divmod(tenths_of_seconds, 600)
+
+    return (degrees % 360) * 100000 + minutes * 1000 + tenths_of_seconds
+
+
+def mm(metres):
+    return int(round(metres * 1000))
+
+
+def generate_gsi(filename, line_count, seed=0):
+
+    """
+    Write a GSI-16 file of line_count lines.  Each station setup is followed by face left and face right shots to the
+    control points and to TARGETS_PER_SETUP detail points, each with a timestamp a few seconds after the last
+    """
+
+    rng = random.Random(seed)
+    control_coordinates = dict((point_id, (BASE_EASTING + rng.uniform(0, AREA_SIZE),
+                                           BASE_NORTHING + rng.uniform(0, AREA_SIZE),
+                                           BASE_HEIGHT + rng.uniform(-5, 5))) for point_id in CONTROL_TARGETS)
+    line_number = 0
+    setup_number = 0
+    detail_number = 0
+    seconds_of_day = 7 * 3600
+
+    with open(filename, 'w', WRITE_BUFFER_SIZE) as f:
+        while line_number < line_count:
+
+            setup_number += 1
+            station = 'STN{:05d}'.format(setup_number)
+            station_e = BASE_EASTING + rng.uniform(0, AREA_SIZE)
+            station_n = BASE_NORTHING + rng.uniform(0, AREA_SIZE)
+            station_h = BASE_HEIGHT + rng.uniform(-5, 5)
+            instrument_height = rng.uniform(1.4, 1.7)
+
+            line_number += 1
+            f.write(gsi_line(line_number, station, [gsi_word('84', '..10', mm(station_e)),
+                                                     gsi_word('85', '..10', mm(station_n)),
+                                                     gsi_word('86', '..10', mm(station_h)),
+                                                     gsi_word('87', '..10', 0),
+                                                     gsi_word('88', '..10', mm(instrument_height))]))
+
+            targets = list(CONTROL_TARGETS)
+
+            for _ in range(TARGETS_PER_SETUP):
+                detail_number += 1
+                targets.append('P{:07d}'.format(detail_number))
+
+            for target in targets:
+
+                if target in control_coordinates:
+                    target_e, target_n, target_h = control_coordinates[target]
+                    target_height = 0.0
+                else:
+                    target_e = station_e + rng.uniform(-200, 200)
+                    target_n = station_n + rng.uniform(-200, 200)
+                    target_h = station_h + rng.uniform(-3, 3)
+                    target_height = 1.543
+
+                horizontal_distance = math.hypot(target_e - station_e, target_n - station_n)
+                height_difference = target_h - station_h
+                slope_distance = math.hypot(horizontal_distance, height_difference)
+                bearing = math.degrees(math.atan2(target_e - station_e, target_n - station_n)) % 360.0
+                zenith = math.degrees(math.atan2(horizontal_distance, height_difference))
+
+                # face left then face right - plunged and turned through 180 degrees
+                for horizontal_angle, vertical_angle in ((bearing, zenith), (bearing + 180.0, 360.0 - zenith)):
+
+                    if line_number >= line_count:
+                        break
+
+                    seconds_of_day = (seconds_of_day + rng.randint(5, 30)) % 86400
+                    timestamp = 1023 * 10000 + (seconds_of_day // 3600) * 100 + (seconds_of_day // 60) % 60
+
+                    line_number += 1
+                    f.write(gsi_line(line_number, target, [
+                        gsi_word('21', '.324', angle_value(horizontal_angle + rng.gauss(0, 0.0005))),
+                        gsi_word('22', '.324', angle_value(vertical_angle + rng.gauss(0, 0.0005))),
+                        gsi_word('31', '..00', mm(slope_distance)),
+                        gsi_word('51', '..1.', '0012+000'),
+                        gsi_word('81', '..00', mm(target_e)),
+                        gsi_word('82', '..00', mm(target_n)),
+                        gsi_word('83', '..00', mm(target_h)),
+                        gsi_word('32', '..10', mm(horizontal_distance)),
+                        gsi_word('33', '..10', mm(height_difference)),
+                        gsi_word('19', '....', timestamp),
+                        gsi_word('87', '..10', mm(target_height))]))
+
+
+def generate_points(point_count, seed=0, noise=0.0):
+
+    """ Generator of (name, easting, northing, height).  A non-zero noise moves each point by up to noise metres """
+
+    rng = random.Random(seed)
+    noise_rng = random.Random(seed + 1)
+
+    for point_number in range(1, point_count + 1):
+
+        easting = BASE_EASTING + rng.uniform(0, AREA_SIZE)
+        northing = BASE_NORTHING + rng.uniform(0, AREA_SIZE)
+        height = BASE_HEIGHT + rng.uniform(-5, 5)
+
+        if noise:
+            easting += noise_rng.uniform(-noise, noise)
+            northing += noise_rng.uniform(-noise, noise)
+
+        yield 'P{:07d}'.format(point_number), easting, northing, height
+
+
+def write_lines(filename, lines):
+
+    with open(filename, 'w', WRITE_BUFFER_SIZE) as f:
+        f.writelines(lines)
+
+
+def generate_crd(filename, point_count, seed=0, noise=0.0):
+
+    header = ['              FILE: {}\n'.format(filename), '                            PROJECT: BENCHMARK\n',
+              '                             PROJECTION: MGA ZONE 56\n', '\n',
+              '         DESCRIPTION                     EAST                    NORTH\n', '\n']
+
+    points = ('{:>20}{:>25.4f}{:>25.4f}\n'.format(name, easting, northing)
+              for name, easting, northing, height in generate_points(point_count, seed, noise))
+
+    write_lines(filename, _chain(header, points))
+
+
+def generate_std(filename, point_count, seed=0, noise=0.0):
+
+    write_lines(filename, ('{} {:.4f} {:.4f} 0.010 0.010 "{}"\n'.format(line_number, easting, northing, name)
+                           for line_number, (name, easting, northing, height)
+                           in enumerate(generate_points(point_count, seed, noise), 1)))
+
+
+def generate_asc(filename, point_count, seed=0, noise=0.0):
+
+    header = ['@%Unit:                m\n', '@%Coordinate type:     Grid\n', '@%Reference ellipsoid: GRS 1980\n',
+              '@%Projection set:      MGA56\n']
+
+    points = ('@#{:<20}{:<10}{:>13.4f}{:>15.4f}{:>15.4f}    22.3390 REF   34\n'.format(name, '170220', easting,
+                                                                                       northing, height)
+              for name, easting, northing, height in generate_points(point_count, seed, noise))
+
+    write_lines(filename, _chain(header, points))
+
+
+def generate_fix(filename, point_count, seed=0, noise=0.0):
+
+    write_lines(filename, ('{} {:.4f}  {:.4f} "{}"\n'.format(line_number, easting, northing, name)
+                           for line_number, (name, easting, northing, height)
+                           in enumerate(generate_points(point_count, seed, noise), 1)))
+
+
+def _chain(header, lines):
+
+    for line in header:
+        yield line
+
+    for line in lines:
+        yield line
+
+
+# file kind -> (extension, generator, noise).  The STD and FIX files are the CRD and asc points moved by a few mm
+GENERATORS = OrderedDict([('gsi', ('GSI', generate_gsi, None)),
+                          ('crd', ('CRD', generate_crd, 0.0)),
+                          ('std', ('STD', generate_std, 0.02)),
+                          ('asc', ('asc', generate_asc, 0.0)),
+                          ('fix', ('FIX', generate_fix, 0.02))])
+
+
+def generate_file(directory, kind, size):
+
+    """ Path of the synthetic kind file of size records in directory, generating it if it doesn't exist yet """
+
+    extension, generator, noise = GENERATORS[kind]
+    filename = os.path.join(directory, 'bench_{}.{}'.format(size, extension))
+
+    if not os.path.exists(filename):
+        if noise is None:
+            generator(filename, size)
+        else:
+            generator(filename, size, noise=noise)
+
+    return filename
+
+
+# Operations - each is given the generated files and returns the number of records it processed
+
+def gsi_parse(gsi_filename):
+
+    from GSI import GSI
+
+    gsi = GSI(logger)
+    gsi.format_gsi(gsi_filename)
+
+    return len(gsi.formatted_lines)
+
+
+def gsi_format_lines(gsi_filename):
+
+    from GSI import GSI
+
+    gsi = GSI(logger)
+    gsi.format_gsi(gsi_filename)
+
+    return sum(1 for formatted_line in gsi.formatted_lines)
+
+
+def gsi_control_only(gsi_filename):
+
+    from GSI import GSI
+
+    os.remove(GSI(logger).stream_control_only_gsi(gsi_filename))
+
+    with open(gsi_filename) as f:
+        return sum(1 for line in f)
+
+
+def gsi_face_reduction(gsi_filename):
+
+    from GSI import GSI
+    from FaceReduction import reduce_faces
+
+    gsi = GSI(logger)
+    gsi.format_gsi(gsi_filename)
+
+    return len(reduce_faces(gsi.store))
+
+
+def coordinate_load(coordinate_filename):
+
+    from CoordinateFile import CoordinateFile
+
+    return len(CoordinateFile(coordinate_filename).coordinate_dictionary)
+
+
+def fixed_file_update(coordinate_filename, fixed_filename):
+
+    from CoordinateFile import CoordinateFile, FixedFile
+
+    # update rewrites the file in place, so a copy is updated and the generated file stays the same for later runs
+    file_descriptor, copy_filename = tempfile.mkstemp(suffix='.FIX', dir=os.path.dirname(fixed_filename))
+    os.close(file_descriptor)
+
+    try:
+        shutil.copyfile(fixed_filename, copy_filename)
+        return len(FixedFile(copy_filename).update(CoordinateFile(coordinate_filename)))
+    finally:
+        os.remove(copy_filename)
+
+
+def crd_compare(crd_filename_1, crd_filename_2):
+
+    from CoordinateFile import CoordinateFile
+    from Comparison import compare_coordinate_files
+
+    return len(compare_coordinate_files(CoordinateFile(crd_filename_1), CoordinateFile(crd_filename_2), 0.01, 0.01))
+
+
+# operation name -> (function, kinds of file it is given)
+OPERATIONS = OrderedDict([('gsi_parse', (gsi_parse, ('gsi',))),
+                          ('gsi_format_lines', (gsi_format_lines, ('gsi',))),
+                          ('gsi_control_only', (gsi_control_only, ('gsi',))),
+                          ('gsi_face_reduction', (gsi_face_reduction, ('gsi',))),
+                          ('crd_load', (coordinate_load, ('crd',))),
+                          ('std_load', (coordinate_load, ('std',))),
+                          ('asc_load', (coordinate_load, ('asc',))),
+                          ('fix_load', (coordinate_load, ('fix',))),
+                          ('fixed_file_update', (fixed_file_update, ('asc', 'fix'))),
+                          ('crd_compare', (crd_compare, ('crd', 'std')))])
+
+
+def run_operation(operation, filenames):
+
+    """ Run in the child process - (records, seconds, peak memory in bytes) """
+
+    function = OPERATIONS[operation][0]
+
+    start = timer()
+    records = function(*filenames)
+    seconds = timer() - start
+
+    return records, seconds, Profiler.get_peak_memory()
+
+
+def benchmark(operation, filenames):
+
+    # a new process for every operation so each peak memory is its own
+    pool = multiprocessing.Pool(1)
+
+    try:
+        return pool.apply(run_operation, (operation, filenames))
+    finally:
+        pool.close()
+        pool.join()
+
+
+def format_result(operation, size, records, seconds, peak_memory):
+
+    peak_memory = '' if peak_memory is None else '{:.1f}'.format(peak_memory / 1048576.0)
+
+    return '{:<20}{:>10}{:>10}{:>10.3f}{:>14.0f}{:>12}\n'.format(operation, size, records, seconds,
+                                                               records / seconds if seconds else 0.0, peak_memory)
+
+
+def run_benchmarks(sizes, operations, directory, output=sys.stdout):
+
+    output.write('{:<20}{:>10}{:>10}{:>10}{:>14}{:>12}\n'.format('OPERATION', 'SIZE', 'RECORDS', 'SECONDS',
+                                                                'RECORDS/S', 'PEAK MB'))
+
+    for size in sizes:
+        for operation in operations:
+
+            filenames = [generate_file(directory, kind, size) for kind in OPERATIONS[operation][1]]
+            output.write(format_result(operation, size, *benchmark(operation, filenames)))
+            output.flush()
+
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description='Benchmark CompNet Assist on synthetic files')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help='records per file e.g. 1000 10000000')
+    parser.add_argument('--operations', nargs='+', choices=list(OPERATIONS), default=list(OPERATIONS))
+    parser.add_argument('--directory', default=None,
+                        help='where to generate the files - they are kept and reused.  A temporary folder by default')
+    args = parser.parse_args(argv)
+
+    directory = args.directory or tempfile.mkdtemp(prefix='compnet_benchmark_')
+
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+
+    try:
+        run_benchmarks(args.sizes, args.operations, directory)
+
+    finally:
+        if args.directory is None:
+            shutil.rmtree(directory)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
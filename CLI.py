@@ -0,0 +1,385 @@
+# -*- coding: utf-8 -*-
+
+"""
+Command line interface to CompNet Assist, for nightly processing scripts and machines without a display.
+
+    python main.py update-fixed "AA9 ARTC 170220.asc" "AA9 ARTC 030220.FIX"
+    python main.py compare-crd "AA9 ARTC_130120.CRD" "AA9 ARTC_130120.STD" --tol-e 0.01 --tol-n 0.01
+    python main.py compare-epochs "AA9 ARTC_130120.CRD" "AA9 ARTC 170220.asc" --tol-e 0.01 --tol-n 0.01
+    python main.py strip-control TL231019.GSI
+    python main.py gsi-summary TL231019.GSI
+    python main.py gsi-summary TL231019.GSI --follow 10
+    python main.py export TL231019.GSI --format csv
+    python main.py reduce-faces TL231019.GSI --tol-collimation 10
+    python main.py batch Files
+    python main.py store-coordinates "AA9 ARTC.sqlite" "AA9 ARTC_130120.CRD" "AA9 ARTC 170220.asc"
+    python main.py point-history "AA9 ARTC.sqlite" STN12
+
+Each command runs the same FixedFile, CoordinateFile and GSI code as the GUI.  Modules are only imported by the
+command that needs them so start up stays quick.  The exit status is 1 if any file failed.
+"""
+
+import argparse
+import logging
+import sys
+
+logger = logging.getLogger('CompNet Assist')
+
+
+def get_cache(args):
+
+    if args.no_cache:
+        return None
+
+    from ParseCache import ParseCache
+    return ParseCache()
+
+
+def update_fixed(args):
+
+    from CoordinateFile import CoordinateFile, update_fixed_files, format_change_report
+
+    if args.from_store:
+        from CoordinateStore import CoordinateStore
+
+        with CoordinateStore(args.coordinate_file) as store:
+            coordinate_file = store.get_coordinate_file()
+    else:
+        coordinate_file = CoordinateFile(args.coordinate_file, get_cache(args))
+
+    fixed_file_updates = update_fixed_files(args.fixed_files, coordinate_file, args.match_tolerance, args.threads)
+
+    sys.stdout.write(format_change_report(fixed_file_updates))
+
+    return 1 if any(fixed_file_update.error for fixed_file_update in fixed_file_updates) else 0
+
+
+def compare_crd(args):
+
+    from CoordinateFile import CoordinateFile
+    from Comparison import compare_coordinate_files
+
+    cache = get_cache(args)
+    result = compare_coordinate_files(CoordinateFile(args.crd_file_1, cache), CoordinateFile(args.crd_file_2, cache),
+                                      args.tol_e, args.tol_n, args.tol_h, args.tol_radial, args.match_tolerance)
+
+    sys.stdout.write('{} common points, {} exceed tolerance\n'.format(len(result), int(result.outliers.sum())))
+    sys.stdout.write('POINT,dE,dN,dH,RADIAL\n')
+
+    for point, delta_e, delta_n, delta_h, radial in result.get_outliers():
+        sys.stdout.write('{},{:.3f},{:.3f},{:.3f},{:.3f}\n'.format(point, delta_e, delta_n, delta_h, radial))
+
+    return 0
+
+
+def compare_epochs(args):
+
+    import os
+    from CoordinateFile import CoordinateFile
+    from Comparison import compare_coordinate_file_epochs
+
+    if not 0 <= args.baseline < len(args.coordinate_files):
+        sys.stderr.write('--baseline must be the number of one of the files, from 0 to {}\n'.format(
+            len(args.coordinate_files) - 1))
+        return 1
+
+    cache = get_cache(args)
+    coordinate_files = [CoordinateFile(coordinate_file, cache) for coordinate_file in args.coordinate_files]
+    epochs = [os.path.basename(coordinate_file) for coordinate_file in args.coordinate_files]
+    result = compare_coordinate_file_epochs(coordinate_files, args.tol_e, args.tol_n, args.tol_h, args.tol_radial,
+                                            args.baseline, epochs)
+
+    sys.stdout.write('{} points in {} epochs, {} exceed tolerance from {}\n'.format(
+        len(result), len(epochs), int(result.outlier_points.sum()), epochs[args.baseline]))
+    sys.stdout.write('POINT,EPOCH,dE,dN,dH,RADIAL\n')
+
+    for point, epoch, delta_e, delta_n, delta_h, radial in result.get_outliers():
+        sys.stdout.write('{},{},{:.3f},{:.3f},{:.3f},{:.3f}\n'.format(point, epoch, delta_e, delta_n, delta_h,
+                                                                        radial))
+
+    return 0
+
+
+def strip_control(args):
+
+    from GSI import GSI
+
+    failed = False
+
+    for gsi_file in args.gsi_files:
+
+        try:
+            sys.stdout.write(GSI(logger).stream_control_only_gsi(gsi_file) + '\n')
+
+        except Exception as ex:
+            sys.stderr.write('{}: {}\n'.format(gsi_file, ex))
+            failed = True
+
+    return 1 if failed else 0
+
+
+def gsi_summary(args):
+
+    from GSI import GSI
+
+    cache = get_cache(args)
+    failed = False
+    gsis = []
+
+    for gsi_file in args.gsi_files:
+
+        try:
+            gsi = GSI(logger, args.change_point_threshold)
+            gsi.format_gsi(gsi_file, cache, processes=args.processes, complete_lines_only=bool(args.follow))
+
+        except Exception as ex:
+            sys.stderr.write('{}: {}\n'.format(gsi_file, ex))
+            failed = True
+
+        else:
+            write_gsi_summary(gsi)
+            gsis.append(gsi)
+
+    if args.follow:
+        follow_gsi_files(gsis, args.follow)
+
+    return 1 if failed else 0
+
+
+def write_gsi_summary(gsi):
+
+    sys.stdout.write('{}:  {} lines\n'.format(gsi.filename, len(gsi.formatted_lines)))
+    sys.stdout.write('    Control: {}\n'.format(', '.join(gsi.get_control_points())))
+    sys.stdout.write('    Change points: {}\n'.format(', '.join(gsi.get_change_points())))
+    sys.stdout.flush()
+
+
+def follow_gsi_files(gsis, interval):
+
+    """ Parse the lines added to GSI files as they are downloaded, and summarise the files again, until Ctrl+C """
+
+    import time
+
+    try:
+        while True:
+
+            time.sleep(interval)
+
+            for gsi in gsis:
+
+                try:
+                    new_line_count = gsi.refresh_gsi()
+
+                except Exception as ex:
+                    sys.stderr.write('{}: {}\n'.format(gsi.filename, ex))
+
+                else:
+                    if new_line_count:
+                        write_gsi_summary(gsi)
+
+    except KeyboardInterrupt:
+        pass
+
+
+def reduce_faces(args):
+
+    from FaceReduction import reduce_faces
+    from GSI import GSI
+
+    cache = get_cache(args)
+    failed = False
+
+    for gsi_file in args.gsi_files:
+
+        try:
+            gsi = GSI(logger)
+            gsi.format_gsi(gsi_file, cache)
+            reduction = reduce_faces(gsi.store, args.tol_collimation, args.tol_index, args.tol_distance)
+
+        except Exception as ex:
+            sys.stderr.write('{}: {}\n'.format(gsi_file, ex))
+            failed = True
+
+        else:
+            sys.stdout.write('{}:  {} face pairs, {} exceed tolerance\n'.format(gsi_file, len(reduction),
+                                                                               int(reduction.outliers.sum())))
+            sys.stdout.write('STATION,POINT,COLLIMATION,INDEX,dSD\n')
+
+            for station, point, collimation, index, distance_spread in reduction.get_outliers():
+                sys.stdout.write('{},{},{:.1f},{:.1f},{:.4f}\n'.format(station, point, collimation, index,
+                                                                      distance_spread))
+
+    return 1 if failed else 0
+
+
+def export(args):
+
+    from GSIExport import stream_gsi_to_csv, export_npz
+    from GSI import GSI
+
+    failed = False
+
+    for gsi_file in args.gsi_files:
+
+        export_filename = gsi_file[:-4] + '.' + args.format
+
+        try:
+            if args.format == 'csv':
+                stream_gsi_to_csv(gsi_file, export_filename)
+            else:
+                gsi = GSI(logger)
+                gsi.format_gsi(gsi_file, get_cache(args))
+                export_npz(gsi, export_filename)
+
+        except Exception as ex:
+            sys.stderr.write('{}: {}\n'.format(gsi_file, ex))
+            failed = True
+
+        else:
+            sys.stdout.write(export_filename + '\n')
+
+    return 1 if failed else 0
+
+
+def store_coordinates(args):
+
+    from CoordinateStore import CoordinateStore
+
+    failed = False
+
+    with CoordinateStore(args.database) as store:
+        for coordinate_file in args.coordinate_files:
+
+            try:
+                point_count = store.add_file(coordinate_file, args.epoch, get_cache(args))
+
+            except Exception as ex:
+                sys.stderr.write('{}: {}\n'.format(coordinate_file, ex))
+                failed = True
+
+            else:
+                sys.stdout.write('{}: {}\n'.format(coordinate_file, 'unchanged' if point_count is None
+                                                   else '{} points'.format(point_count)))
+
+    return 1 if failed else 0
+
+
+def point_history(args):
+
+    from CoordinateStore import CoordinateStore
+
+    with CoordinateStore(args.database) as store:
+
+        sys.stdout.write('POINT,EPOCH,FILE,EAST,NORTH,HEIGHT\n')
+
+        for point in args.points:
+            for epoch, path, coordinates in store.get_history(point):
+                sys.stdout.write('{},{},{},{},{},{}\n'.format(point, epoch, path, coordinates['Eastings'],
+                                                              coordinates['Northings'],
+                                                              coordinates.get('Heights', '')))
+
+    return 0
+
+
+def batch(args):
+
+    from BatchRunner import run_batch_directory, format_batch_report
+
+    results = run_batch_directory(args.directory, args.processes, get_cache(args))
+    sys.stdout.write(format_batch_report(results))
+
+    return 1 if any(result.error for result in results) else 0
+
+
+def create_parser():
+
+    parser = argparse.ArgumentParser(prog='main.py', description='CompNet Assist - run with no arguments for the GUI',
+                                     epilog='add --profile to print a timing and memory summary when the run finishes')
+    parser.add_argument('--no-cache', action='store_true', help="don't use or update the parsed file cache")
+    commands = parser.add_subparsers(dest='command', metavar='command')
+    commands.required = True
+
+    command = commands.add_parser('update-fixed', help="update fixed files' coordinates from a coordinate file")
+    command.add_argument('coordinate_file')
+    command.add_argument('fixed_files', nargs='+')
+    command.add_argument('--from-store', action='store_true',
+                         help='coordinate_file is a coordinate store - use the latest coordinates of each point')
+    command.add_argument('--match-tolerance', type=float, default=None,
+                         help='match stations missing by name to the nearest point within this many metres')
+    command.add_argument('--threads', type=int, default=None)
+    command.set_defaults(function=update_fixed)
+
+    command = commands.add_parser('compare-crd', help='list the common points of two coordinate files that differ '
+                                                      'by more than a tolerance')
+    command.add_argument('crd_file_1')
+    command.add_argument('crd_file_2')
+    command.add_argument('--tol-e', type=float, default=0.05)
+    command.add_argument('--tol-n', type=float, default=0.05)
+    command.add_argument('--tol-h', type=float, default=None)
+    command.add_argument('--tol-radial', type=float, default=None)
+    command.add_argument('--match-tolerance', type=float, default=None,
+                         help='also compare points with different names within this many metres of each other')
+    command.set_defaults(function=compare_crd)
+
+    command = commands.add_parser('compare-epochs', help='list the points of a series of coordinate files that move '
+                                                         'by more than a tolerance from a baseline file')
+    command.add_argument('coordinate_files', nargs='+', help='in epoch order')
+    command.add_argument('--baseline', type=int, default=0, help='number of the baseline file, counting from 0')
+    command.add_argument('--tol-e', type=float, default=0.05)
+    command.add_argument('--tol-n', type=float, default=0.05)
+    command.add_argument('--tol-h', type=float, default=None)
+    command.add_argument('--tol-radial', type=float, default=None)
+    command.set_defaults(function=compare_epochs)
+
+    command = commands.add_parser('strip-control', help='write a *_CONTROL_ONLY.gsi for each GSI file')
+    command.add_argument('gsi_files', nargs='+')
+    command.set_defaults(function=strip_control)
+
+    command = commands.add_parser('gsi-summary', help='list the control and change points of GSI files')
+    command.add_argument('gsi_files', nargs='+')
+    command.add_argument('--change-point-threshold', type=int, default=7,
+                         help='point IDs observed more than this many times are listed as change points')
+    command.add_argument('--follow', type=float, default=None, metavar='SECONDS',
+                         help='keep checking the files every SECONDS for new lines, until Ctrl+C')
+    command.add_argument('--processes', type=int, default=1,
+                         help='parse parts of large files in this many processes at once, 0 for one per CPU core')
+    command.set_defaults(function=gsi_summary)
+
+    command = commands.add_parser('reduce-faces', help='list the face left / face right pairs of GSI files whose '
+                                                       'collimation, index or distance differences exceed tolerance')
+    command.add_argument('gsi_files', nargs='+')
+    command.add_argument('--tol-collimation', type=float, default=20.0, help='arc-seconds')
+    command.add_argument('--tol-index', type=float, default=20.0, help='arc-seconds')
+    command.add_argument('--tol-distance', type=float, default=0.003, help='metres')
+    command.set_defaults(function=reduce_faces)
+
+    command = commands.add_parser('export', help='write each GSI file as a table - csv, or npz to reload with numpy')
+    command.add_argument('gsi_files', nargs='+')
+    command.add_argument('--format', choices=('csv', 'npz'), default='csv')
+    command.set_defaults(function=export)
+
+    command = commands.add_parser('store-coordinates', help='add coordinate files to a project coordinate store')
+    command.add_argument('database')
+    command.add_argument('coordinate_files', nargs='+')
+    command.add_argument('--epoch', default=None,
+                         help='epoch of the files e.g. 2020-02-17, by default their modification times')
+    command.set_defaults(function=store_coordinates)
+
+    command = commands.add_parser('point-history', help='list the stored coordinates of points in every epoch')
+    command.add_argument('database')
+    command.add_argument('points', nargs='+')
+    command.set_defaults(function=point_history)
+
+    command = commands.add_parser('batch', help='summarise and strip every GSI and coordinate file in a folder')
+    command.add_argument('directory')
+    command.add_argument('--processes', type=int, default=None)
+    command.set_defaults(function=batch)
+
+    return parser
+
+
+def run_cli(argv):
+
+    args = create_parser().parse_args(argv)
+
+    return args.function(args)
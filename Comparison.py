@@ -0,0 +1,378 @@
+# -*- coding: utf-8 -*-
+
+"""
+Headless comparison of coordinate files.
+
+Common points are found with dictionary lookups and their differences (file 1 - file 2) calculated with numpy arrays,
+so no per-point python arithmetic is done.
+
+    result = compare_coordinate_files(CoordinateFile(crd_1), CoordinateFile(crd_2), tolerance_e=0.05, tolerance_n=0.05)
+    for point, delta_e, delta_n, delta_h, radial in result.get_outliers():
+        ...
+    export_comparison_csv(result, 'outliers.csv', result.get_outlier_indices())
+
+Any number of epochs (e.g. the monthly coordinate files of a monitoring job) are compared at once by putting every
+point's coordinates in a point x epoch matrix:
+
+    result = compare_coordinate_file_epochs([CoordinateFile(crd) for crd in crd_files], tolerance_e=0.01,
+                                            tolerance_n=0.01)
+    for point, epoch, delta_e, delta_n, delta_h, radial in result.get_outliers():
+        ...
+"""
+
+import csv
+
+import numpy as np
+
+from GSIExport import open_csv
+from Instrumentation import profiler
+from SpatialIndex import SpatialIndex
+
+
+def get_coordinate_arrays(coordinate_dictionary, points):
+
+    """ Easting, northing and height arrays for points.  Heights are NaN where a point has none """
+
+    coordinates = [coordinate_dictionary[point] for point in points]
+
+    eastings = np.array([coordinate['Eastings'] for coordinate in coordinates], dtype=float)
+    northings = np.array([coordinate['Northings'] for coordinate in coordinates], dtype=float)
+    heights = np.array([coordinate.get('Heights', 'nan') for coordinate in coordinates], dtype=float)
+
+    return eastings, northings, heights
+
+
+class ComparisonResult:
+
+    """
+    Differences between the common points of two coordinate files.  Every array is in the same order as points and
+    differences are file 1 - file 2.  Height differences are NaN unless both files have a height for the point
+    """
+
+    def __init__(self, points, delta_eastings, delta_northings, delta_heights, tolerance_e, tolerance_n,
+                 tolerance_h=None, tolerance_radial=None, matched_points=None):
+
+        self.points = points
+
+        # names of the matching points in file 2 - only differ from points when matched by position
+        self.matched_points = points if matched_points is None else matched_points
+        self.delta_eastings = delta_eastings
+        self.delta_northings = delta_northings
+        self.delta_heights = delta_heights
+        self.radials = np.hypot(delta_eastings, delta_northings)
+
+        self.tolerance_e = tolerance_e
+        self.tolerance_n = tolerance_n
+        self.tolerance_h = tolerance_h
+        self.tolerance_radial = tolerance_radial
+
+        self.easting_outliers = np.abs(delta_eastings) > tolerance_e
+        self.northing_outliers = np.abs(delta_northings) > tolerance_n
+        self.height_outliers = np.zeros(len(points), dtype=bool)
+        self.radial_outliers = np.zeros(len(points), dtype=bool)
+
+        if tolerance_h is not None:
+            with np.errstate(invalid='ignore'):
+                self.height_outliers = np.abs(delta_heights) > tolerance_h
+
+        if tolerance_radial is not None:
+            self.radial_outliers = self.radials > tolerance_radial
+
+        self.outliers = self.easting_outliers | self.northing_outliers | self.height_outliers | self.radial_outliers
+
+    def __len__(self):
+        return len(self.points)
+
+    def get_outlier_indices(self):
+        return np.flatnonzero(self.outliers)
+
+    def get_outliers(self):
+
+        """ (point, delta E, delta N, delta H, radial) for each point that exceeds a tolerance, sorted by point """
+
+        outliers = [(self.points[index], self.delta_eastings[index], self.delta_northings[index],
+                     self.delta_heights[index], self.radials[index]) for index in self.get_outlier_indices()]
+
+        return sorted(outliers)
+
+
+def match_points_by_position(coordinate_dictionary_1, coordinate_dictionary_2, points_1, points_2, match_tolerance):
+
+    """
+    Pair points_1 with the nearest of points_2 within match_tolerance metres.  Each point of points_2 is used at most
+    once.  Returns the matched (points_1, points_2) lists
+    """
+
+    spatial_index = SpatialIndex.from_coordinate_dictionary(coordinate_dictionary_2, max(match_tolerance, 0.001),
+                                                            points_2)
+    matched_1 = []
+    matched_2 = []
+    used = set()
+
+    for point in points_1:
+
+        coordinates = coordinate_dictionary_1[point]
+        matches = spatial_index.within(coordinates['Eastings'], coordinates['Northings'], match_tolerance)
+
+        for distance, match in matches:
+            if match not in used:
+                used.add(match)
+                matched_1.append(point)
+                matched_2.append(match)
+                break
+
+    return matched_1, matched_2
+
+
+def compare_coordinates(coordinate_dictionary_1, coordinate_dictionary_2, tolerance_e, tolerance_n, tolerance_h=None,
+                        tolerance_radial=None, match_tolerance=None):
+
+    """
+    match_tolerance - also compare points whose names differ between the files (e.g. CTL3 and CTL03) if they are
+    within match_tolerance metres of each other
+    """
+
+    with profiler.stage('Comparison match'):
+
+        common_points = [point for point in coordinate_dictionary_1 if point in coordinate_dictionary_2]
+        matched_points = common_points
+
+        if match_tolerance is not None:
+
+            unmatched_1 = [point for point in coordinate_dictionary_1 if point not in coordinate_dictionary_2]
+            unmatched_2 = [point for point in coordinate_dictionary_2 if point not in coordinate_dictionary_1]
+            position_matches_1, position_matches_2 = match_points_by_position(
+                coordinate_dictionary_1, coordinate_dictionary_2, unmatched_1, unmatched_2, match_tolerance)
+
+            matched_points = common_points + position_matches_2
+            common_points = common_points + position_matches_1
+
+    with profiler.stage('Comparison arrays'):
+        eastings_1, northings_1, heights_1 = get_coordinate_arrays(coordinate_dictionary_1, common_points)
+        eastings_2, northings_2, heights_2 = get_coordinate_arrays(coordinate_dictionary_2, matched_points)
+
+    with profiler.stage('Comparison tolerances'):
+        result = ComparisonResult(common_points, eastings_1 - eastings_2, northings_1 - northings_2,
+                                  heights_1 - heights_2, tolerance_e, tolerance_n, tolerance_h, tolerance_radial,
+                                  matched_points)
+
+    profiler.count('Comparison points compared', len(result))
+
+    return result
+
+
+def compare_coordinate_files(coordinate_file_1, coordinate_file_2, tolerance_e, tolerance_n, tolerance_h=None,
+                             tolerance_radial=None, match_tolerance=None, progress=None):
+
+    """
+    Compare the common points of two CoordinateFile's.  Returns a ComparisonResult.
+    progress - optional ProgressMonitor told how many points were compared
+    """
+
+    result = compare_coordinates(coordinate_file_1.coordinate_dictionary, coordinate_file_2.coordinate_dictionary,
+                                 tolerance_e, tolerance_n, tolerance_h, tolerance_radial, match_tolerance)
+
+    if progress is not None:
+        progress.update('Points compared', len(result), len(result))
+
+    return result
+
+
+def format_metres(values):
+
+    """ Metres to strings to the millimetre, '' for NaN """
+
+    strings = np.char.mod('%.3f', values).astype(str)
+    strings[np.isnan(values)] = ''
+
+    return strings.tolist()
+
+
+def export_comparison_csv(result, filename, indices=None):
+
+    """
+    Write the differences of a ComparisonResult to a CSV file straight from its arrays.  Returns the number of rows.
+    indices - the points to write, in order, by default every point
+    """
+
+    indices = np.arange(len(result)) if indices is None else np.asarray(indices, dtype=np.intp)
+    points = np.array(result.points, dtype=object)[indices].tolist()
+    matched_points = np.array(result.matched_points, dtype=object)[indices].tolist()
+    outliers = np.where(result.outliers[indices], 'Y', '').tolist()
+
+    with profiler.stage('Comparison export'), open_csv(filename) as f:
+
+        writer = csv.writer(f)
+        writer.writerow(['POINT', 'MATCHED POINT', 'dE', 'dN', 'dH', 'RADIAL', 'OUTLIER'])
+        writer.writerows(zip(points, matched_points, format_metres(result.delta_eastings[indices]),
+                             format_metres(result.delta_northings[indices]),
+                             format_metres(result.delta_heights[indices]),
+                             format_metres(result.radials[indices]), outliers))
+
+    return len(indices)
+
+
+def get_radials_and_outliers(eastings, northings, heights, tolerance_e, tolerance_n, tolerance_h=None,
+                             tolerance_radial=None):
+
+    """ (radials, outliers) of arrays of coordinate differences of any shape.  NaN differences are never outliers """
+
+    radials = np.hypot(eastings, northings)
+
+    with np.errstate(invalid='ignore'):
+
+        outliers = (np.abs(eastings) > tolerance_e) | (np.abs(northings) > tolerance_n)
+
+        if tolerance_h is not None:
+            outliers |= np.abs(heights) > tolerance_h
+
+        if tolerance_radial is not None:
+            outliers |= radials > tolerance_radial
+
+    return radials, outliers
+
+
+class EpochComparison:
+
+    """
+    Coordinates of every point of several coordinate files (epochs) in point x epoch matrices, with each point's
+    displacement from a baseline epoch (epoch - baseline) and change between consecutive epochs (epoch - previous
+    epoch).  Rows are in the order of points, columns in the order of epochs and a missing coordinate is NaN, so
+    displacements are NaN wherever a point is missing from either epoch.
+    point_indices - optional dictionary of point -> row, built from points if not given
+    """
+
+    def __init__(self, points, epochs, eastings, northings, heights, tolerance_e, tolerance_n, tolerance_h=None,
+                 tolerance_radial=None, baseline=0, point_indices=None):
+
+        if not 0 <= baseline < len(epochs):
+            raise ValueError('baseline must be the number of one of the {} epochs (0 to {}), not {}'.format(
+                len(epochs), len(epochs) - 1, baseline))
+
+        if point_indices is None:
+            point_indices = dict((point, row) for row, point in enumerate(points))
+
+        self.points = points
+        self.point_indices = point_indices
+        self.epochs = epochs
+        self.eastings = eastings
+        self.northings = northings
+        self.heights = heights
+        self.baseline = baseline
+
+        self.tolerance_e = tolerance_e
+        self.tolerance_n = tolerance_n
+        self.tolerance_h = tolerance_h
+        self.tolerance_radial = tolerance_radial
+
+        tolerances = (tolerance_e, tolerance_n, tolerance_h, tolerance_radial)
+
+        self.displacement_eastings = eastings - eastings[:, baseline:baseline + 1]
+        self.displacement_northings = northings - northings[:, baseline:baseline + 1]
+        self.displacement_heights = heights - heights[:, baseline:baseline + 1]
+        self.displacement_radials, self.outliers = get_radials_and_outliers(
+            self.displacement_eastings, self.displacement_northings, self.displacement_heights, *tolerances)
+
+        # column i is epoch i + 1 - epoch i
+        self.change_eastings = np.diff(eastings, axis=1)
+        self.change_northings = np.diff(northings, axis=1)
+        self.change_heights = np.diff(heights, axis=1)
+        self.change_radials, self.change_outliers = get_radials_and_outliers(
+            self.change_eastings, self.change_northings, self.change_heights, *tolerances)
+
+        # points that exceed a tolerance from the baseline in any epoch
+        self.outlier_points = self.outliers.any(axis=1)
+
+    def __len__(self):
+        return len(self.points)
+
+    def get_point_index(self, point):
+        return self.point_indices[point]
+
+    def get_history(self, point):
+
+        """ (epoch, delta E, delta N, delta H, radial) from the baseline for each epoch with the point """
+
+        index = self.get_point_index(point)
+
+        return [(epoch, self.displacement_eastings[index, column], self.displacement_northings[index, column],
+                 self.displacement_heights[index, column], self.displacement_radials[index, column])
+                for column, epoch in enumerate(self.epochs) if not np.isnan(self.eastings[index, column])]
+
+    def get_outliers(self):
+
+        """
+        (point, epoch, delta E, delta N, delta H, radial) from the baseline for each point and epoch that exceeds a
+        tolerance, sorted by point then epoch
+        """
+
+        rows, columns = np.nonzero(self.outliers)
+        outliers = sorted((self.points[row], column, row) for row, column in zip(rows, columns))
+
+        return [(point, self.epochs[column], self.displacement_eastings[row, column],
+                 self.displacement_northings[row, column], self.displacement_heights[row, column],
+                 self.displacement_radials[row, column]) for point, column, row in outliers]
+
+
+def compare_epochs(coordinate_dictionaries, epochs, tolerance_e, tolerance_n, tolerance_h=None,
+                   tolerance_radial=None, baseline=0):
+
+    """
+    Compare the coordinate dictionaries of any number of epochs at once.  Returns an EpochComparison.
+    baseline - index of the epoch displacements are measured from
+    """
+
+    if len(epochs) != len(coordinate_dictionaries):
+        raise ValueError('{} epochs given for {} coordinate dictionaries'.format(len(epochs),
+                                                                                len(coordinate_dictionaries)))
+
+    with profiler.stage('Comparison match'):
+
+        point_indices = {}
+
+        for coordinate_dictionary in coordinate_dictionaries:
+            for point in coordinate_dictionary:
+                point_indices.setdefault(point, len(point_indices))
+
+        points = sorted(point_indices, key=point_indices.get)
+
+    with profiler.stage('Comparison arrays'):
+
+        shape = (len(points), len(coordinate_dictionaries))
+        eastings = np.full(shape, np.nan)
+        northings = np.full(shape, np.nan)
+        heights = np.full(shape, np.nan)
+
+        for column, coordinate_dictionary in enumerate(coordinate_dictionaries):
+
+            epoch_points = list(coordinate_dictionary)
+            rows = np.array([point_indices[point] for point in epoch_points], dtype=np.intp)
+
+            eastings[rows, column], northings[rows, column], heights[rows, column] = get_coordinate_arrays(
+                coordinate_dictionary, epoch_points)
+
+    with profiler.stage('Comparison tolerances'):
+        result = EpochComparison(points, epochs, eastings, northings, heights, tolerance_e, tolerance_n, tolerance_h,
+                                 tolerance_radial, baseline, point_indices)
+
+    profiler.count('Comparison points compared', eastings.size)
+
+    return result
+
+
+def compare_coordinate_file_epochs(coordinate_files, tolerance_e, tolerance_n, tolerance_h=None,
+                                   tolerance_radial=None, baseline=0, epochs=None, progress=None):
+
+    """
+    Compare CoordinateFile's in epoch order.  epochs - a name for each file, by default its number
+    progress - optional ProgressMonitor told how many points were compared
+    """
+
+    epochs = list(range(len(coordinate_files))) if epochs is None else epochs
+    result = compare_epochs([coordinate_file.coordinate_dictionary for coordinate_file in coordinate_files], epochs,
+                            tolerance_e, tolerance_n, tolerance_h, tolerance_radial, baseline)
+
+    if progress is not None:
+        progress.update('Points compared', len(result), len(result))
+
+    return result
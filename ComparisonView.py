@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+
+"""
+Window listing the points of a ComparisonResult in a ttk.Treeview.
+
+Rows are built from the result's arrays and inserted a batch at a time from the Tk main loop, so the window opens at
+once however many points were compared.  Clicking a column heading sorts by it (again to reverse), the filter only
+shows points whose name contains some text and whose radial difference is at least some distance, and Export writes
+the rows shown, in the order shown, to a CSV file straight from the arrays.
+"""
+
+import tkFileDialog
+import ttk
+from Tkinter import *
+
+import numpy as np
+
+from Comparison import export_comparison_csv, format_metres
+
+# rows inserted per pass of the Tk main loop
+BATCH_SIZE = 500
+
+COLUMNS = ('point', 'delta_e', 'delta_n', 'delta_h', 'radial')
+HEADINGS = {'point': 'POINT', 'delta_e': 'dE', 'delta_n': 'dN', 'delta_h': 'dH', 'radial': 'RADIAL'}
+
+
+class ComparisonView:
+
+    def __init__(self, master, result):
+
+        self.result = result
+        self.points = np.array(result.points, dtype=object)
+        self.sort_keys = {'point': self.points, 'delta_e': result.delta_eastings, 'delta_n': result.delta_northings,
+                          'delta_h': result.delta_heights, 'radial': result.radials}
+
+        # rows shown, in display order
+        self.indices = np.zeros(0, dtype=np.intp)
+        self.sort_column = 'point'
+        self.sort_reverse = False
+        self.inserted = 0
+        self.insert_job = None
+
+        self.top = Toplevel(master)
+        self.top.title("POINTS THAT EXCEED TOLERANCE")
+        self.top.geometry('600x600')
+
+        # Filter
+        filter_frame = Frame(self.top)
+        filter_frame.pack(side=TOP, fill=X)
+
+        Label(filter_frame, text='Point: ').pack(side=LEFT)
+        self.point_entry = Entry(filter_frame, width=12)
+        self.point_entry.pack(side=LEFT)
+
+        Label(filter_frame, text=' Min radial: ').pack(side=LEFT)
+        self.radial_entry = Entry(filter_frame, width=8)
+        self.radial_entry.pack(side=LEFT)
+
+        self.outliers_only = IntVar(value=1)
+        Checkbutton(filter_frame, text='Outliers only', variable=self.outliers_only,
+                    command=self.apply_filter).pack(side=LEFT)
+
+        Button(filter_frame, text='Filter', command=self.apply_filter).pack(side=LEFT)
+        Button(filter_frame, text='Export', command=self.export).pack(side=LEFT)
+
+        self.count_lbl = Label(filter_frame, text=' ')
+        self.count_lbl.pack(side=LEFT)
+
+        self.point_entry.bind('<Return>', self.apply_filter)
+        self.radial_entry.bind('<Return>', self.apply_filter)
+
+        # Table
+        table_frame = Frame(self.top)
+        table_frame.pack(side=TOP, fill=BOTH, expand=True)
+
+        self.tree = ttk.Treeview(table_frame, columns=COLUMNS, show='headings')
+        scrollbar = Scrollbar(table_frame, orient=VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+
+        for column in COLUMNS:
+            self.tree.heading(column, text=HEADINGS[column], command=lambda column=column: self.sort_by(column))
+            self.tree.column(column, width=140 if column == 'point' else 90, anchor=W if column == 'point' else E)
+
+        self.tree.tag_configure('outlier', foreground='red')
+
+        scrollbar.pack(side=RIGHT, fill=Y)
+        self.tree.pack(side=LEFT, fill=BOTH, expand=True)
+
+        self.top.bind('<Destroy>', self.on_destroy)
+
+        self.apply_filter()
+
+    def get_filter(self):
+
+        """ True for each point the filter shows """
+
+        shown = self.result.outliers.copy() if self.outliers_only.get() else np.ones(len(self.result), dtype=bool)
+
+        text = self.point_entry.get().strip().upper()
+
+        if text:
+            shown &= np.array([text in point.upper() for point in self.points.tolist()], dtype=bool)
+
+        try:
+            min_radial = float(self.radial_entry.get())
+        except ValueError:
+            min_radial = None
+
+        if min_radial is not None:
+            shown &= self.result.radials >= min_radial
+
+        return shown
+
+    def apply_filter(self, event=None):
+
+        self.indices = np.flatnonzero(self.get_filter())
+        self.sort_rows()
+
+    def sort_by(self, column):
+
+        """ Sort by a column, or reverse the order if it is already sorted by it """
+
+        self.sort_reverse = not self.sort_reverse if column == self.sort_column else False
+        self.sort_column = column
+        self.sort_rows()
+
+    def sort_rows(self):
+
+        keys = self.sort_keys[self.sort_column][self.indices]
+        is_number = keys.dtype != object
+
+        # differences are negated rather than the order reversed, so NaN heights go last in both directions
+        if self.sort_reverse and is_number:
+            keys = -keys
+
+        # stable, so points with equal differences keep their order
+        order = np.argsort(keys, kind='mergesort')
+
+        if self.sort_reverse and not is_number:
+            order = order[::-1]
+
+        self.indices = self.indices[order]
+        self.show_rows()
+
+    def show_rows(self):
+
+        if self.insert_job is not None:
+            self.top.after_cancel(self.insert_job)
+            self.insert_job = None
+
+        self.tree.delete(*self.tree.get_children())
+        self.inserted = 0
+        self.count_lbl.config(text=' {} of {} points'.format(len(self.indices), len(self.result)))
+
+        self.insert_rows()
+
+    def insert_rows(self):
+
+        """ Insert the next batch of rows, then let Tk handle events before the batch after it """
+
+        batch = self.indices[self.inserted:self.inserted + BATCH_SIZE]
+        result = self.result
+        outliers = result.outliers[batch].tolist()
+
+        for index, point, delta_e, delta_n, delta_h, radial, outlier in zip(
+                batch.tolist(), self.points[batch].tolist(), format_metres(result.delta_eastings[batch]),
+                format_metres(result.delta_northings[batch]), format_metres(result.delta_heights[batch]),
+                format_metres(result.radials[batch]), outliers):
+
+            self.tree.insert('', END, iid=str(index), values=(point, delta_e, delta_n, delta_h, radial),
+                             tags=('outlier',) if outlier else ())
+
+        self.inserted += len(batch)
+        self.insert_job = self.top.after(1, self.insert_rows) if self.inserted < len(self.indices) else None
+
+    def export(self):
+
+        filename = tkFileDialog.asksaveasfilename(parent=self.top, defaultextension='.csv',
+                                                 filetypes=[('CSV', '*.csv')])
+
+        if filename:
+            export_comparison_csv(self.result, filename, self.indices)
+
+    def on_destroy(self, event):
+
+        # <Destroy> is also sent for every child widget
+        if event.widget is self.top and self.insert_job is not None:
+            self.top.after_cancel(self.insert_job)
+            self.insert_job = None
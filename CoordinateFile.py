@@ -0,0 +1,281 @@
+# -*- coding: utf-8 -*-
+
+"""
+CompNet coordinate files - fixed files (*.FIX) and coordinate files (*.CRD, *.STD, *.asc)
+"""
+
+import multiprocessing
+import os
+import re
+import threading
+from collections import namedtuple
+from multiprocessing.pool import ThreadPool
+
+from CoordinateFormats import get_coordinate_parser
+from SpatialIndex import SpatialIndex
+from FileUtils import atomic_write
+from GSIExceptions import OperationCancelledError
+from Instrumentation import profiler
+
+
+# One row of a fixed file update report.  Old values and deltas are None if the old line had no readable coordinates
+StationChange = namedtuple('StationChange', ['station', 'line_number', 'old_easting', 'old_northing', 'new_easting',
+                                             'new_northing', 'delta_easting', 'delta_northing'])
+
+# Result of updating one fixed file in update_fixed_files - error is None if the update succeeded
+FixedFileUpdate = namedtuple('FixedFileUpdate', ['fixed_file_path', 'changes', 'error'])
+
+
+class FixedFile:
+
+    # Station is quoted e.g. "STN03", line number is at the start of a line and followed by whitespace
+    re_pattern_station = re.compile(r'"\w+"')
+    re_pattern_line_number = re.compile(r'^\d+\s')
+
+    def __init__(self, fixed_file_path):
+
+        self.fixed_file_path = fixed_file_path
+        self.fixed_file_contents = None
+        self.station_list = []
+        self.updated_file_contents = ""
+
+        with profiler.stage('Fixed file read'), open(fixed_file_path, 'r') as f_orig:
+            self.fixed_file_contents = f_orig.readlines()
+
+    @staticmethod
+    def get_station(line):
+
+        station = "UNKNOWN"
+
+        match = FixedFile.re_pattern_station.search(line)
+
+        # strip of quotation marks and add to station list
+        if match is not None:
+            station = match.group()[1:-1]
+
+        return station
+
+    @staticmethod
+    def get_line_number(line):
+
+        line_number = "???"
+
+        match = FixedFile.re_pattern_line_number.search(line)
+
+        if match:
+            line_number = match.group().strip()
+
+        return line_number
+
+    @staticmethod
+    def get_line_coordinates(line):
+
+        """ (easting, northing) of a fixed file line e.g. 1 286925.0180  6215841.2629 "STN03", or (None, None) """
+
+        fields = line.split()
+
+        try:
+            return float(fields[1]), float(fields[2])
+        except (IndexError, ValueError):
+            return None, None
+
+    def update(self, coordinate_file, tolerance=None):
+
+        """
+        Update the fixed file's eastings and northings from coordinate_file and write it back.  Returns a list of
+        StationChange, one per updated station.
+
+        tolerance - if a station isn't found by name in coordinate_file, use the coordinate file point nearest to the
+        station's current fixed coordinates, if it is within tolerance metres
+        """
+
+        updated_lines = []
+        changes = []
+
+        with profiler.stage('Fixed file match'):
+            for line in self.fixed_file_contents:
+
+                # Get coordinates for this station if exists in the coordinate file
+                station = self.get_station(line)
+                old_easting, old_northing = self.get_line_coordinates(line)
+
+                coordinate_dict = coordinate_file.get_point_coordinates(station, old_easting, old_northing, tolerance)
+
+                # update fixed_file coordinate if a match was found
+                if coordinate_dict:
+                    easting = coordinate_dict['Eastings']
+                    northing = coordinate_dict['Northings']
+                    line_number = self.get_line_number(line)
+
+                    updated_lines.append(line_number + ' ' + easting + '  ' + northing + ' "' + station + '"\n')
+
+                    delta_easting = None if old_easting is None else float(easting) - old_easting
+                    delta_northing = None if old_northing is None else float(northing) - old_northing
+                    changes.append(StationChange(station, line_number, old_easting, old_northing, float(easting),
+                                                 float(northing), delta_easting, delta_northing))
+
+                else:
+                    updated_lines.append(line)
+
+            self.updated_file_contents = ''.join(updated_lines)
+
+        profiler.count('Fixed file stations updated', len(changes))
+
+        # update fixed file with updated contents
+        with profiler.stage('Fixed file write'):
+            atomic_write(self.fixed_file_path, self.updated_file_contents)
+
+        return changes
+
+
+def update_fixed_files(fixed_file_paths, coordinate_file, tolerance=None, threads=None, progress=None):
+
+    """
+    Update many fixed files from one CoordinateFile concurrently.  Each file is written atomically and a failure in
+    one file doesn't stop the others.  Returns a FixedFileUpdate per fixed file, in the same order as fixed_file_paths.
+    progress - optional ProgressMonitor told how many files have been updated.  If it is cancelled, files that haven't
+    started yet are left alone and OperationCancelledError is raised
+    """
+
+    if tolerance is not None:
+        # build the shared index up front rather than in whichever thread needs it first
+        coordinate_file.get_spatial_index(max(tolerance, 0.001))
+
+    files_updated = [0]
+    progress_lock = threading.Lock()
+
+    def update_fixed_file(fixed_file_path):
+
+        if progress is not None and progress.cancelled:
+            raise OperationCancelledError()
+
+        try:
+            fixed_file_update = FixedFileUpdate(fixed_file_path,
+                                                FixedFile(fixed_file_path).update(coordinate_file, tolerance), None)
+
+        except Exception as ex:
+            fixed_file_update = FixedFileUpdate(fixed_file_path, [], '{}: {}'.format(type(ex).__name__, ex))
+
+        if progress is not None:
+
+            with progress_lock:
+                files_updated[0] += 1
+                count = files_updated[0]
+
+            progress.update('Fixed files updated', count, len(fixed_file_paths))
+
+        return fixed_file_update
+
+    if len(fixed_file_paths) <= 1:
+        return [update_fixed_file(fixed_file_path) for fixed_file_path in fixed_file_paths]
+
+    pool = ThreadPool(min(threads or multiprocessing.cpu_count(), len(fixed_file_paths)))
+
+    try:
+        return pool.map(update_fixed_file, fixed_file_paths)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def format_change_report(fixed_file_updates):
+
+    report_lines = []
+
+    for fixed_file_update in fixed_file_updates:
+
+        report_lines.append(os.path.basename(fixed_file_update.fixed_file_path))
+
+        if fixed_file_update.error:
+            report_lines.append('    FAILED - ' + fixed_file_update.error)
+
+        for change in fixed_file_update.changes:
+
+            if change.delta_easting is None:
+                report_lines.append('    {}:  new {:.4f}  {:.4f}'.format(change.station, change.new_easting,
+                                                                        change.new_northing))
+            else:
+                report_lines.append('    {}:  old {:.4f}  {:.4f}  new {:.4f}  {:.4f}  dE {:.4f}  dN {:.4f}'.format(
+                    change.station, change.old_easting, change.old_northing, change.new_easting,
+                    change.new_northing, change.delta_easting, change.delta_northing))
+
+    return '\n'.join(report_lines) + '\n'
+
+
+class CoordinateFile:
+
+    def __init__(self, coordinate_file_path, cache=None, progress=None):
+
+        """
+        cache - optional ParseCache to load the coordinates from, or save them to
+        progress - optional ProgressMonitor told how many lines have been parsed
+        """
+
+        self.file_contents = None
+        self.file_format = None
+        self.coordinate_dictionary = {}
+        self.spatial_index = None
+
+        if cache is not None:
+            with profiler.stage('Coordinate cache load'):
+                cached_coordinates, cache_stamp = cache.lookup(coordinate_file_path, 'coordinates')
+
+            if cached_coordinates is not None:
+                self.file_format, self.coordinate_dictionary = cached_coordinates
+                return
+
+        try:
+            with profiler.stage('Coordinate read'), open(coordinate_file_path, 'r') as f_orig:
+
+                self.file_contents = f_orig.readlines()
+
+        except Exception as ex:
+            print(ex, type(ex))
+
+        else:
+
+            # work out the file type (CRD, STD, asc ...) from its header and build coordinate dictionary
+            self.build_coordinate_dictionary(get_coordinate_parser(self.file_contents), progress)
+
+            if cache is not None:
+                with profiler.stage('Coordinate cache store'):
+                    cache.store(coordinate_file_path, 'coordinates', (self.file_format, self.coordinate_dictionary),
+                                cache_stamp)
+
+    def get_point_coordinates(self, point, easting=None, northing=None, tolerance=None):
+
+        """
+        Coordinates of point.  If there's no point with that name and easting, northing and tolerance are given, the
+        coordinates of the nearest point within tolerance of easting, northing are returned instead
+        """
+
+        coordinates = self.coordinate_dictionary.get(point)
+
+        if coordinates is None and tolerance is not None and easting is not None and northing is not None:
+
+            nearest = self.get_spatial_index(max(tolerance, 0.001)).nearest(easting, northing, tolerance)
+
+            if nearest is not None:
+                coordinates = self.coordinate_dictionary[nearest[1]]
+
+        return coordinates
+
+    def get_spatial_index(self, cell_size=1.0):
+
+        """ SpatialIndex of all the points, built the first time it is needed and again if cell_size changes """
+
+        if self.spatial_index is None or self.spatial_index.cell_size != float(cell_size):
+            with profiler.stage('Spatial index build'):
+                self.spatial_index = SpatialIndex.from_coordinate_dictionary(self.coordinate_dictionary, cell_size)
+
+        return self.spatial_index
+
+    def build_coordinate_dictionary(self, parser, progress=None):
+
+        self.file_format = parser.name
+
+        with profiler.stage('Coordinate tokenize'):
+            self.coordinate_dictionary = parser.parse(self.file_contents, progress)
+
+        profiler.count('Coordinate lines read', len(self.file_contents))
+        profiler.count('Coordinate points loaded', len(self.coordinate_dictionary))
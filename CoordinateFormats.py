@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+
+"""
+Parsers for the coordinate file formats CompNet Assist reads, looked up through a registry.
+
+Each parser recognises its format from the first lines of a file and turns the lines into a dictionary of point name
+-> coordinate dictionary e.g. {'STN03': {'Eastings': '285968.9412', 'Northings': '6215310.3788'}}.  Coordinate values
+are kept as the strings written in the file.  A new format is added by subclassing CoordinateParser and decorating it
+with @register_coordinate_format.  By default a format is detected by its first line parsing as a point, and a point
+line is its name, easting, northing and optional height separated by spaces.
+"""
+
+from collections import OrderedDict
+
+from GSIExceptions import UnsupportedCoordinateFileError
+
+# number of lines at the start of a file used to detect its format
+DETECT_LINE_COUNT = 20
+
+# lines between progress updates
+PROGRESS_INTERVAL = 50000
+
+COORDINATE_FORMATS = OrderedDict()
+
+
+def register_coordinate_format(parser_class):
+
+    COORDINATE_FORMATS[parser_class.name] = parser_class
+    return parser_class
+
+
+def get_coordinate_parser(lines):
+
+    """ The registered parser whose format matches the first lines of the file """
+
+    header_lines = lines[:DETECT_LINE_COUNT]
+
+    for parser_class in COORDINATE_FORMATS.values():
+        if parser_class.detect(header_lines):
+            return parser_class
+
+    raise UnsupportedCoordinateFileError()
+
+
+def is_number(text):
+
+    try:
+        float(text)
+    except ValueError:
+        return False
+
+    return True
+
+
+def first_data_line(lines):
+
+    for line in lines:
+        if line.strip():
+            return line
+
+    return ''
+
+
+class CoordinateParser:
+
+    name = None
+
+    @classmethod
+    def detect(cls, header_lines):
+
+        """ True if the first line with anything on it is a point of the format """
+
+        return cls.parse_line(first_data_line(header_lines)) is not None
+
+    @classmethod
+    def data_lines(cls, lines):
+
+        """ The lines that follow any header """
+
+        return lines
+
+    @classmethod
+    def parse(cls, lines, progress=None):
+
+        """ progress - optional ProgressMonitor told how many lines have been parsed """
+
+        coordinate_dictionary = {}
+
+        for line_count, line in enumerate(cls.data_lines(lines), 1):
+
+            point = cls.parse_line(line)
+
+            if point is not None:
+                coordinate_dictionary[point[0]] = point[1]
+
+            if progress is not None and line_count % PROGRESS_INTERVAL == 0:
+                progress.update('Coordinate lines parsed', line_count, len(lines))
+
+        return coordinate_dictionary
+
+    @classmethod
+    def parse_line(cls, line):
+
+        """
+        (point name, coordinate dictionary) for a line, or None if it doesn't hold a point e.g. blank line.  By default
+        a line is the point name, easting, northing and optionally height separated by spaces
+        """
+
+        fields = line.split()
+
+        if len(fields) < 3:
+            return None
+
+        try:
+            float(fields[1]), float(fields[2])
+        except ValueError:
+            return None
+
+        coordinates = {'Eastings': fields[1], 'Northings': fields[2]}
+
+        if len(fields) > 3 and is_number(fields[3]):
+            coordinates['Heights'] = fields[3]
+
+        return fields[0], coordinates
+
+
+@register_coordinate_format
+class CRDParser(CoordinateParser):
+
+    """
+    CompNet *.CRD - a header ending with a 'DESCRIPTION  EAST  NORTH' row, then one point per line as
+    CoordinateParser.parse_line reads them:
+                   STN03              285968.9412             6215310.3788
+    """
+
+    name = 'CRD'
+
+    @classmethod
+    def detect(cls, header_lines):
+        return any('DESCRIPTION' in line and 'EAST' in line for line in header_lines)
+
+    @classmethod
+    def data_lines(cls, lines):
+
+        for line_number, line in enumerate(lines):
+            if 'DESCRIPTION' in line:
+                return lines[line_number + 1:]
+
+        return []
+
+
+@register_coordinate_format
+class ASCParser(CoordinateParser):
+
+    """
+    *.asc export - '@%' header lines then one point per line, optionally with a description after the point name:
+        @#CTL03 170220        286254.9359   6215385.8195       117.4396    22.3390 REF   34
+    """
+
+    name = 'ASC'
+
+    @classmethod
+    def detect(cls, header_lines):
+        return first_data_line(header_lines).startswith('@%')
+
+    @classmethod
+    def parse_line(cls, line):
+
+        if not line.startswith('@#'):
+            return None
+
+        fields = line.split()
+
+        # the easting is the first number with a decimal point after the point name and description
+        for index in range(1, len(fields) - 1):
+            if '.' in fields[index] and is_number(fields[index]):
+                break
+        else:
+            return None
+
+        if not is_number(fields[index + 1]):
+            return None
+
+        coordinates = {'Eastings': fields[index], 'Northings': fields[index + 1]}
+
+        if index + 2 < len(fields) and is_number(fields[index + 2]):
+            coordinates['Heights'] = fields[index + 2]
+
+        if index > 1:
+            coordinates['Description'] = ' '.join(fields[1:index])
+
+        return fields[0][2:], coordinates
+
+
+@register_coordinate_format
+class STDParser(CoordinateParser):
+
+    """
+    CompNet *.STD - line number, easting, northing, their standard deviations and the quoted point name:
+        1 285968.9510 6215310.3810 0.010 0.010 "STN03"
+    """
+
+    name = 'STD'
+
+    @classmethod
+    def parse_line(cls, line):
+
+        fields = line.split()
+
+        if len(fields) != 6 or not fields[5].startswith('"'):
+            return None
+
+        try:
+            float(fields[1]), float(fields[2]), float(fields[3]), float(fields[4])
+        except ValueError:
+            return None
+
+        return fields[5].strip('"'), {'Eastings': fields[1], 'Northings': fields[2],
+                                      'Std_Dev_Eastings': fields[3], 'Std_Dev_Northings': fields[4]}
+
+
+@register_coordinate_format
+class FIXParser(CoordinateParser):
+
+    """
+    CompNet *.FIX - line number, easting, northing and the quoted point name:
+        1 286925.0180  6215841.2629 "STN03"
+    """
+
+    name = 'FIX'
+
+    @classmethod
+    def parse_line(cls, line):
+
+        fields = line.split()
+
+        if len(fields) != 4 or not fields[3].startswith('"'):
+            return None
+
+        try:
+            float(fields[1]), float(fields[2])
+        except ValueError:
+            return None
+
+        return fields[3].strip('"'), {'Eastings': fields[1], 'Northings': fields[2]}
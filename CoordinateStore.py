@@ -0,0 +1,262 @@
+# -*- coding: utf-8 -*-
+
+"""
+SQLite store of the coordinates of every coordinate file (*.CRD, *.STD, *.asc) of a project.
+
+Each file is parsed once and its points bulk inserted, so the latest coordinates of a point, or its whole history
+across the project's files, are one indexed query away without parsing the files again.  Every file has an epoch -
+by default its modification time - that orders its coordinates against the other files'.
+
+    with CoordinateStore('AA9 ARTC.sqlite') as store:
+        store.add_file('AA9 ARTC_130120.CRD')
+        store.add_file('AA9 ARTC 170220.asc', epoch='2020-02-17')
+        coordinates = store.get_latest('STN12')
+        update_fixed_files(fixed_file_paths, store.get_coordinate_file())
+
+Coordinates are stored as the strings written in the files, the same as CoordinateFile.coordinate_dictionary.
+"""
+
+import os
+import sqlite3
+import time
+
+from CoordinateFile import CoordinateFile
+from GSIExceptions import UnsupportedCoordinateFileError
+from Instrumentation import profiler
+
+EPOCH_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS source_files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    file_format TEXT,
+    epoch TEXT NOT NULL,
+    size INTEGER,
+    mtime REAL
+);
+CREATE TABLE IF NOT EXISTS coordinates (
+    point TEXT NOT NULL,
+    source_id INTEGER NOT NULL REFERENCES source_files (id),
+    epoch TEXT NOT NULL,
+    easting TEXT NOT NULL,
+    northing TEXT NOT NULL,
+    height TEXT,
+    description TEXT,
+    std_dev_easting TEXT,
+    std_dev_northing TEXT
+);
+CREATE INDEX IF NOT EXISTS coordinates_point ON coordinates (point, epoch, source_id);
+CREATE INDEX IF NOT EXISTS coordinates_source ON coordinates (source_id);
+CREATE INDEX IF NOT EXISTS coordinates_epoch ON coordinates (epoch);
+"""
+
+COORDINATE_COLUMNS = 'point, easting, northing, height, description, std_dev_easting, std_dev_northing'
+
+# columns added to the coordinates table since it was first created, for databases made before them
+ADDED_COORDINATE_COLUMNS = ('std_dev_easting', 'std_dev_northing')
+
+# coordinate dictionary keys of the optional columns, after easting and northing
+OPTIONAL_COORDINATE_KEYS = ('Heights', 'Description', 'Std_Dev_Eastings', 'Std_Dev_Northings')
+
+
+def get_coordinates(row):
+
+    """
+    Coordinate dictionary, as CoordinateFile.coordinate_dictionary has it, of an easting ... std_dev_northing row
+    """
+
+    coordinates = {'Eastings': row[0], 'Northings': row[1]}
+
+    for key, value in zip(OPTIONAL_COORDINATE_KEYS, row[2:]):
+        if value is not None:
+            coordinates[key] = value
+
+    return coordinates
+
+
+def get_file_epoch(path):
+    return time.strftime(EPOCH_FORMAT, time.localtime(os.path.getmtime(path)))
+
+
+class StoredCoordinateFile(CoordinateFile):
+
+    """ CoordinateFile of coordinates from a CoordinateStore, for FixedFile.update and Comparison """
+
+    def __init__(self, coordinate_dictionary, file_format=None):
+
+        self.file_contents = None
+        self.file_format = file_format
+        self.coordinate_dictionary = coordinate_dictionary
+        self.spatial_index = None
+
+
+class CoordinateStore:
+
+    def __init__(self, database_filename):
+
+        self.database_filename = database_filename
+        self.connection = sqlite3.connect(database_filename)
+
+        # coordinates come back as str, not unicode, on python 2 like CoordinateFile's
+        self.connection.text_factory = str
+        self.connection.executescript(SCHEMA)
+        self.add_missing_columns()
+
+    def add_missing_columns(self):
+
+        columns = [row[1] for row in self.connection.execute('PRAGMA table_info(coordinates)')]
+
+        with self.connection:
+            for column in ADDED_COORDINATE_COLUMNS:
+                if column not in columns:
+                    self.connection.execute('ALTER TABLE coordinates ADD COLUMN {} TEXT'.format(column))
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def add_file(self, path, epoch=None, cache=None):
+
+        """
+        Parse a coordinate file and store its points, replacing any earlier version of the file.  A file that hasn't
+        changed since it was stored isn't parsed again.  Returns the number of points stored, or None if unchanged.
+        If the file can't be read or has no points the coordinates already stored for it are kept and an error raised.
+        epoch - sortable string e.g. '2020-02-17', by default the file's modification time
+        cache - optional ParseCache to load the coordinates from
+        """
+
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        stored = self.connection.execute('SELECT size, mtime, epoch FROM source_files WHERE path = ?',
+                                         (path,)).fetchone()
+
+        if stored is not None and stored[:2] == (stat.st_size, stat.st_mtime) and epoch in (None, stored[2]):
+            return None
+
+        coordinate_file = CoordinateFile(path, cache)
+
+        # CoordinateFile carries on without coordinates if the file can't be read
+        if coordinate_file.file_format is None:
+            raise IOError('Could not read {}'.format(path))
+
+        if not coordinate_file.coordinate_dictionary:
+            raise UnsupportedCoordinateFileError('No points in {}'.format(path))
+
+        return self.add_coordinates(path, coordinate_file.coordinate_dictionary, coordinate_file.file_format,
+                                    epoch or get_file_epoch(path), stat)
+
+    def add_coordinates(self, path, coordinate_dictionary, file_format, epoch, stat=None):
+
+        """ Store a coordinate dictionary as the points of path, in one transaction """
+
+        rows = ((point, coordinates['Eastings'], coordinates['Northings']) +
+                tuple(coordinates.get(key) for key in OPTIONAL_COORDINATE_KEYS)
+                for point, coordinates in coordinate_dictionary.items())
+
+        with profiler.stage('Coordinate store write'), self.connection:
+
+            self.remove_source(path)
+
+            source_id = self.connection.execute(
+                'INSERT INTO source_files (path, file_format, epoch, size, mtime) VALUES (?, ?, ?, ?, ?)',
+                (path, file_format, epoch, None if stat is None else stat.st_size,
+                 None if stat is None else stat.st_mtime)).lastrowid
+
+            self.connection.executemany(
+                'INSERT INTO coordinates ({}, source_id, epoch) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)'.format(
+                    COORDINATE_COLUMNS), (row + (source_id, epoch) for row in rows))
+
+        profiler.count('Coordinate store points written', len(coordinate_dictionary))
+
+        return len(coordinate_dictionary)
+
+    def remove_file(self, path):
+
+        with self.connection:
+            self.remove_source(os.path.abspath(path))
+
+    def remove_source(self, path):
+
+        self.connection.execute('DELETE FROM coordinates WHERE source_id IN '
+                                '(SELECT id FROM source_files WHERE path = ?)', (path,))
+        self.connection.execute('DELETE FROM source_files WHERE path = ?', (path,))
+
+    def get_sources(self):
+
+        """ (path, file format, epoch, point count) of every stored file, in epoch order """
+
+        return self.connection.execute(
+            'SELECT path, file_format, source_files.epoch, COUNT(point) FROM source_files '
+            'LEFT JOIN coordinates ON coordinates.source_id = source_files.id '
+            'GROUP BY source_files.id ORDER BY source_files.epoch, source_files.id').fetchall()
+
+    def get_latest(self, point):
+
+        """ Coordinate dictionary of point from the file with the latest epoch, or None """
+
+        row = self.connection.execute(
+            'SELECT {} FROM coordinates WHERE point = ? ORDER BY epoch DESC, source_id DESC LIMIT 1'.format(
+                COORDINATE_COLUMNS), (point,)).fetchone()
+
+        return None if row is None else get_coordinates(row[1:])
+
+    def get_history(self, point):
+
+        """ (epoch, path, coordinate dictionary) of point in every file that has it, in epoch order """
+
+        rows = self.connection.execute(
+            'SELECT coordinates.epoch, path, {} FROM coordinates '
+            'JOIN source_files ON source_files.id = coordinates.source_id WHERE point = ? '
+            'ORDER BY coordinates.epoch, source_id'.format(COORDINATE_COLUMNS), (point,))
+
+        return [(row[0], row[1], get_coordinates(row[3:])) for row in rows]
+
+    def get_latest_coordinates(self, epoch=None):
+
+        """
+        Coordinate dictionary of every point with its latest coordinates.
+        epoch - only use files up to and including this epoch
+        """
+
+        query = 'SELECT {} FROM coordinates'.format(COORDINATE_COLUMNS)
+        parameters = ()
+
+        if epoch is not None:
+            query += ' WHERE epoch <= ?'
+            parameters = (epoch,)
+
+        # later rows of a point replace earlier ones
+        rows = self.connection.execute(query + ' ORDER BY point, epoch, source_id', parameters)
+
+        return dict((row[0], get_coordinates(row[1:])) for row in rows)
+
+    def get_source_coordinates(self, path):
+
+        """ Coordinate dictionary of one stored file """
+
+        rows = self.connection.execute(
+            'SELECT {} FROM coordinates WHERE source_id IN (SELECT id FROM source_files WHERE path = ?)'.format(
+                COORDINATE_COLUMNS), (os.path.abspath(path),))
+
+        return dict((row[0], get_coordinates(row[1:])) for row in rows)
+
+    def get_coordinate_file(self, path=None, epoch=None):
+
+        """
+        StoredCoordinateFile of the coordinates of one stored file, or if path is None the latest coordinates of
+        every point (up to epoch), to use in place of a CoordinateFile
+        """
+
+        if path is None:
+            return StoredCoordinateFile(self.get_latest_coordinates(epoch))
+
+        row = self.connection.execute('SELECT file_format FROM source_files WHERE path = ?',
+                                      (os.path.abspath(path),)).fetchone()
+
+        return StoredCoordinateFile(self.get_source_coordinates(path), None if row is None else row[0])
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+
+"""
+Reduction of face left / face right pairs of shots.
+
+Each target is usually shot on both faces of the instrument - face left with a zenith angle under 180°, then plunged
+and turned through 180° for face right.  Within each station setup a shot is paired with the next shot to the same
+point on the other face, and every pair is reduced at once with numpy over the whole file:
+
+    mean direction      face left horizontal angle corrected by the collimation error
+    mean zenith         (zenith left - zenith right + 360°) / 2
+    collimation error   (horizontal left - horizontal right ± 180°) / 2
+    index error         (zenith left + zenith right - 360°) / 2
+    distances           means of the two faces' slope, horizontal distance and height difference, and the spread of
+                        the slope distances (face left - face right)
+
+Angles are in arc-seconds and distances in metres.
+
+    gsi.format_gsi('TL231019.GSI')
+    reduction = reduce_faces(gsi.store)
+    for station, point, collimation, index, distance_spread in reduction.get_outliers():
+        ...
+"""
+
+import numpy as np
+
+from GSIDecode import get_arc_seconds, get_metres, get_point_ids, get_present
+from GSIStore import ABSENT
+from Instrumentation import profiler
+
+HALF_CIRCLE = 648000.0
+FULL_CIRCLE = 1296000.0
+
+# default tolerances - arc-seconds and metres
+TOLERANCE_COLLIMATION = 20.0
+TOLERANCE_INDEX = 20.0
+TOLERANCE_DISTANCE = 0.003
+
+
+def wrap_half_circle(arc_seconds):
+
+    """ Angles to the equivalent angle between -180° and 180° """
+
+    return (arc_seconds + HALF_CIRCLE) % FULL_CIRCLE - HALF_CIRCLE
+
+
+def select_alternate(candidates):
+
+    """
+    Of each run of consecutive True values keep the 1st, 3rd, 5th .. so no two selected pairs (candidate i pairs
+    shots i and i + 1) share a shot
+    """
+
+    index = np.arange(len(candidates))
+    run_starts = candidates & ~np.concatenate(([False], candidates[:-1]))
+    run_start_index = np.maximum.accumulate(np.where(run_starts, index, 0)) if len(index) else index
+
+    return candidates & ((index - run_start_index) % 2 == 0)
+
+
+def pair_faces(store):
+
+    """
+    (face left rows, face right rows, setup numbers) of every pair of shots to the same point from the same station
+    setup on opposite faces.  Setup numbers index store.station_setup_rows, -1 for shots before the first setup
+    """
+
+    rows = np.flatnonzero(get_present(store, '21') & get_present(store, '22') &
+                          (np.frombuffer(store.masks['84'], dtype=np.uint8) == ABSENT))
+
+    setup_rows = np.array(store.station_setup_rows, dtype=np.intp)
+    setups = np.searchsorted(setup_rows, rows, side='right') - 1
+
+    point_ids = get_point_ids(store)[rows]
+    point_ids[np.equal(point_ids, None)] = ''
+    point_codes = np.unique(point_ids, return_inverse=True)[1] if len(rows) else rows
+
+    face_right = (get_arc_seconds(store, '22').filled(0) > HALF_CIRCLE)[rows]
+
+    # shots to the same point from the same setup, in file order, are next to each other
+    order = np.lexsort((rows, point_codes, setups))
+    rows, setups, point_codes, face_right = rows[order], setups[order], point_codes[order], face_right[order]
+
+    candidates = ((setups[:-1] == setups[1:]) & (point_codes[:-1] == point_codes[1:]) &
+                  (face_right[:-1] != face_right[1:]))
+    first = np.flatnonzero(select_alternate(candidates))
+    second = first + 1
+
+    left_rows = np.where(face_right[first], rows[second], rows[first])
+    right_rows = np.where(face_right[first], rows[first], rows[second])
+
+    # back into file order
+    order = np.argsort(left_rows, kind='mergesort')
+
+    return left_rows[order], right_rows[order], setups[first][order]
+
+
+class FaceReduction:
+
+    def __init__(self, store, tolerance_collimation=TOLERANCE_COLLIMATION, tolerance_index=TOLERANCE_INDEX,
+                 tolerance_distance=TOLERANCE_DISTANCE):
+
+        self.tolerance_collimation = tolerance_collimation
+        self.tolerance_index = tolerance_index
+        self.tolerance_distance = tolerance_distance
+
+        with profiler.stage('Face reduction pairing'):
+            self.left_rows, self.right_rows, self.setups = pair_faces(store)
+
+        with profiler.stage('Face reduction'):
+
+            point_ids = get_point_ids(store)
+            station_ids = point_ids[np.array(store.station_setup_rows, dtype=np.intp)]
+
+            # None for shots before the first station setup
+            self.points = point_ids[self.left_rows]
+            self.stations = np.empty(len(self.setups), dtype=object)
+            self.stations[self.setups >= 0] = station_ids[self.setups[self.setups >= 0]]
+
+            horizontal_angles = get_arc_seconds(store, '21').filled(np.nan)
+            zeniths = get_arc_seconds(store, '22').filled(np.nan)
+
+            horizontal_left = horizontal_angles[self.left_rows]
+            horizontal_right = horizontal_angles[self.right_rows]
+            zenith_left = zeniths[self.left_rows]
+            zenith_right = zeniths[self.right_rows]
+
+            self.collimation_errors = wrap_half_circle(horizontal_left - horizontal_right + HALF_CIRCLE) / 2
+            self.mean_directions = (horizontal_left - self.collimation_errors) % FULL_CIRCLE
+            self.index_errors = (zenith_left + zenith_right - FULL_CIRCLE) / 2
+            self.mean_zeniths = zenith_left - self.index_errors
+
+            slope_distances = get_metres(store, '31').filled(np.nan)
+            horizontal_distances = get_metres(store, '32').filled(np.nan)
+            height_differences = get_metres(store, '33').filled(np.nan)
+
+            self.slope_distances = (slope_distances[self.left_rows] + slope_distances[self.right_rows]) / 2
+            self.horizontal_distances = (horizontal_distances[self.left_rows] +
+                                         horizontal_distances[self.right_rows]) / 2
+            self.height_differences = (height_differences[self.left_rows] + height_differences[self.right_rows]) / 2
+            self.distance_spreads = slope_distances[self.left_rows] - slope_distances[self.right_rows]
+
+            # missing distances are never out of tolerance
+            with np.errstate(invalid='ignore'):
+                self.collimation_outliers = np.abs(self.collimation_errors) > tolerance_collimation
+                self.index_outliers = np.abs(self.index_errors) > tolerance_index
+                self.distance_outliers = np.abs(self.distance_spreads) > tolerance_distance
+
+            self.outliers = self.collimation_outliers | self.index_outliers | self.distance_outliers
+
+        profiler.count('Face reduction pairs', len(self))
+
+    def __len__(self):
+        return len(self.left_rows)
+
+    def get_outlier_indices(self):
+        return np.flatnonzero(self.outliers)
+
+    def get_outliers(self):
+
+        """ (station, point, collimation error, index error, distance spread) of each pair out of tolerance """
+
+        return [(self.stations[index], self.points[index], self.collimation_errors[index], self.index_errors[index],
+                 self.distance_spreads[index]) for index in self.get_outlier_indices()]
+
+    def get_setup_means(self):
+
+        """ Setup number -> (mean collimation error, mean index error) of the setup's pairs """
+
+        setups, inverse, counts = np.unique(self.setups, return_inverse=True, return_counts=True)
+        collimation_means = np.bincount(inverse, self.collimation_errors) / counts
+        index_means = np.bincount(inverse, self.index_errors) / counts
+
+        return dict((setup, (collimation, index)) for setup, collimation, index in
+                    zip(setups.tolist(), collimation_means.tolist(), index_means.tolist()))
+
+
+def reduce_faces(store, tolerance_collimation=TOLERANCE_COLLIMATION, tolerance_index=TOLERANCE_INDEX,
+                 tolerance_distance=TOLERANCE_DISTANCE):
+
+    """ FaceReduction of every face left / face right pair of a GSIColumnStore """
+
+    return FaceReduction(store, tolerance_collimation, tolerance_index, tolerance_distance)
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+
+"""
+File helpers shared by the CompNet Assist modules
+"""
+
+import binascii
+import errno
+import os
+import stat
+from contextlib import contextmanager
+
+# flags of a new temporary file - binary like tempfile.mkstemp's, so line endings are written as given
+TEMP_FILE_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0)
+
+
+def atomic_write(filename, contents, mode='w'):
+
+    """
+    Write contents to filename via a temporary file in the same directory that is then renamed over filename, so
+    readers never see a partly written file
+    """
+
+    with atomic_open(filename, mode) as f:
+        f.write(contents)
+
+
+@contextmanager
+def atomic_open(filename, mode='w', buffering=-1):
+
+    """
+    Same as atomic_write for a file written a piece at a time.  Only if the with block finishes is the temporary file
+    renamed over filename - if it raises (e.g. the operation was cancelled) filename is left as it was
+    """
+
+    file_descriptor, temp_filename = create_temp_file(filename)
+
+    try:
+        with os.fdopen(file_descriptor, mode, buffering) as f_temp:
+            yield f_temp
+
+        # keep the permissions of the file being replaced - a new file gets the umask's, from os.open
+        if os.path.exists(filename):
+            os.chmod(temp_filename, stat.S_IMODE(os.stat(filename).st_mode))
+
+        replace_file(temp_filename, filename)
+
+    except BaseException:
+        if os.path.exists(temp_filename):
+            os.remove(temp_filename)
+        raise
+
+
+def create_temp_file(filename):
+
+    """
+    (file descriptor, name) of a new empty file next to filename.  Unlike tempfile.mkstemp, which makes files only
+    the owner can read, it is created with the permissions the umask gives a new file
+    """
+
+    directory = os.path.dirname(os.path.abspath(filename))
+
+    while True:
+
+        temp_filename = os.path.join(directory, '.{}.{}.tmp'.format(
+            os.path.basename(filename), binascii.hexlify(os.urandom(6)).decode('ascii')))
+
+        try:
+            return os.open(temp_filename, TEMP_FILE_FLAGS, 0o666), temp_filename
+        except OSError as ex:
+            if ex.errno != errno.EEXIST:
+                raise
+
+
+def replace_file(source, destination):
+
+    try:
+        os.replace(source, destination)
+
+    except AttributeError:
+        # python 2 - rename can't overwrite an existing file on windows
+        if os.name == 'nt' and os.path.exists(destination):
+            os.remove(destination)
+        os.rename(source, destination)
@@ -1,11 +1,33 @@
 # -*- coding: utf-8 -*-
 
 from GSIExceptions import *
+from GSIFilter import GSIFilter, PointSetPredicate
+from GSIFormat import DISTANCE_WORD_IDS, UNITS_POSITION, get_converter, get_point_id_field, get_words_start
+from GSIReader import MappedGSIReader, decode_fields, decode_line
+from GSIStore import GSIColumnStore, FormattedLines, ABSENT, RAW, TEXT_WORD_IDS, raw_string
+from Instrumentation import profiler, LazyMessage
 from collections import OrderedDict
 from collections import Counter
+from functools import partial
 import logging.config
+import multiprocessing
 
-# TODO fix formatting for4 dp GSI files
+try:
+    range = xrange
+except NameError:
+    pass  # python 3
+
+# lines between progress updates
+PROGRESS_INTERVAL = 10000
+
+# a point ID observed more than this many times is probably a change point
+CHANGE_POINT_THRESHOLD = 7
+
+# bytes from the start of a file compared by refresh_gsi to tell if the file was replaced
+HEAD_SIZE = 256
+
+# smallest part of a file parsed by one process - smaller files aren't worth starting a pool for
+MIN_CHUNK_BYTES = 4 * 1024 * 1024
 
 class GSI:
     GSI_WORD_ID_DICT = OrderedDict([('11', 'Point_ID'), ('19', 'Timestamp'), ('21', 'Horizontal_Angle'),
@@ -15,100 +37,387 @@ class GSI:
                                     ('85', 'STN_Northing'), ('86', 'STN_Elevation'), ('87', 'Target_Height'),
                                     ('88', 'STN_Height')])
 
-    def __init__(self, logger):
+    # word IDs whose values are distances or coordinates in mm
+    DISTANCE_WORD_IDS = DISTANCE_WORD_IDS
+
+    # word IDs with few distinct values in a file
+    REPEATED_WORD_IDS = ('19', '51', '87', '88')
+
+    def __init__(self, logger, change_point_threshold=CHANGE_POINT_THRESHOLD):
 
         self.logger = logger
+        self.change_point_threshold = change_point_threshold
         self.filename = None
         self.formatted_lines = None
+        self.store = None
+
+        # word ID -> (store, display strings of its rows) for get_column_values
+        self.formatted_columns = {}
+
+        # how far into the file has been parsed, for refresh_gsi
+        self.parsed_bytes = 0
+        self.parsed_partial_line = False
+        self.parsed_head = b''
+
         self.column_names = list(GSI.GSI_WORD_ID_DICT.values())
         self.column_ids = list(GSI.GSI_WORD_ID_DICT.keys())
+        self.column_name_to_id = dict((name, word_id) for word_id, name in GSI.GSI_WORD_ID_DICT.items())
+
+        # word ID and information (the first 6 characters of a word) -> function that decodes the word into a field
+        # dictionary - see parse_line
+        self.word_decoders = {}
+
+        # functions that turn a raw stored value into the string displayed to the user
+        self.display_formatters = {'19': self.format_timestamp, '21': self.format_angles, '22': self.format_angles,
+                                   '51': self.format_prism_constant}
+        for word_id in GSI.DISTANCE_WORD_IDS:
+            self.display_formatters[word_id] = self.format_3dp
+
+    def format_gsi(self, filename, cache=None, progress=None, processes=1, complete_lines_only=False):
+
+        """
+        cache - optional ParseCache to load the parsed file from, or save it to
+        progress - optional ProgressMonitor told how many lines have been parsed
+        processes - parse parts of a large file in this many processes at once (None for one per CPU core).  The
+        result is the same as parsing it in one
+        complete_lines_only - for a file that is still being written and will be followed with refresh_gsi.  A last
+        line without its line ending is left for refresh_gsi to parse once it is finished, and the file isn't cached
+        """
+
+        self.filename = filename
+
+        if complete_lines_only:
+
+            with MappedGSIReader(filename) as reader:
+                complete_end = reader.get_complete_end()
+
+            self.build_store(self.iter_fields(filename, progress, 0, complete_end))
+            return
+
+        get_formatted_line = profiler.time_function('GSI field format', self.get_formatted_line)
+
+        if cache is not None:
+            with profiler.stage('GSI cache load'):
+                self.store, cache_stamp = cache.lookup(filename, 'gsi')
+
+            if self.store is not None:
+                self.formatted_lines = FormattedLines(self.store, get_formatted_line)
+
+                with MappedGSIReader(filename) as reader:
+                    self.set_parsed_extent(reader, len(reader))
+
+                return
+
+        if processes == 1:
+            self.build_store(self.iter_fields(filename, progress))
+        else:
+            self.build_store_parallel(filename, processes, progress)
+
+        if cache is not None:
+            with profiler.stage('GSI cache store'):
+                cache.store(filename, 'gsi', self.store, cache_stamp)
+
+    def refresh_gsi(self, progress=None):
+
+        """
+        Parse only the lines added to the end of the file since format_gsi or the last refresh_gsi, for a file that is
+        still being downloaded.  A last line without its line ending is left until it is finished.  The point, station
+        setup and control point indexes are updated with the new lines, so a refresh takes time in proportion to the
+        new data.  If the file shrank or its start changed it was replaced, and is parsed again from the start.
+        Returns the number of new lines
+        """
+
+        line_count = len(self.store)
+
+        with MappedGSIReader(self.filename) as reader:
+
+            file_size = len(reader)
+            complete_end = reader.get_complete_end()
+            replaced = file_size < self.parsed_bytes or reader.read(0, len(self.parsed_head)) != self.parsed_head
+
+        # an unfinished last line parsed by format_gsi may have changed since
+        if replaced or self.parsed_partial_line and file_size != self.parsed_bytes:
+            self.logger.info('Parsing %s again from the start', self.filename)
+            self.build_store(self.iter_fields(self.filename, progress, 0, complete_end))
+            return len(self.store)
+
+        if complete_end > self.parsed_bytes:
+            self.append_fields(self.iter_fields(self.filename, progress, self.parsed_bytes, complete_end))
+
+        return len(self.store) - line_count
+
+    def format_setup(self, setup_index, setup):
+
+        """ Same as format_gsi but only parses the lines of one StationSetup of a GSISetups.SetupIndex """
+
+        self.filename = setup_index.filename
+        self.build_store(self.parse_line_bytes(line) for line in setup_index.iter_setup_lines(setup))
+
+    def build_store(self, fields_iterable):
+
+        """ Create a new column store from raw field dictionaries """
+
+        get_formatted_line = profiler.time_function('GSI field format', self.get_formatted_line)
+
+        self.store = GSIColumnStore(self.column_ids)
+        self.formatted_lines = FormattedLines(self.store, get_formatted_line)
+        self.append_fields(fields_iterable)
+
+    def append_fields(self, fields_iterable):
+
+        """ Add lines' raw field dictionaries to the end of the column store and its indexes """
+
+        get_formatted_line = profiler.time_function('GSI field format', self.get_formatted_line)
+        line_count = len(self.store)
+        append_row = profiler.time_function('GSI index build', self.store.append_row)
+
+        # formatting every line for the log is expensive - only do it if it will be written
+        log_lines = self.logger.isEnabledFor(logging.INFO)
+
+        for fields in fields_iterable:
+
+            row = append_row(fields)
+
+            if log_lines:
+                self.logger.info('Formatted Line: %s', LazyMessage(get_formatted_line, row))
+
+        profiler.count('GSI lines parsed', len(self.store) - line_count)
+
+    def build_store_parallel(self, filename, processes=None, progress=None):
+
+        """
+        Same as build_store(self.iter_fields(filename)), with the file split into parts at line endings and the parts
+        parsed across a pool of processes.  Every GSI line is parsed on its own so the parts' column stores are simply
+        joined in file order
+        """
+
+        processes = processes or multiprocessing.cpu_count()
+
+        with MappedGSIReader(filename) as reader:
+            byte_ranges = reader.get_line_ranges(min(processes * 2, len(reader) // MIN_CHUNK_BYTES))
+            self.set_parsed_extent(reader, len(reader))
+
+        if len(byte_ranges) < 2:
+            self.build_store(self.iter_fields(filename, progress))
+            return
+
+        self.store = GSIColumnStore(self.column_ids)
+        self.formatted_lines = FormattedLines(self.store, profiler.time_function('GSI field format',
+                                                                                self.get_formatted_line))
+
+        pool = multiprocessing.Pool(min(processes, len(byte_ranges)))
+
+        try:
+            for chunk_store in pool.imap(partial(parse_gsi_chunk, filename), byte_ranges):
+
+                with profiler.stage('GSI chunk merge'):
+                    self.store.extend(chunk_store)
+
+                if progress is not None:
+                    progress.update('Lines parsed', len(self.store))
+
+        except Exception:
+            # e.g. cancelled - don't wait for the rest of the parts
+            pool.terminate()
+            raise
+
+        finally:
+            pool.close()
+            pool.join()
+
+        profiler.count('GSI lines parsed', len(self.store))
+
+        if self.logger.isEnabledFor(logging.INFO):
+            for row in range(len(self.store)):
+                self.logger.info('Formatted Line: %s', LazyMessage(self.get_formatted_line, row))
+
+    def iter_fields(self, filename, progress=None, start_byte=0, end_byte=None):
+
+        """
+        Generator of raw field dictionaries (see parse_line), one per GSI line, without keeping the file in memory.
+        The file is memory mapped and GSI-16 lines decoded from their bytes - see GSIReader.  start_byte and end_byte
+        limit it to the lines between two offsets.  Once every line has been read parsed_bytes is where it stopped
+        """
+
+        parse_line = profiler.time_function('GSI tokenize', self.parse_line_bytes)
+
+        with MappedGSIReader(filename) as reader:
+
+            end_byte = len(reader) if end_byte is None else end_byte
+
+            if start_byte == 0 and end_byte == len(reader):
+                lines = reader.iter_lines()
+            else:
+                lines = (line for offset, line in reader.iter_lines_at(start_byte, end_byte))
+
+            for line_count, line in enumerate(profiler.time_iterator('GSI read', lines), 1):
+
+                yield parse_line(line)
+
+                if progress is not None and line_count % PROGRESS_INTERVAL == 0:
+                    progress.update('Lines parsed', line_count)
+
+            self.set_parsed_extent(reader, end_byte)
+
+    def set_parsed_extent(self, reader, end_byte):
+
+        self.parsed_bytes = end_byte
+        self.parsed_partial_line = end_byte > reader.get_complete_end()
+        self.parsed_head = reader.read(0, HEAD_SIZE)
+
+    def iter_records(self, filename):
+
+        """ Generator of formatted lines, one per GSI line - the streaming equivalent of formatted_lines """
+
+        for fields in self.iter_fields(filename):
+            yield self.format_fields(fields)
+
+    def parse_line_bytes(self, line):
+
+        """ parse_line for a line read as bytes """
+
+        fields = decode_fields(line)
+
+        # only lines with non-numeric values or that aren't in the GSI-16 fixed layout need decoding and splitting
+        if fields is None:
+            fields = self.parse_line(decode_line(line))
 
-    def format_gsi(self, filename):
+        return fields
 
-        with open(filename, "r") as f:
+    def parse_line(self, line):
 
-            self.filename = filename
+        """
+        Split a GSI-8 or GSI-16 line into a dictionary of word ID and raw value e.g. {'11': 'A', '84': 2858012, ..
+        Numbers are in millimetres or DDDMMSSs whatever units the file has them in - see GSIFormat
+        """
 
-            # Create new list of formatted GSI lines each time this function is called
-            self.formatted_lines = []
+        # Work with the first field '11' separately - its unique and can contain spaces and alphanumerics
+        fields = {'11': self.format_point_id(get_point_id_field(line).lstrip('0'))}
+        word_decoders = self.word_decoders
 
-            try:
-                for line in f:
+        # remaining words e.g. [21.324+0000000006854440, 22.324+0000000009042520, ...
+        for field in line[get_words_start(line):].split():
 
-                    """ Need to create dictionary of ID and value e.g. {'Point_ID': 'A', 'STN_Easting': '2858012',.. """
+            decode_word = word_decoders.get(field[:6])
 
-                    # First - create default empty string if no field
-                    formatted_line = OrderedDict([('Point_ID', ''), ('Timestamp', ''), ('Horizontal_Angle', ''),
-                                                  ('Vertical_Angle', ''), ('Slope_Distance', ''),
-                                                  ('Horizontal_Dist', ''), ('Height_Diff', ''),
-                                                  ('Prism_Constant', ''), ('Easting', ''), ('Northing', ''),
-                                                  ('Elevation', ''), ('STN_Easting', ''), ('STN_Northing', ''),
-                                                  ('STN_Elevation', ''), ('Target_Height', ''),
-                                                  ('STN_Height', '')])
+            if decode_word is None:
+                decode_word = word_decoders[field[:6]] = self.get_word_decoder(field[:6])
 
-                    # flag for station setup line
-                    stn_setup = False
+            decode_word(fields, field)
 
-                    # Work with the first field '11' separately - its unique and can contain spaces and alphanumerics
-                    field_value = self.format_point_id(line[8:24].lstrip('0'))
+        return fields
 
-                    formatted_line[GSI.GSI_WORD_ID_DICT['11']] = field_value
+    def get_word_decoder(self, word_info):
 
-                    # Create remaining list of fields e.g. [21.324+0000000006854440, 22.324+0000000009042520, ...
-                    remaining_line = line[24:]
-                    field_list = remaining_line.split()
-                    # field_list = [line[i:i + 24] for i in range(0, len(line), 24)]
+        """ Decoder for the words starting with word_info - the word ID and information e.g. '21.324' """
 
-                    # match the 2-digit identification with the key in the dictionary and format its corresponding value
-                    for field in field_list:
+        word_id = word_info[:2]
 
-                        two_digit_id = field[0:2]
+        if word_id not in GSI.GSI_WORD_ID_DICT:
+            self.logger.error("File doesn't appear to be a valid GSI file.  Missing Key ID: %s", word_id)
+            raise CorruptedGSIFileError
 
-                        # Strip off unnecessary digits and spaces to make the number readable
-                        field_value = field[7:].rstrip().lstrip('0')
+        if word_id == '11':
+            return decode_point_id_word
 
-                        # apply special formatting rules to particular fields
-                        if two_digit_id == '19':
-                            field_value = self.format_timestamp(field_value)
+        if word_id == '51':
+            return partial(decode_text_word, word_id)
 
-                        elif two_digit_id in ('21', '22'):  # horizontal or vertical angles
-                            field_value = self.format_angles(field_value)
+        convert = get_converter(word_id, word_info[UNITS_POSITION:UNITS_POSITION + 1])
 
-                        elif two_digit_id == '51':
-                            field_value = self.format_prism_constant(field_value)
+        if word_id == '87':
+            return partial(decode_target_height_word, convert)
 
-                        # distance and coordinates
-                        elif two_digit_id in ('31', '32', '33', '81', '82', '83', '84', '85', '86', '87', '88'):
-                            field_value = self.format_3dp(field_value)
+        if convert is None:
+            return partial(decode_number_word, word_id)
 
-                            # Check to see if this line is a station setup
-                            if two_digit_id == "84":
-                                stn_setup = True
+        return partial(decode_converted_word, word_id, convert)
 
-                            #  if STN setup then set STN height to 0 if height is empty string
-                            if two_digit_id == '88' and field_value == "":
-                                field_value = '0.000'
+    def format_value(self, word_id, row):
 
-                            # set target height to 0 rather than empty string if line is not a station setup
-                            elif two_digit_id == '87' and field_value == "" and not stn_setup:
-                                field_value = '0.000'
+        """ Display string for one stored value e.g. '215° 13\' 28"' for a horizontal angle """
 
-                        elif field_value == "":
+        return self.format_raw_value(word_id, self.store.get_raw_value(word_id, row))
 
-                            field_value = 'N/A'
+    def format_raw_value(self, word_id, raw_value):
 
-                        field_name = GSI.GSI_WORD_ID_DICT[two_digit_id]
-                        formatted_line[field_name] = field_value
+        if raw_value is None:
+            return ''
 
-                    self.formatted_lines.append(formatted_line)
-                    self.logger.info('Formatted Line: ' + str(formatted_line))
+        if word_id == '11':
+            return raw_value
 
-                    stn_setup = False
+        field_value = self.display_formatters[word_id](raw_value)
 
-            except KeyError:
-                self.logger.exception(
-                    "File doesn't appear to be a valid GSI file.  Missing Key ID: {}".format(field_value))
-                raise CorruptedGSIFileError
+        # Set station and target height to 0 rather than empty string
+        if word_id in ('87', '88') and field_value == "":
+            field_value = '0.000'
+
+        return field_value
+
+    def format_column(self, word_id, start=0, stop=None):
+
+        """
+        Display strings of one column for rows start to stop - the same as format_value for each row but without
+        building formatted lines, for exporting whole columns
+        """
+
+        stop = len(self.store) if stop is None else stop
+        masks = self.store.masks[word_id]
+        column = self.store.columns[word_id]
+
+        if word_id == '11':
+            return [column[row] if masks[row] != ABSENT else '' for row in range(start, stop)]
+
+        formatter = self.display_formatters[word_id]
+        empty_value = '0.000' if word_id in ('87', '88') else ''
+        is_text = word_id in TEXT_WORD_IDS
+
+        # timestamps, prism constants and heights repeat a lot - only format each distinct one once
+        formatted_values = {} if word_id in GSI.REPEATED_WORD_IDS else None
+        formatted_column = []
+
+        for row in range(start, stop):
+
+            mask = masks[row]
+
+            if mask == ABSENT:
+                formatted_column.append('')
+                continue
+
+            if mask == RAW:
+                value = self.store.raw_values[(word_id, row)]
+            elif is_text:
+                value = column[row]
+            else:
+                value = raw_string(column[row])
+
+            formatted_value = None if formatted_values is None else formatted_values.get(value)
+
+            if formatted_value is None:
+                formatted_value = formatter(value) or empty_value
+
+                if formatted_values is not None:
+                    formatted_values[value] = formatted_value
+
+            formatted_column.append(formatted_value)
+
+        return formatted_column
+
+    def get_formatted_line(self, row):
+
+        """ Formatted line as a dictionary of column name and display value e.g. {'Point_ID': 'A', .. """
+
+        return OrderedDict([(column_name, self.format_value(word_id, row))
+                            for word_id, column_name in GSI.GSI_WORD_ID_DICT.items()])
+
+    def format_fields(self, fields):
+
+        """ Same as get_formatted_line but for a raw field dictionary returned by parse_line """
+
+        return OrderedDict([(column_name, self.format_raw_value(word_id, None if fields.get(word_id) is None
+                                                                else raw_string(fields[word_id])))
+                            for word_id, column_name in GSI.GSI_WORD_ID_DICT.items()])
 
     @staticmethod
     def format_point_id(point_id_field):
@@ -124,7 +433,7 @@ class GSI:
 
         except ValueError:
             # self.logger.exception(f'Incorrect timestamp {timestamp}- cannot be formatted properly')
-            self.logger.exception('Incorrect timestamp {}- cannot be formatted properly'.format(timestamp))
+            self.logger.exception('Incorrect timestamp %s- cannot be formatted properly', timestamp)
 
         else:
             timestamp = '{}:{}'.format(hour, minute)
@@ -142,7 +451,7 @@ class GSI:
 
         except ValueError:
             # self.logger.exception(f'Incorrect angle {angle}- cannot be formatted properly ')
-            self.logger.exception('Incorrect angle {}- cannot be formatted properly'.format(angle))
+            self.logger.exception('Incorrect angle %s- cannot be formatted properly', angle)
 
         else:
             angle = '{}° {}\' {}"'.format(degrees.zfill(3), minutes, seconds)
@@ -164,78 +473,199 @@ class GSI:
         try:
             return '{:.3f}'.format(int(number) * 0.001)
 
-        # return empty string if not a number
         except ValueError:
-            return number
+            pass
+
+        # fractional millimetres from a file with 4 or 5 decimal places - keep all of them
+        if number.replace('.', '', 1).isdigit():
+            return '{:.5f}'.format(float(number) * 0.001).rstrip('0')
+
+        # return empty string if not a number
+        return number
+
+    def get_column(self, column_name):
+
+        """ Stored column for column_name - raw GSI numbers, or strings for Point_ID and Prism_Constant """
+
+        return self.store.columns[self.column_name_to_id[column_name]]
+
+    def get_typed_column(self, column_name):
+
+        """
+        Values of a column as numbers - millimetres, arc-seconds, minutes of the day .. in a numpy masked array.  See
+        GSIDecode, which needs numpy
+        """
+
+        from GSIDecode import decode_column
+
+        return decode_column(self.store, self.column_name_to_id[column_name])
 
     def get_column_values(self, column_name):
 
-        column_values = []
+        word_id = self.column_name_to_id.get(column_name)
+
+        if word_id is None:
+            return []  # column value doesn't exist
 
-        for line in self.formatted_lines:
+        # formatted once per store - a refresh only formats the new rows
+        store, column_values = self.formatted_columns.get(word_id, (None, []))
 
-            try:
-                column_value = line[column_name]
-                column_values.append(column_value)
-            except KeyError:
-                pass  # column value doesn't exist for this line...continue
+        if store is not self.store:
+            column_values = []
 
-        return column_values
+        if len(column_values) < len(self.store):
+            column_values = column_values + self.format_column(word_id, len(column_values))
+            self.formatted_columns[word_id] = (self.store, column_values)
+
+        return list(column_values)
 
     def get_control_points(self):
 
-        control_points = set()
+        # point IDs of station setups with an STN_Easting - indexed by the store as the file was parsed
+        return sorted(self.store.control_points)
+
+    def get_change_points(self, threshold=None):
+
+        """ Point IDs observed more than threshold times (change_point_threshold by default) """
+
+        threshold = self.change_point_threshold if threshold is None else threshold
+
+        return sorted(point_id for point_id, rows in self.store.point_rows.items() if len(rows) > threshold)
+
+    def get_point_count(self, point_id):
+        return self.store.get_point_count(point_id)
 
-        for formatted_line in self.formatted_lines:
+    def get_station_setups(self):
 
-            # check to see if point id is a control point by see if STN_Easting exists
-            if formatted_line['STN_Easting']:
-                control_points.add(formatted_line['Point_ID'])
+        """ Formatted lines of the station setups, in file order """
+
+        return [self.formatted_lines[row] for row in self.store.station_setup_rows]
+
+    def get_observations_to(self, point_id):
+
+        """ Formatted lines of every shot to point_id (its station setups aren't included), in file order """
+
+        stn_eastings = self.store.masks['84']
+
+        return [self.formatted_lines[row] for row in self.store.get_point_rows(point_id)
+                if stn_eastings[row] == ABSENT]
+
+    @staticmethod
+    def is_control_fields(fields):
+
+        """ True if the raw fields of a line are a station setup with an STN_Easting i.e. the point is control """
+
+        return bool(fields.get('84'))
+
+    def stream_control_points(self, filename, progress=None):
+
+        """ Same as get_control_points but reads filename in a single pass without keeping it in memory """
+
+        control_points = set()
+
+        for fields in self.iter_fields(filename, progress):
+            if self.is_control_fields(fields):
+                control_points.add(fields['11'])
 
         return sorted(control_points)
 
-    def get_change_points(self):
+    def stream_change_points(self, filename, threshold=None):
+
+        """ Same as get_change_points but reads filename in a single pass without keeping it in memory """
 
-        change_points = set()
+        threshold = self.change_point_threshold if threshold is None else threshold
+        point_id_frequency = Counter(fields['11'] for fields in self.iter_fields(filename))
 
-        # list of point_IDs used for determining change points
-        point_id_list = []
+        return sorted(point_id for point_id, count in point_id_frequency.items() if count > threshold)
 
-        for formatted_line in self.formatted_lines:
-            point_id_list.append(formatted_line['Point_ID'])
+    @staticmethod
+    def get_control_only_filename(filename):
+        return filename[:-4] + '_CONTROL_ONLY.gsi'
+
+    def stream_control_only_gsi(self, filename, progress=None):
 
-        # if point ID occurs 8 times then it probably is a change point be a change point
-        point_id_frequency = Counter(point_id_list);
+        """
+        Streaming version of create_control_only_gsi for files too large to format_gsi.  The control points have to be
+        known before any line can be kept, so the file is parsed once for them and then filtered line by line.
+        """
 
-        for point_id, count in point_id_frequency.items():
-            if count > 7:
-                change_points.add(point_id)
+        control_only_filename = self.get_control_only_filename(filename)
+        GSIFilter(PointSetPredicate(self.stream_control_points(filename, progress))).filter(
+            filename, control_only_filename, progress)
 
-        return sorted(change_points)
+        return control_only_filename
 
     # Create a new GSI with suffix that contains only control.  ALl other shots are removed from the GSI
     def create_control_only_gsi(self):
 
-        control_only_gsi_file_contents = ''
-        control_only_filename = self.filename[:-4] + '_CONTROL_ONLY.gsi'
-        control_points = self.get_control_points()
+        control_only_filename = self.get_control_only_filename(self.filename)
+        GSIFilter(PointSetPredicate(self.get_control_points())).filter(self.filename, control_only_filename)
+
+        return control_only_filename
+
+
+
+# Word decoders - each stores the value of one word of a line in the line's field dictionary.  Values have their
+# leading zeros and any trailing spaces stripped off
+
+def decode_point_id_word(fields, field):
+
+    field_value = field[7:].rstrip().lstrip('0')
+    fields['11'] = 'N/A' if field_value == "" else field_value
+
+
+def decode_text_word(word_id, fields, field):
+    fields[word_id] = field[7:].rstrip().lstrip('0')
+
+
+def decode_number_word(word_id, fields, field):
+
+    field_value = field[7:].rstrip().lstrip('0')
+
+    # not a number - keep it as it is
+    if field_value and not field_value.isdigit():
+        fields[word_id] = field_value
+        return
+
+    number = int(field_value) if field_value else 0
+    fields[word_id] = -number if field[6:7] == '-' else number
+
+
+def decode_converted_word(word_id, convert, fields, field):
+
+    field_value = field[7:].rstrip().lstrip('0')
+
+    if field_value and not field_value.isdigit():
+        fields[word_id] = field_value
+        return
+
+    number = int(field_value) if field_value else 0
+    fields[word_id] = convert(-number if field[6:7] == '-' else number)
+
+
+def decode_target_height_word(convert, fields, field):
+
+    # a station setup doesn't have a target height - leave it out rather than set it to 0
+    if not field[7:].rstrip().lstrip('0') and '84' in fields and not isinstance(fields['84'], str):
+        return
+
+    if convert is None:
+        decode_number_word('87', fields, field)
+    else:
+        decode_converted_word('87', convert, fields, field)
+
 
-        with open(self.filename, "r") as f_orig:
+def parse_gsi_chunk(filename, byte_range):
 
-            # Create new list of formatted GSI lines each time this function is called
-            gsi_orig_filecontents = f_orig.readlines()
+    """ Column store of the lines in one (start byte, end byte) part of a GSI file - see GSI.build_store_parallel """
 
-        # Loop through and original gsi and find all shots that are control
-        for line in gsi_orig_filecontents:
-            for control in control_points:
-                if control in line:
-                    control_only_gsi_file_contents += line
+    gsi = GSI(logging.getLogger('CompNet Assist'))
+    store = GSIColumnStore(gsi.column_ids)
 
-        print(control_only_gsi_file_contents)
+    for fields in gsi.iter_fields(filename, None, *byte_range):
+        store.append_row(fields)
 
-        # write out new GSI
-        with open(control_only_filename, 'w') as f_stripped:
-            f_stripped.write(control_only_gsi_file_contents)
+    return store
 
 
 
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+
+"""
+Typed, vectorized decoding of the columns of a GSIColumnStore.
+
+The store keeps every numeric word as its raw signed GSI integer.  These functions turn a whole column into numbers
+in one go with numpy, so nothing has to parse display strings such as '021° 51\' 32"' back into numbers:
+
+    distances and coordinates (31 - 33, 81 - 88)    millimetres, or metres
+    angles (21, 22)                                 arc-seconds, or radians
+    timestamp (19)                                  minutes of the day
+    prism constant (51)                             millimetres
+
+Each function returns a numpy masked array with one entry per line, masked where the line doesn't have the word or
+its value isn't a number.  Unlike the display strings the values keep their sign.  Display strings are still only
+built by GSI.format_value when something shows or exports a line.
+
+    eastings = get_metres(gsi.store, '81')
+    horizontal_angles = get_radians(gsi.store, '21')
+"""
+
+from collections import OrderedDict
+
+import numpy as np
+
+from GSI import GSI
+from GSIStore import PRESENT
+
+DISTANCE_WORD_IDS = GSI.DISTANCE_WORD_IDS
+ANGLE_WORD_IDS = ('21', '22')
+TIMESTAMP_WORD_ID = '19'
+PRISM_CONSTANT_WORD_ID = '51'
+
+ARC_SECONDS_TO_RADIANS = np.pi / 648000.0
+
+
+def get_present(store, word_id):
+
+    """ True for each line with a numeric value for word_id """
+
+    return np.frombuffer(store.masks[word_id], dtype=np.uint8) == PRESENT
+
+
+def get_raw_numbers(store, word_id):
+
+    """ The raw signed GSI integers of a numeric column e.g. 21513280 for 215° 13' 28" """
+
+    values = np.frombuffer(store.columns[word_id], dtype=np.float64).astype(np.int64)
+
+    return np.ma.MaskedArray(values, mask=~get_present(store, word_id))
+
+
+def get_millimetres(store, word_id):
+
+    """ Distances and coordinates in millimetres - fractions of a millimetre if the file had 4 or 5 decimal places """
+
+    values = np.frombuffer(store.columns[word_id], dtype=np.float64)
+
+    return np.ma.MaskedArray(values, mask=~get_present(store, word_id))
+
+
+def get_metres(store, word_id):
+    return get_millimetres(store, word_id) * 0.001
+
+
+def get_arc_seconds(store, word_id):
+
+    """ Angle in DDDMMSSs (tenths of a second) to arc-seconds e.g. 21513280 (215° 13' 28.0") -> 774808.0 """
+
+    raw_numbers = get_raw_numbers(store, word_id)
+    sign = np.sign(raw_numbers)
+    raw_numbers = np.abs(raw_numbers)
+
+    degrees = raw_numbers // 100000
+    minutes = (raw_numbers // 1000) % 100
+    seconds = (raw_numbers % 1000) * 0.1
+
+    return sign * (degrees * 3600 + minutes * 60 + seconds)
+
+
+def get_radians(store, word_id):
+    return get_arc_seconds(store, word_id) * ARC_SECONDS_TO_RADIANS
+
+
+def get_minutes_of_day(store, word_id=TIMESTAMP_WORD_ID):
+
+    """ Timestamp in MMDDHHMM (month, day, hour, minute) to minutes since midnight e.g. 10230909 -> 549 """
+
+    raw_numbers = np.abs(get_raw_numbers(store, word_id))
+
+    return ((raw_numbers // 100) % 100) * 60 + raw_numbers % 100
+
+
+def parse_prism_constant(constant):
+
+    """
+    Prism constant in mm from a raw prism constant word value e.g. '12+023' (ppm then constant) -> 23.  The leading
+    zeros are stripped, so with 0 ppm the value starts with the constant's sign e.g. '+023'
+    """
+
+    sign_position = max(constant.rfind('+'), constant.rfind('-'))
+
+    try:
+        return int(constant[sign_position:]) if sign_position >= 0 else None
+    except ValueError:
+        return None
+
+
+def get_prism_constants(store, word_id=PRISM_CONSTANT_WORD_ID):
+
+    column = store.columns[word_id]
+
+    # the store shares one string between equal constants so each distinct one is only parsed once
+    constants = dict((constant, parse_prism_constant(constant)) for constant in set(column) if constant is not None)
+    values = [constants.get(constant) if constant is not None else None for constant in column]
+    mask = np.array([value is None for value in values], dtype=bool)
+
+    return np.ma.MaskedArray(np.array([0 if value is None else value for value in values], dtype=np.int64),
+                             mask=mask)
+
+
+def get_point_ids(store):
+    return np.array(store.columns['11'], dtype=object)
+
+
+def decode_column(store, word_id):
+
+    """ The typed values of any column - see the module docstring for each word ID's units """
+
+    if word_id == '11':
+        return get_point_ids(store)
+
+    if word_id in DISTANCE_WORD_IDS:
+        return get_millimetres(store, word_id)
+
+    if word_id in ANGLE_WORD_IDS:
+        return get_arc_seconds(store, word_id)
+
+    if word_id == TIMESTAMP_WORD_ID:
+        return get_minutes_of_day(store, word_id)
+
+    if word_id == PRISM_CONSTANT_WORD_ID:
+        return get_prism_constants(store, word_id)
+
+    raise KeyError(word_id)
+
+
+def decode_columns(store):
+
+    """ Column name (as in GSI.formatted_lines) -> typed values of every column """
+
+    return OrderedDict((column_name, decode_column(store, word_id))
+                       for word_id, column_name in GSI.GSI_WORD_ID_DICT.items())
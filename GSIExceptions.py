@@ -9,3 +9,23 @@ class CorruptedGSIFileError(Exception):
 
         # Error message thrown is saved in msg
         self.msg = msg
+
+
+class UnsupportedCoordinateFileError(Exception):
+
+    """Raised when the format of a coordinate file isn't recognised"""
+
+    def __init__(self, msg="Unsupported coordinate file type"):
+
+        # Error message thrown is saved in msg
+        self.msg = msg
+
+
+class OperationCancelledError(Exception):
+
+    """Raised inside a long running operation when the user cancels it"""
+
+    def __init__(self, msg="Operation cancelled"):
+
+        # Error message thrown is saved in msg
+        self.msg = msg
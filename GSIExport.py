@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+
+"""
+Export of parsed GSI files as tables, for QA and reporting tools.
+
+CSV - one row per GSI line with the display value of every column in GSI.GSI_WORD_ID_DICT, the same as
+GSI.formatted_lines.  Rows are formatted a column and a block of lines at a time and written through a large buffer.
+
+npz - the GSIColumnStore itself (raw numeric columns, presence masks and the point ID and prism constant strings) as
+numpy arrays, so the file is reloaded with load_npz without parsing the GSI again.
+
+    export_csv(gsi, 'TL231019.csv')
+    stream_gsi_to_csv('TL231019.GSI', 'TL231019.csv')    # large files - only one block of lines is held at a time
+    export_npz(gsi, 'TL231019.npz')
+    gsi = load_npz('TL231019.npz')
+"""
+
+import csv
+import io
+import logging
+import sys
+from itertools import islice
+
+import numpy as np
+
+from GSI import GSI
+from GSIStore import GSIColumnStore, FormattedLines, array_from_bytes
+
+try:
+    range = xrange
+except NameError:
+    pass  # python 3
+
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+# lines formatted at a time
+BLOCK_SIZE = 65536
+
+logger = logging.getLogger('CompNet Assist')
+
+
+def open_csv(filename):
+
+    if sys.version_info[0] < 3:
+        return open(filename, 'wb', WRITE_BUFFER_SIZE)
+
+    return io.open(filename, 'w', WRITE_BUFFER_SIZE, encoding='utf-8', newline='')
+
+
+def write_csv_rows(writer, gsi, start=0, stop=None):
+
+    stop = len(gsi.store) if stop is None else stop
+
+    for block_start in range(start, stop, BLOCK_SIZE):
+
+        block_stop = min(block_start + BLOCK_SIZE, stop)
+        columns = [gsi.format_column(word_id, block_start, block_stop) for word_id in gsi.column_ids]
+
+        writer.writerows(zip(*columns))
+
+
+def export_csv(gsi, filename):
+
+    """ Write every line of a formatted GSI to a CSV file.  Returns the number of rows written """
+
+    with open_csv(filename) as f:
+
+        writer = csv.writer(f)
+        writer.writerow(gsi.column_names)
+        write_csv_rows(writer, gsi)
+
+    return len(gsi.store)
+
+
+def stream_gsi_to_csv(source_filename, destination_filename, progress=None):
+
+    """
+    Same as export_csv for a GSI file that hasn't been formatted, parsing and writing one block of lines at a time so
+    files of any size can be exported.  Returns the number of rows written
+    """
+
+    gsi = GSI(logger)
+    fields_iterator = gsi.iter_fields(source_filename, progress)
+    row_count = 0
+
+    with open_csv(destination_filename) as f:
+
+        writer = csv.writer(f)
+        writer.writerow(gsi.column_names)
+
+        while True:
+
+            gsi.build_store(islice(fields_iterator, BLOCK_SIZE))
+
+            if not len(gsi.store):
+                break
+
+            write_csv_rows(writer, gsi)
+            row_count += len(gsi.store)
+
+    return row_count
+
+
+def export_npz(gsi, filename):
+
+    """ Save a formatted GSI's column store to a numpy .npz file """
+
+    store = gsi.store
+    arrays = {'word_ids': np.array(store.word_ids), 'filename': np.array(gsi.filename or '')}
+
+    for word_id in store.numeric_word_ids:
+        arrays['values_' + word_id] = np.frombuffer(store.columns[word_id], dtype=np.float64)
+
+    for word_id in store.word_ids:
+        arrays['mask_' + word_id] = np.frombuffer(store.masks[word_id], dtype=np.uint8)
+
+    # text columns as a table of their distinct strings and the index of each line's string, -1 if absent
+    for word_id in store.text_word_ids:
+        strings, codes = encode_strings(store.columns[word_id])
+        arrays['strings_' + word_id] = strings
+        arrays['codes_' + word_id] = codes
+
+    raw_keys = sorted(store.raw_values)
+    arrays['raw_word_ids'] = np.array([word_id for word_id, row in raw_keys], dtype='U2')
+    arrays['raw_rows'] = np.array([row for word_id, row in raw_keys], dtype=np.int64)
+    arrays['raw_values'] = np.array([to_unicode(store.raw_values[key]) for key in raw_keys], dtype='U')
+
+    np.savez(filename, **arrays)
+
+
+def load_npz(filename):
+
+    """ GSI with its column store loaded from a file saved by export_npz - nothing is re-parsed """
+
+    arrays = np.load(filename, allow_pickle=False)
+
+    gsi = GSI(logger)
+    store = GSIColumnStore([to_str(word_id) for word_id in arrays['word_ids']])
+
+    for word_id in store.numeric_word_ids:
+        store.columns[word_id] = array_from_bytes('d', arrays['values_' + word_id].astype(np.float64).tobytes())
+
+    for word_id in store.word_ids:
+        store.masks[word_id] = bytearray(arrays['mask_' + word_id].tobytes())
+
+    for word_id in store.text_word_ids:
+        store.columns[word_id] = decode_strings(arrays['strings_' + word_id], arrays['codes_' + word_id])
+
+    for word_id, row, value in zip(arrays['raw_word_ids'], arrays['raw_rows'], arrays['raw_values']):
+        store.raw_values[(to_str(word_id), int(row))] = to_str(value)
+
+    store.row_count = len(store.masks[store.word_ids[0]]) if store.word_ids else 0
+    store.rebuild_indexes()
+
+    gsi.filename = to_str(arrays['filename'][()]) or None
+    gsi.store = store
+    gsi.formatted_lines = FormattedLines(store, gsi.get_formatted_line)
+
+    return gsi
+
+
+def encode_strings(values):
+
+    """ (distinct strings, index of each value in them or -1 for None) """
+
+    string_codes = {}
+    codes = np.empty(len(values), dtype=np.int32)
+
+    for index, value in enumerate(values):
+        codes[index] = -1 if value is None else string_codes.setdefault(value, len(string_codes))
+
+    strings = sorted(string_codes, key=string_codes.get)
+
+    return np.array([to_unicode(string) for string in strings], dtype='U'), codes
+
+
+def decode_strings(strings, codes):
+
+    strings = [to_str(string) for string in strings]
+
+    return [None if code < 0 else strings[code] for code in codes.tolist()]
+
+
+if sys.version_info[0] < 3:
+    def to_unicode(text):
+        return text.decode('utf-8')
+
+    def to_str(text):
+        return text.encode('utf-8')
+else:
+    def to_unicode(text):
+        return text
+
+    def to_str(text):
+        return str(text)
@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+
+"""
+Streaming filter for raw GSI files.
+
+Lines are read one at a time, tested against one or more predicates and the matching lines are written unchanged to
+the output.  Only the part of the line a predicate needs is looked at e.g. the point ID for PointSetPredicate.
+
+    GSIFilter(PointSetPredicate(['STN01', 'STN02'])).filter('TL231019.GSI', 'TL231019_CONTROL_ONLY.gsi')
+"""
+
+from FileUtils import atomic_open
+from GSIFormat import get_point_id_field, get_words_start
+from Instrumentation import profiler
+
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+# lines between progress updates
+PROGRESS_INTERVAL = 10000
+
+
+def get_point_id(line):
+
+    """ Point ID of a GSI-8 or GSI-16 line, formatted the same way as GSI.format_point_id """
+
+    return get_point_id_field(line).lstrip('0') or '0'
+
+
+def get_word_value(line, word_id):
+
+    """ Raw value of the first word with word_id after the point ID e.g. '0000000010230909' for '19', or None """
+
+    start = line.find(' ' + word_id, get_words_start(line) - 1)
+
+    if start == -1:
+        return None
+
+    end = line.find(' ', start + 1)
+
+    if end == -1:
+        end = len(line)
+
+    return line[start + 8:end].rstrip()
+
+
+def is_station_setup(line):
+    return line.find(' 84', get_words_start(line) - 1) != -1
+
+
+class LinePredicate:
+
+    """
+    Base class for filter predicates, which keeps every line.  Subclasses override __call__ to keep only some.
+    reset() is called before each file is filtered
+    """
+
+    def __call__(self, line):
+        return True
+
+    def reset(self):
+        pass
+
+
+class PointSetPredicate(LinePredicate):
+
+    """ Keep lines whose point ID is in point_ids """
+
+    def __init__(self, point_ids):
+        self.point_ids = frozenset(point_ids)
+
+    def __call__(self, line):
+        return get_point_id(line) in self.point_ids
+
+
+class StationSetupPredicate(LinePredicate):
+
+    """ Keep the station setup lines for the given stations and every observation made from those setups """
+
+    def __init__(self, stations):
+
+        self.stations = frozenset(stations)
+        self.in_setup = False
+
+    def __call__(self, line):
+
+        if is_station_setup(line):
+            self.in_setup = get_point_id(line) in self.stations
+
+        return self.in_setup
+
+    def reset(self):
+        self.in_setup = False
+
+
+class TimeWindowPredicate(LinePredicate):
+
+    """
+    Keep observations timestamped between start and end inclusive.  Times are 'HH:MM' strings as displayed by
+    GSI.format_timestamp.  Lines without a timestamp (e.g. station setups) are kept only if keep_untimed is True
+    """
+
+    def __init__(self, start='00:00', end='23:59', keep_untimed=False):
+
+        self.start = self.minutes_of_day(start)
+        self.end = self.minutes_of_day(end)
+        self.keep_untimed = keep_untimed
+
+    @staticmethod
+    def minutes_of_day(time_text):
+
+        hour, minute = time_text.split(':')
+        return int(hour) * 60 + int(minute)
+
+    def __call__(self, line):
+
+        timestamp = get_word_value(line, '19')
+
+        if not timestamp or not timestamp.isdigit():
+            return self.keep_untimed
+
+        # timestamp is MMDDhhmm - only the time of day is used
+        minutes = int(timestamp[-4:-2]) * 60 + int(timestamp[-2:])
+
+        return self.start <= minutes <= self.end
+
+
+class AnyOfPredicate(LinePredicate):
+
+    """ Keep lines that match at least one of predicates """
+
+    def __init__(self, *predicates):
+        self.predicates = predicates
+
+    def __call__(self, line):
+
+        # every predicate is called so stateful ones (e.g. StationSetupPredicate) see every line
+        results = [predicate(line) for predicate in self.predicates]
+        return any(results)
+
+    def reset(self):
+        for predicate in self.predicates:
+            predicate.reset()
+
+
+class GSIFilter:
+
+    """ Copies the lines of a GSI file that match all of predicates to a new file in a single pass """
+
+    def __init__(self, *predicates):
+
+        self.predicates = predicates
+
+    def matches(self, line):
+
+        # every predicate is called so stateful ones (e.g. StationSetupPredicate) see every line
+        results = [predicate(line) for predicate in self.predicates]
+        return all(results)
+
+    def reset(self):
+        for predicate in self.predicates:
+            predicate.reset()
+
+    def filter_lines(self, lines):
+
+        """ Generator of the lines that match """
+
+        self.reset()
+
+        if len(self.predicates) == 1:
+            return (line for line in lines if self.predicates[0](line))
+
+        return (line for line in lines if self.matches(line))
+
+    def filter(self, source_filename, destination_filename, progress=None):
+
+        """
+        Write the matching lines of source_filename to destination_filename.  Returns the number of lines kept.
+        destination_filename is only replaced once every line has been filtered, so a cancelled filter leaves it as it
+        was.
+        progress - optional ProgressMonitor told how many lines have been filtered
+        """
+
+        lines_written = 0
+
+        with open(source_filename, 'r') as f_source, \
+                atomic_open(destination_filename, 'w', WRITE_BUFFER_SIZE) as f_destination:
+
+            lines = profiler.time_iterator('GSI filter read', f_source)
+            lines = lines if progress is None else self.report_progress(lines, progress)
+            write = profiler.time_function('GSI filter write', f_destination.write)
+
+            for line in self.filter_lines(lines):
+                write(line)
+                lines_written += 1
+
+        profiler.count('GSI lines written', lines_written)
+
+        return lines_written
+
+    @staticmethod
+    def report_progress(lines, progress):
+
+        for line_count, line in enumerate(lines, 1):
+
+            yield line
+
+            if line_count % PROGRESS_INTERVAL == 0:
+                progress.update('Lines filtered', line_count)
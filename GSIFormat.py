@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+
+"""
+GSI-8 and GSI-16 line layouts, and the units of GSI words.
+
+GSI-16 lines start with '*' and have 16 character values, GSI-8 lines have 8 character values:
+
+    *110002+00000000000CTL01 21.324+0000000011954310 22.324+0000000009001543 ...
+    110002+0000CTL01 21.324+11954310 22.324+09001543 ...
+
+Every word is a 2 digit word ID, 4 characters of information, a sign and the value.  The last information character
+gives the value's units, and so the position of its decimal point:
+
+    0  metres, last digit 1 mm            2  400 gon, last digit 0.00001 gon
+    1  feet, last digit 0.001 ft          3  360° decimal, last digit 0.00001°
+    6  metres, last digit 0.1 mm          4  360° sexagesimal DDDMMSSs, last digit 0.1"
+    7  feet, last digit 0.0001 ft         5  6400 mil, last digit 0.0001 mil
+    8  metres, last digit 0.01 mm
+
+Values are converted to the units the rest of CompNet Assist works in - millimetres for distances and coordinates and
+DDDMMSSs for angles - so files recorded in other units or to 4 or 5 decimal places are read correctly.  get_converter
+gives the conversion for a word, or None if its value is already in those units.
+"""
+
+GSI16_MARKERS = ('*', b'*')
+
+# position of the units character in a word
+UNITS_POSITION = 5
+
+DISTANCE_WORD_IDS = ('31', '32', '33', '81', '82', '83', '84', '85', '86', '87', '88')
+ANGLE_WORD_IDS = ('21', '22')
+
+
+def is_gsi16(line):
+    return line[:1] in GSI16_MARKERS
+
+
+def get_point_id_field(line):
+
+    """ The value of a line's point ID (11) word, which can contain spaces so is sliced rather than split """
+
+    return line[8:24] if line[:1] in GSI16_MARKERS else line[7:15]
+
+
+def get_words_start(line):
+
+    """ Position of the space before the first word after the point ID """
+
+    return 24 if line[:1] in GSI16_MARKERS else 15
+
+
+def tenths_of_millimetres(value):
+    return value / 10.0
+
+
+def hundredths_of_millimetres(value):
+    return value / 100.0
+
+
+def thousandths_of_feet(value):
+    return round(value * 0.3048, 2)
+
+
+def ten_thousandths_of_feet(value):
+    return round(value * 0.03048, 2)
+
+
+def tenths_of_seconds_to_angle(tenths_of_seconds):
+
+    """ An angle in tenths of arc-seconds to DDDMMSSs e.g. 7748080 (215° 13' 28.0") -> 21513280 """
+
+    sign = -1 if tenths_of_seconds < 0 else 1
+    degrees, tenths_of_seconds = divmod(int(round(abs(tenths_of_seconds))), 36000)
+    minutes, tenths_of_seconds = divmod(tenths_of_seconds, 600)
+
+    return sign * (degrees * 100000 + minutes * 1000 + tenths_of_seconds)
+
+
+def gon(value):
+    return tenths_of_seconds_to_angle(value * 0.324)
+
+
+def decimal_degrees(value):
+    return tenths_of_seconds_to_angle(value * 0.36)
+
+
+def mil(value):
+    return tenths_of_seconds_to_angle(value * 0.2025)
+
+
+DISTANCE_CONVERTERS = {'1': thousandths_of_feet, '6': tenths_of_millimetres, '7': ten_thousandths_of_feet,
+                       '8': hundredths_of_millimetres}
+
+ANGLE_CONVERTERS = {'2': gon, '3': decimal_degrees, '5': mil}
+
+
+def get_converter(word_id, units):
+
+    """
+    Function from the signed integer value of a word to the value in millimetres or DDDMMSSs, or None if it is already
+    in them.  Unknown units are left as they are
+    """
+
+    if word_id in DISTANCE_WORD_IDS:
+        return DISTANCE_CONVERTERS.get(units)
+
+    if word_id in ANGLE_WORD_IDS:
+        return ANGLE_CONVERTERS.get(units)
+
+    return None
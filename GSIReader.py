@@ -0,0 +1,391 @@
+# -*- coding: utf-8 -*-
+
+"""
+Memory mapped reader for raw GSI-16 files that works on the bytes of each line.
+
+GSI-16 words are 23 characters long and start every 24 characters after the point ID block:
+
+    *110002+00000000000CTL01 21.324+0000000011954310 22.324+0000000009001543 31..00+0000000001505734 ...
+    0       8               25                      49                      73
+
+so a word's ID, sign and value are sliced straight out of the line at fixed offsets, without decoding the line or
+splitting it into tokens - the numeric values of a line are unpacked with one struct call.  Strings are only made for
+the values a caller asks for.  Lines that don't follow the fixed
+layout (e.g. a short or malformed word, a double space or a GSI-8 line) are left to the token based GSI.parse_line.
+
+    with MappedGSIReader('TL231019.GSI') as reader:
+        for record in reader:
+            print(record.point_id, record.get_value('84'))
+"""
+
+import mmap
+import struct
+
+from GSIFormat import UNITS_POSITION, get_converter, get_point_id_field, get_words_start
+
+ENCODING = 'utf-8'
+
+POINT_ID_START = 8
+FIRST_WORD_START = 25
+WORD_LENGTH = 23
+WORD_STEP = 24
+VALUE_OFFSET = 7
+SIGN_OFFSET = 6
+
+MINUS = b'-'
+SPACE = b' '
+
+# printable ascii characters and space.  Tabs, stray carriage returns and non-ascii text can be whitespace to
+# str.split() so lines with them are decoded by GSI.parse_line
+PRINTABLE_CHARACTERS = bytes(bytearray(range(0x20, 0x7f)))
+
+# word IDs as they appear in the file -> the str ID used by GSI.  A point ID (11) repeated after the first block is
+# rare and has its own rules, so lines with one are decoded by GSI.parse_line.  The prism constant (51) isn't a number
+WORD_IDS = dict((word_id.encode('ascii'), word_id) for word_id in
+                ('19', '21', '22', '31', '32', '33', '51', '81', '82', '83', '84', '85', '86', '87', '88'))
+
+if bytes is str:
+    def to_text(data):
+        return data  # python 2 - bytes are already str
+else:
+    def to_text(data):
+        return data.decode(ENCODING)
+
+
+def decode_line(line):
+
+    """ Line as the str open(filename, 'r') would give e.g. with a windows line ending turned into '\\n' """
+
+    line = to_text(line)
+
+    if line.endswith('\r\n'):
+        line = line[:-2] + '\n'
+
+    return line
+
+
+def get_fixed_length(line):
+
+    """ Length of a line without its line ending if it follows the fixed GSI-16 layout, otherwise None """
+
+    length = len(line.rstrip())
+    word_count, remainder = divmod(length - FIRST_WORD_START + 1, WORD_STEP)
+
+    if line[:1] != b'*' or word_count < 1 or remainder:
+        return None
+
+    # a single space before each word and none inside them - checked with one slice and one count, not per word
+    separators = line[FIRST_WORD_START - 1:length:WORD_STEP]
+
+    if separators != SPACE * word_count or line.count(SPACE, FIRST_WORD_START - 1, length) != word_count:
+        return None
+
+    # deleting every expected character leaves nothing
+    if line[FIRST_WORD_START:length].translate(None, PRINTABLE_CHARACTERS):
+        return None
+
+    return length
+
+
+def get_word_offsets(line):
+
+    """ Offsets of the words of a line as bytes, or None if it doesn't follow the fixed GSI-16 layout """
+
+    length = get_fixed_length(line)
+
+    return None if length is None else range(FIRST_WORD_START, length, WORD_STEP)
+
+
+class LineLayout:
+
+    """
+    The word IDs of a GSI-16 line in order, and a Struct that unpacks all of their numeric values in one call.  Most
+    lines of a file share a handful of layouts (station setups, shots ..) so they are cached in LINE_LAYOUTS.
+    units are the words' units characters - values that aren't in millimetres or DDDMMSSs are converted
+    """
+
+    def __init__(self, word_ids, units=None):
+
+        self.numeric_indexes = [index for index, word_id in enumerate(word_ids) if word_id != '51']
+        self.numeric_ids = [word_ids[index] for index in self.numeric_indexes]
+        self.raw_words = [(index, word_id) for index, word_id in enumerate(word_ids) if word_id == '51']
+
+        # (index in numeric_ids, converter) of the values in other units
+        converters = [get_converter(word_id, units[index]) if units else None
+                      for index, word_id in zip(self.numeric_indexes, self.numeric_ids)]
+        self.converters = [(number_index, converter) for number_index, converter in enumerate(converters)
+                           if converter is not None]
+
+        # skip the space and the 7 characters of ID, info and sign before each value
+        self.numeric_values = struct.Struct('{}x'.format(FIRST_WORD_START - 1) + ''.join(
+            '{}x{}s'.format(VALUE_OFFSET + 1, WORD_LENGTH - VALUE_OFFSET) if word_id != '51'
+            else '{}x'.format(WORD_STEP) for word_id in word_ids))
+
+        # a station setup doesn't have a target height - a 0 one after the STN_Easting is left out
+        self.skip_empty_target_height = '84' in word_ids and '87' in word_ids[word_ids.index('84'):]
+
+
+LINE_LAYOUTS = {}
+
+
+def get_line_layout(line, length):
+
+    """ LineLayout of a fixed layout line, or None if it has a word ID that parse_line has to deal with """
+
+    # first and second characters of every word ID, then the units of every word
+    key = (line[FIRST_WORD_START:length:WORD_STEP] + line[FIRST_WORD_START + 1:length:WORD_STEP] +
+           line[FIRST_WORD_START + UNITS_POSITION:length:WORD_STEP])
+
+    try:
+        return LINE_LAYOUTS[key]
+
+    except KeyError:
+        word_count = len(key) // 3
+        word_ids = [WORD_IDS.get(key[index:index + 1] + key[word_count + index:word_count + index + 1])
+                    for index in range(word_count)]
+        units = [to_text(key[2 * word_count + index:2 * word_count + index + 1]) for index in range(word_count)]
+
+        # unknown or repeated IDs have their own rules in parse_line
+        if None in word_ids or len(set(word_ids)) != len(word_ids):
+            line_layout = None
+        else:
+            line_layout = LineLayout(word_ids, units)
+
+        LINE_LAYOUTS[key] = line_layout
+
+        return line_layout
+
+
+def decode_fields(line):
+
+    """
+    Same dictionary of word ID and raw value as GSI.parse_line, decoded from the bytes of a GSI-16 line.  None if the
+    line doesn't follow the fixed layout, repeats a word or has a number that isn't all digits, so parse_line has to
+    decode it
+    """
+
+    length = get_fixed_length(line)
+
+    if length is None:
+        return None
+
+    line_layout = get_line_layout(line, length)
+
+    if line_layout is None:
+        return None
+
+    values = line_layout.numeric_values.unpack_from(line)
+
+    if not b''.join(values).isdigit():
+        return None
+
+    numbers = list(map(int, values))
+    signs = line[FIRST_WORD_START + SIGN_OFFSET:length:WORD_STEP]
+
+    if MINUS in signs:
+        for number_index, word_index in enumerate(line_layout.numeric_indexes):
+            if signs[word_index:word_index + 1] == MINUS:
+                numbers[number_index] = -numbers[number_index]
+
+    for number_index, converter in line_layout.converters:
+        numbers[number_index] = converter(numbers[number_index])
+
+    fields = dict(zip(line_layout.numeric_ids, numbers))
+    fields['11'] = to_text(line[POINT_ID_START:FIRST_WORD_START - 1]).lstrip('0') or '0'
+
+    # only values that aren't numbers are turned into strings
+    for word_index, word_id in line_layout.raw_words:
+        offset = FIRST_WORD_START + word_index * WORD_STEP + VALUE_OFFSET
+        fields[word_id] = to_text(line[offset:offset + WORD_LENGTH - VALUE_OFFSET]).lstrip('0')
+
+    if line_layout.skip_empty_target_height and not fields['87']:
+        del fields['87']
+
+    return fields
+
+
+class GSIRecord:
+
+    """ One line of a MappedGSIReader.  Nothing is decoded until it is asked for """
+
+    def __init__(self, line):
+
+        self.line = line
+        self.offsets = None
+
+    @property
+    def point_id(self):
+        return to_text(get_point_id_field(self.line)).lstrip('0') or '0'
+
+    @property
+    def text(self):
+        return decode_line(self.line)
+
+    def is_fixed_layout(self):
+        return self.get_offsets() is not None
+
+    def get_offsets(self):
+
+        if self.offsets is None:
+            self.offsets = get_word_offsets(self.line)
+
+        return self.offsets
+
+    def find_word(self, word_id):
+
+        """ Offset of the first word_id word after the point ID, or None """
+
+        offsets = self.get_offsets()
+        word_id = word_id.encode('ascii')
+
+        if offsets is None:
+            # not laid out in fixed positions - look for the word amongst the line's tokens instead
+            position = self.line.find(SPACE + word_id, get_words_start(self.line) - 1)
+            return None if position == -1 else position + 1
+
+        for offset in offsets:
+            if self.line[offset:offset + 2] == word_id:
+                return offset
+
+        return None
+
+    def get_value(self, word_id):
+
+        """ Raw value of word_id as GSIFilter.get_word_value gives it e.g. '0000000010230909', or None """
+
+        offset = self.find_word(word_id)
+
+        if offset is None:
+            return None
+
+        word_end = self.line.find(SPACE, offset)
+        word = self.line[offset:] if word_end == -1 else self.line[offset:word_end]
+
+        return to_text(word[VALUE_OFFSET:]).rstrip()
+
+    def get_number(self, word_id):
+
+        """ Signed integer value of word_id, or None if it isn't there or isn't a number """
+
+        offset = self.find_word(word_id)
+
+        if offset is None:
+            return None
+
+        value = self.line[offset + VALUE_OFFSET:offset + WORD_LENGTH]
+
+        if not value.isdigit():
+            return None
+
+        number = int(value)
+
+        return -number if self.line[offset + SIGN_OFFSET:offset + SIGN_OFFSET + 1] == MINUS else number
+
+
+class MappedGSIReader:
+
+    def __init__(self, filename):
+
+        self.filename = filename
+        self.file = open(filename, 'rb')
+
+        try:
+            self.buffer = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        except ValueError:
+            # an empty file can't be mapped
+            self.buffer = None
+
+    def close(self):
+
+        if self.buffer is not None:
+            self.buffer.close()
+
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return 0 if self.buffer is None else len(self.buffer)
+
+    def iter_lines(self):
+
+        """ Generator of the lines as bytes, each with its line ending """
+
+        if self.buffer is None:
+            return
+
+        self.buffer.seek(0)
+
+        for line in iter(self.buffer.readline, b''):
+            yield line
+
+    def iter_lines_at(self, start_byte=0, end_byte=None):
+
+        """ Generator of (byte offset, line) for the lines between start_byte and end_byte (the end of the file) """
+
+        if self.buffer is None:
+            return
+
+        end_byte = len(self.buffer) if end_byte is None else end_byte
+        offset = start_byte
+        self.buffer.seek(start_byte)
+
+        while offset < end_byte:
+
+            line = self.buffer.readline()
+
+            if not line:
+                break
+
+            yield offset, line
+            offset += len(line)
+
+    def get_line_ranges(self, range_count):
+
+        """
+        (start byte, end byte) of range_count roughly equal parts of the file, each ending at a line ending so every
+        line is in exactly one of them
+        """
+
+        if self.buffer is None:
+            return []
+
+        file_size = len(self)
+        boundaries = [0]
+
+        for part in range(1, range_count):
+
+            line_end = self.buffer.find(b'\n', max(file_size * part // range_count, boundaries[-1])) + 1
+
+            if not line_end or line_end >= file_size:
+                break
+
+            if line_end > boundaries[-1]:
+                boundaries.append(line_end)
+
+        boundaries.append(file_size)
+
+        return [(start_byte, end_byte) for start_byte, end_byte in zip(boundaries[:-1], boundaries[1:])
+                if end_byte > start_byte]
+
+    def get_complete_end(self):
+
+        """ Offset just past the last line ending - a line still being written to the file comes after it """
+
+        return 0 if self.buffer is None else self.buffer.rfind(b'\n', 0) + 1
+
+    def read(self, start_byte, end_byte):
+
+        """ The raw bytes between two offsets e.g. to copy lines unchanged """
+
+        return b'' if self.buffer is None else self.buffer[start_byte:end_byte]
+
+    def __iter__(self):
+
+        for line in self.iter_lines():
+            yield GSIRecord(line)
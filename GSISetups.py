@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+
+"""
+Index of the station setups of a GSI file.
+
+A GSI file is a series of station setups - a line with the station's coordinates (words 84, 85, 86 and 88) followed
+by the observations made from it.  SetupIndex finds the setups with a quick scan of the file's bytes, parsing only the
+setup lines, and records each setup's line and byte range.  One setup can then be loaded, filtered or exported
+without parsing the rest of the file, and work can be spread across setups in parallel:
+
+    setup_index = SetupIndex('TL231019.GSI')
+    gsi = GSI(logger)
+    gsi.format_setup(setup_index, setup_index[2])
+    setup_index.export_setup(setup_index[2], 'TL231019_STN03.gsi')
+    results = setup_index.map_setups(count_observations)
+
+Lines before the first station setup don't belong to any setup.  refresh() indexes only the lines added to the end of
+a file that is still being downloaded - index it with SetupIndex(filename, complete_lines_only=True) first.
+"""
+
+import bisect
+import logging
+import multiprocessing
+from collections import namedtuple
+from functools import partial
+
+from FileUtils import atomic_write
+from GSI import GSI
+from GSIFormat import get_words_start
+from GSIReader import MappedGSIReader, decode_line
+
+# Station coordinates are in metres, or None if the setup line doesn't have them.  Line numbers count from 0 and
+# match the rows of GSI.formatted_lines.  end_line and end_byte are one past the setup's last line
+StationSetup = namedtuple('StationSetup', ['index', 'station', 'easting', 'northing', 'elevation',
+                                           'instrument_height', 'start_line', 'end_line', 'start_byte', 'end_byte'])
+
+SETUP_WORD = b' 84'
+
+
+def is_station_setup_line(line):
+
+    """ Same test as GSIFilter.is_station_setup for a line read as bytes """
+
+    return line.find(SETUP_WORD, get_words_start(line) - 1) != -1
+
+
+def get_metres(fields, word_id):
+
+    value = fields.get(word_id)
+
+    # missing, or not a number
+    if value is None or isinstance(value, str):
+        return None
+
+    return value * 0.001
+
+
+class SetupIndex:
+
+    def __init__(self, filename, cache=None, complete_lines_only=False):
+
+        """
+        cache - optional ParseCache to load the index from, or save it to
+        complete_lines_only - for a file that is still being written and will be followed with refresh, the same as
+        GSI.format_gsi.  A last line without its line ending is left for refresh to index, and the index isn't cached
+        """
+
+        self.filename = filename
+        self.setups = None
+        self.line_count = 0
+
+        # how far into the file has been indexed, for refresh
+        self.scanned_bytes = 0
+        self.scanned_partial_line = False
+
+        if complete_lines_only:
+
+            with MappedGSIReader(filename) as reader:
+                complete_end = reader.get_complete_end()
+
+            self.build(complete_end)
+            return
+
+        if cache is not None:
+            cached_index, cache_stamp = cache.lookup(filename, 'setups')
+
+            if cached_index is not None:
+                self.setups, self.line_count = cached_index
+
+                with MappedGSIReader(filename) as reader:
+                    self.scanned_bytes = len(reader)
+                    self.scanned_partial_line = self.scanned_bytes > reader.get_complete_end()
+
+                return
+
+        self.build()
+
+        if cache is not None:
+            cache.store(filename, 'setups', (self.setups, self.line_count), cache_stamp)
+
+    def build(self, end_byte=None):
+
+        self.setups = []
+        self.line_count = 0
+        self.scanned_bytes = 0
+        self.scan(end_byte)
+
+    def refresh(self):
+
+        """
+        Index only the complete lines added to the end of the file since it was indexed, the same as
+        GSI.refresh_gsi.  The last setup is extended by new observations from it.  Returns the number of new setups
+        """
+
+        setup_count = len(self.setups)
+
+        with MappedGSIReader(self.filename) as reader:
+            file_size = len(reader)
+            complete_end = reader.get_complete_end()
+
+        if file_size < self.scanned_bytes or self.scanned_partial_line and file_size != self.scanned_bytes:
+            self.build(complete_end)
+            return len(self.setups)
+
+        if complete_end > self.scanned_bytes:
+            self.scan(complete_end)
+
+        return len(self.setups) - setup_count
+
+    def scan(self, end_byte=None):
+
+        """ Add the lines from scanned_bytes up to end_byte (the end of the file) to the index """
+
+        gsi = GSI(logging.getLogger('CompNet Assist'))
+        setup_starts = []
+        line_number = self.line_count - 1
+        scanned_bytes = self.scanned_bytes
+
+        with MappedGSIReader(self.filename) as reader:
+
+            end_byte = len(reader) if end_byte is None else end_byte
+
+            for line_number, (start_byte, line) in enumerate(reader.iter_lines_at(self.scanned_bytes, end_byte),
+                                                             self.line_count):
+
+                if is_station_setup_line(line):
+                    setup_starts.append((line_number, start_byte, gsi.parse_line_bytes(line)))
+
+                scanned_bytes = start_byte + len(line)
+
+            self.scanned_partial_line = scanned_bytes > reader.get_complete_end()
+
+        self.line_count = line_number + 1
+        self.scanned_bytes = scanned_bytes
+
+        # each setup runs up to the start of the next one
+        setup_ends = [(start_line, start_byte) for start_line, start_byte, fields in setup_starts]
+        setup_ends.append((self.line_count, self.scanned_bytes))
+
+        if self.setups:
+            self.setups[-1] = self.setups[-1]._replace(end_line=setup_ends[0][0], end_byte=setup_ends[0][1])
+
+        self.setups.extend(StationSetup(index, fields['11'], get_metres(fields, '84'), get_metres(fields, '85'),
+                                        get_metres(fields, '86'), get_metres(fields, '88'), start_line, end_line,
+                                        start_byte, end_byte)
+                           for index, ((start_line, start_byte, fields), (end_line, end_byte))
+                           in enumerate(zip(setup_starts, setup_ends[1:]), len(self.setups)))
+
+    def __len__(self):
+        return len(self.setups)
+
+    def __getitem__(self, index):
+        return self.setups[index]
+
+    def __iter__(self):
+        return iter(self.setups)
+
+    def get_setups_at(self, station):
+
+        """ Every setup on station, in file order """
+
+        return [setup for setup in self.setups if setup.station == station]
+
+    def get_setup_of_line(self, line_number):
+
+        """ The setup that line_number belongs to, or None if it comes before the first setup """
+
+        index = bisect.bisect_right([setup.start_line for setup in self.setups], line_number) - 1
+
+        return None if index < 0 or line_number >= self.setups[index].end_line else self.setups[index]
+
+    def iter_setup_lines(self, setup):
+
+        """ Generator of the lines of setup as bytes, starting with its station setup line """
+
+        with MappedGSIReader(self.filename) as reader:
+            for start_byte, line in reader.iter_lines_at(setup.start_byte, setup.end_byte):
+                yield line
+
+    def read_setup_lines(self, setup):
+
+        """ Lines of setup as str, the same as reading them from the file in text mode """
+
+        return read_setup_lines(self.filename, setup)
+
+    def filter_setup(self, setup, gsi_filter):
+
+        """ Lines of setup that match a GSIFilter """
+
+        return list(gsi_filter.filter_lines(self.read_setup_lines(setup)))
+
+    def export_setup(self, setup, destination_filename):
+
+        """ Write the lines of setup, unchanged, to destination_filename """
+
+        with MappedGSIReader(self.filename) as reader:
+            atomic_write(destination_filename, reader.read(setup.start_byte, setup.end_byte), 'wb')
+
+        return destination_filename
+
+    def map_setups(self, function, setups=None, processes=None):
+
+        """
+        [function(setup, lines) for each setup] computed across a pool of processes (one per CPU core by default),
+        where lines are the setup's lines as str.  Each worker reads only its own setup's lines.  function has to be
+        a module level function so it can be sent to the workers
+        """
+
+        setups = self.setups if setups is None else setups
+        apply_function = partial(apply_to_setup, function, self.filename)
+
+        if processes == 1 or len(setups) <= 1:
+            return [apply_function(setup) for setup in setups]
+
+        pool = multiprocessing.Pool(processes)
+
+        try:
+            return pool.map(apply_function, setups)
+        finally:
+            pool.close()
+            pool.join()
+
+
+def read_setup_lines(filename, setup):
+
+    with MappedGSIReader(filename) as reader:
+        return [decode_line(line) for start_byte, line in reader.iter_lines_at(setup.start_byte, setup.end_byte)]
+
+
+def apply_to_setup(function, filename, setup):
+    return function(setup, read_setup_lines(filename, setup))
@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+
+"""
+Columnar storage for parsed GSI data.
+
+Rather than keeping an OrderedDict of display strings for every GSI line, each word ID gets its own compact column
+plus a presence mask.  Numeric words are stored as signed raw GSI integers (e.g. millimetres, DDDMMSSs angles) in an
+array of doubles, text words (point ID, prism constant) as a list of shared strings.  Display strings are only built
+when a caller asks for them - see FormattedLines.
+
+Indexes of the rows of each point ID, the station setups and the control points are kept up to date as rows are
+appended, so queries on them don't rescan the columns.
+"""
+
+from array import array
+from itertools import compress
+
+try:
+    range = xrange
+except NameError:
+    pass  # python 3
+
+# presence mask values
+ABSENT = 0
+PRESENT = 1
+RAW = 2     # word was present but its value isn't a number - the raw string is kept in GSIColumnStore.raw_values
+
+TEXT_WORD_IDS = ('11', '51')
+
+
+def raw_string(value):
+
+    """ Stored value back to its GSI form with leading zeros and sign removed e.g. -4604 -> '4604', 0 -> '' """
+
+    if isinstance(value, str):
+        return value
+
+    # fractional millimetres from a file with 4 or 5 decimal places
+    if value % 1:
+        return repr(abs(value))
+
+    return '%d' % abs(value) if value else ''
+
+
+def array_to_bytes(values):
+    return values.tobytes() if hasattr(values, 'tobytes') else values.tostring()
+
+
+def array_from_bytes(typecode, data):
+
+    values = array(typecode)
+
+    if hasattr(values, 'frombytes'):
+        values.frombytes(data)
+    else:
+        values.fromstring(data)
+
+    return values
+
+
+class GSIColumnStore:
+
+    def __init__(self, word_ids):
+
+        self.word_ids = list(word_ids)
+        self.numeric_word_ids = [word_id for word_id in self.word_ids if word_id not in TEXT_WORD_IDS]
+        self.text_word_ids = [word_id for word_id in self.word_ids if word_id in TEXT_WORD_IDS]
+
+        self.row_count = 0
+        self.columns = {}
+        self.masks = {}
+
+        for word_id in self.numeric_word_ids:
+            self.columns[word_id] = array('d')
+
+        for word_id in self.text_word_ids:
+            self.columns[word_id] = []
+
+        for word_id in self.word_ids:
+            self.masks[word_id] = bytearray()
+
+        # (word_id, row) -> raw string for values that couldn't be stored numerically
+        self.raw_values = {}
+
+        # share one string object between identical text values e.g. the same point ID shot many times
+        self._string_pool = {}
+
+        # point ID -> rows with that point ID, rows of station setups and point IDs of setups with an STN_Easting
+        self.point_rows = {}
+        self.station_setup_rows = array('i')
+        self.control_points = set()
+
+    def append_row(self, fields):
+
+        """ Append one GSI line given as a dictionary of word ID -> raw value (a str or a signed int) """
+
+        row = self.row_count
+        pool = self._string_pool
+
+        for word_id in self.numeric_word_ids:
+
+            value = fields.get(word_id)
+
+            if value is None:
+                self.columns[word_id].append(0.0)
+                self.masks[word_id].append(ABSENT)
+
+            elif isinstance(value, str):
+                self.columns[word_id].append(0.0)
+                self.masks[word_id].append(RAW)
+                self.raw_values[(word_id, row)] = value
+
+            else:
+                self.columns[word_id].append(value)
+                self.masks[word_id].append(PRESENT)
+
+        for word_id in self.text_word_ids:
+
+            value = fields.get(word_id)
+
+            if value is None:
+                self.columns[word_id].append(None)
+                self.masks[word_id].append(ABSENT)
+
+            else:
+                self.columns[word_id].append(pool.setdefault(value, value))
+                self.masks[word_id].append(PRESENT)
+
+        self.index_row(row, fields)
+        self.row_count += 1
+
+        return row
+
+    def index_row(self, row, fields):
+
+        point_id = fields.get('11')
+        point_rows = self.point_rows.get(point_id)
+
+        if point_rows is None:
+            point_rows = self.point_rows[point_id] = array('i')
+
+        point_rows.append(row)
+
+        if '84' in fields:
+            self.station_setup_rows.append(row)
+
+            # a station setup with an STN_Easting is control
+            if fields['84']:
+                self.control_points.add(point_id)
+
+    def extend(self, other):
+
+        """
+        Append every row of another store with the same word IDs e.g. one built from a later part of the same file,
+        shifting the row numbers of its raw values and indexes to follow on from this store's rows
+        """
+
+        offset = self.row_count
+
+        for word_id in self.word_ids:
+            self.columns[word_id].extend(other.columns[word_id])
+            self.masks[word_id].extend(other.masks[word_id])
+
+        for (word_id, row), value in other.raw_values.items():
+            self.raw_values[(word_id, row + offset)] = value
+
+        for point_id, other_rows in other.point_rows.items():
+
+            point_rows = self.point_rows.get(point_id)
+
+            if point_rows is None:
+                point_rows = self.point_rows[point_id] = array('i')
+
+            point_rows.extend(row + offset for row in other_rows)
+
+        self.station_setup_rows.extend(row + offset for row in other.station_setup_rows)
+        self.control_points.update(other.control_points)
+        self.row_count += other.row_count
+
+    def rebuild_indexes(self):
+
+        """ Rebuild the point ID, station setup and control point indexes from the columns e.g. after loading them """
+
+        self.point_rows = {}
+        self.station_setup_rows = array('i')
+        self.control_points = set()
+
+        for row in range(self.row_count):
+
+            fields = {'11': self.columns['11'][row]}
+
+            if self.masks['84'][row] != ABSENT:
+                fields['84'] = self.get_raw_value('84', row)
+
+            self.index_row(row, fields)
+
+    def get_point_rows(self, point_id):
+
+        """ Rows with point_id, in file order """
+
+        return self.point_rows.get(point_id, ())
+
+    def get_point_count(self, point_id):
+        return len(self.point_rows.get(point_id, ()))
+
+    def get_raw_value(self, word_id, row):
+
+        """ Returns the value as it appeared in the GSI file with leading zeros and sign removed, or None if absent """
+
+        mask = self.masks[word_id][row]
+
+        if mask == ABSENT:
+            return None
+
+        if mask == RAW:
+            return self.raw_values[(word_id, row)]
+
+        value = self.columns[word_id][row]
+
+        if word_id in TEXT_WORD_IDS:
+            return value
+
+        return raw_string(value)
+
+    def present_rows(self, word_id):
+
+        """ Row numbers where the word ID is present """
+
+        return compress(range(self.row_count), self.masks[word_id])
+
+    def __len__(self):
+        return self.row_count
+
+    def __getstate__(self):
+
+        # pickle numeric columns as raw bytes - much smaller and faster to load than a list of floats
+        state = self.__dict__.copy()
+        state['columns'] = dict(self.columns)
+
+        for word_id in self.numeric_word_ids:
+            state['columns'][word_id] = array_to_bytes(self.columns[word_id])
+
+        state['point_rows'] = dict((point_id, array_to_bytes(rows)) for point_id, rows in self.point_rows.items())
+        state['station_setup_rows'] = array_to_bytes(self.station_setup_rows)
+
+        return state
+
+    def __setstate__(self, state):
+
+        self.__dict__.update(state)
+
+        for word_id in self.numeric_word_ids:
+            self.columns[word_id] = array_from_bytes('d', state['columns'][word_id])
+
+        self.point_rows = dict((point_id, array_from_bytes('i', rows)) for point_id, rows in state['point_rows'].items())
+        self.station_setup_rows = array_from_bytes('i', state['station_setup_rows'])
+
+
+class FormattedLines:
+
+    """
+    Read-only, list-like view of a GSIColumnStore that builds the formatted OrderedDict for a line only when it is
+    accessed.  Supports len(), indexing, slicing and iteration.
+    """
+
+    def __init__(self, store, format_line):
+
+        self.store = store
+        self.format_line = format_line
+
+    def __len__(self):
+        return self.store.row_count
+
+    def __getitem__(self, index):
+
+        if isinstance(index, slice):
+            return [self.format_line(row) for row in range(*index.indices(len(self)))]
+
+        if index < 0:
+            index += len(self)
+
+        if not 0 <= index < len(self):
+            raise IndexError('formatted line index out of range')
+
+        return self.format_line(index)
+
+    def __iter__(self):
+
+        for row in range(len(self)):
+            yield self.format_line(row)
+
+    def __repr__(self):
+        return '<FormattedLines: {} lines>'.format(len(self))
@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+
+"""
+Stage timers, counters and memory use for profiling CompNet Assist (the --profile switch), and lazily formatted log
+messages for the hot paths.
+
+Profiling is off unless profiler.enable() is called.  While it is off time_function and time_iterator hand back what
+they were given, so instrumented loops cost nothing extra:
+
+    parse_line = profiler.time_function('GSI tokenize', self.parse_line)
+
+    with profiler.stage('Comparison arrays'):
+        ...
+
+    profiler.count('GSI lines', line_count)
+    sys.stderr.write(profiler.format_report())
+
+Only the process that enabled it is profiled - batch files processed by a multiprocessing pool aren't included.
+"""
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import resource
+except ImportError:
+    resource = None  # windows
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None  # python 2
+
+timer = getattr(time, 'perf_counter', time.time)
+
+
+class LazyMessage:
+
+    """ Log argument that only calls function(*args) if the record is actually emitted e.g.
+
+        logger.info('Formatted Line: %s', LazyMessage(self.get_formatted_line, row))
+    """
+
+    def __init__(self, function, *args):
+
+        self.function = function
+        self.args = args
+
+    def __str__(self):
+        return str(self.function(*self.args))
+
+
+class StageTimer:
+
+    def __init__(self, profiler, name):
+
+        self.profiler = profiler
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        self.start = timer()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.profiler.add_time(self.name, timer() - self.start)
+
+
+class NullStage:
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+
+NULL_STAGE = NullStage()
+
+
+class Profiler:
+
+    def __init__(self):
+
+        self.enabled = False
+        self.start_time = None
+
+        # stage name -> [calls, seconds] and counter name -> count, in the order first seen
+        self.timings = OrderedDict()
+        self.counters = OrderedDict()
+
+        # fixed files are updated on a thread pool
+        self.lock = threading.Lock()
+
+    def enable(self):
+
+        self.enabled = True
+        self.start_time = timer()
+
+        # resource gives the peak memory for free - only trace allocations where it isn't available
+        if resource is None and tracemalloc is not None and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def reset(self):
+
+        with self.lock:
+            self.timings.clear()
+            self.counters.clear()
+            self.start_time = timer()
+
+    def add_time(self, name, seconds, calls=1):
+
+        with self.lock:
+            timing = self.timings.setdefault(name, [0, 0.0])
+            timing[0] += calls
+            timing[1] += seconds
+
+    def count(self, name, number=1):
+
+        if not self.enabled:
+            return
+
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + number
+
+    def stage(self, name):
+
+        """ Context manager that adds the time spent inside it to stage name """
+
+        return StageTimer(self, name) if self.enabled else NULL_STAGE
+
+    def time_function(self, name, function):
+
+        """ function, wrapped to add the time of every call to stage name if profiling """
+
+        if not self.enabled:
+            return function
+
+        def timed_function(*args, **kwargs):
+
+            start = timer()
+
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.add_time(name, timer() - start)
+
+        return timed_function
+
+    def time_iterator(self, name, iterable):
+
+        """ iterable, wrapped to add the time spent fetching each item to stage name if profiling e.g. file reads """
+
+        if not self.enabled:
+            return iterable
+
+        return self.timed_iterator(name, iterable)
+
+    def timed_iterator(self, name, iterable):
+
+        iterator = iter(iterable)
+        seconds = 0.0
+        calls = 0
+
+        try:
+            while True:
+
+                start = timer()
+
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    break
+
+                seconds += timer() - start
+                calls += 1
+
+                yield item
+
+        finally:
+            self.add_time(name, seconds, calls)
+
+    @staticmethod
+    def get_peak_memory():
+
+        """ Peak memory of this process in bytes, or None if it can't be measured """
+
+        if resource is not None:
+            max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+            # kilobytes on linux, bytes on mac
+            return max_rss if sys.platform == 'darwin' else max_rss * 1024
+
+        if tracemalloc is not None and tracemalloc.is_tracing():
+            return tracemalloc.get_traced_memory()[1]
+
+        return None
+
+    def format_report(self):
+
+        """ Timing and memory summary of everything profiled since enable() """
+
+        report = 'PROFILE\n'
+        report += '{:<28}{:>10}{:>12}{:>14}\n'.format('STAGE', 'CALLS', 'SECONDS', 'MS PER CALL')
+
+        with self.lock:
+            timings = list(self.timings.items())
+            counters = list(self.counters.items())
+
+        for name, (calls, seconds) in timings:
+            report += '{:<28}{:>10}{:>12.3f}{:>14.4f}\n'.format(name, calls, seconds,
+                                                                  seconds * 1000.0 / calls if calls else 0.0)
+
+        for name, number in counters:
+            report += '{:<28}{:>10}\n'.format(name, number)
+
+        if self.start_time is not None:
+            report += '{:<28}{:>22.3f}\n'.format('Total seconds', timer() - self.start_time)
+
+        peak_memory = self.get_peak_memory()
+
+        if peak_memory is not None:
+            report += '{:<28}{:>22.1f}\n'.format('Peak memory MB', peak_memory / 1048576.0)
+
+        return report
+
+
+# shared by every module so one report covers the whole run
+profiler = Profiler()
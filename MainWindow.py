@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+
+"""
+CompNet Assist GUI.  Only imported when the GUI is launched so the command line tools don't need Tkinter
+"""
+
+import tkFileDialog
+import logging.config
+from Tkinter import *
+import tkMessageBox
+from GSI import GSI
+from CoordinateFile import CoordinateFile, update_fixed_files, format_change_report
+from BatchRunner import run_batch_directory, format_batch_report
+from ParseCache import ParseCache
+from Comparison import compare_coordinate_files
+from ComparisonView import ComparisonView
+from BackgroundTask import BackgroundTask
+
+logger = logging.getLogger('CompNet Assist')
+parse_cache = ParseCache()
+
+
+# Tasks run on a worker thread by MainWindow.start_task - they mustn't touch any Tk widgets
+
+def strip_gsi_file(gsi_file_path, progress=None):
+    return GSI(logger).stream_control_only_gsi(gsi_file_path, progress)
+
+
+def process_folder(directory, progress=None):
+    return run_batch_directory(directory, cache=parse_cache, progress=progress)
+
+
+def update_fixed_files_from_path(coordinate_file_path, fixed_file_paths, progress=None):
+
+    coordinate_file = CoordinateFile(coordinate_file_path, parse_cache, progress)
+    return update_fixed_files(fixed_file_paths, coordinate_file, progress=progress)
+
+
+def compare_crd_file_paths(crd_file_path_1, crd_file_path_2, tol_E, tol_N, progress=None):
+
+    coordinate_file1 = CoordinateFile(crd_file_path_1, parse_cache, progress)
+    coordinate_file2 = CoordinateFile(crd_file_path_2, parse_cache, progress)
+
+    return compare_coordinate_files(coordinate_file1, coordinate_file2, tol_E, tol_N, progress=progress)
+
+
+class MainWindow:
+    coordinate_file_path = ""
+    fixed_file_paths = ()
+    crd_file_path_1 = ""
+    crd_file_path_2 = ""
+
+    def __init__(self, master):
+
+        self.master = master
+        self.comparison_view = None
+        self.task = None
+
+        # Update Fixed File GUI
+        self.update_fixed_file_lbl = Label(master, text='\nUPDATE FIXED FILE\n')
+        self.fixed_btn = Button(master, text='(1) Choose Fixed File(s): ', command=self.get_fixed_file_path)
+        self.coord_btn = Button(master, text='(2) Choose Coordinate File: ', command=self.get_coordinate_file_path)
+        self.update_btn = Button(master, text='(3) UPDATE FIXED FILE ', command=self.update_fixed_file)
+        self.fixed_result_lbl = Label(master, text=' ')
+        self.blank_lbl = Label(master, text='')
+
+        self.update_fixed_file_lbl.pack()
+        self.fixed_btn.pack()
+        self.coord_btn.pack()
+        self.update_btn.pack()
+        self.fixed_result_lbl.pack()
+        # self.blank_lbl.pack()
+
+        # Compare CRD Files GUI
+        self.compare_crd_files_lbl = Label(master, text='\nCOMPARE CRD FILES\n')
+        self.tolE_lbl = Label(master, text='Tolerance E: ')
+        self.entry_tolE = Entry(master)
+        self.entry_tolE.insert(END, '0.05')
+
+        self.tolN_lbl = Label(master, text='Tolerance N: ')
+        self.entry_tolN = Entry(master)
+        self.entry_tolN.insert(END, '0.05')
+
+        self.crd_file_1_btn = Button(master, text='(1) Choose CRD File 1: ', command=lambda: self.get_crd_file_path(1))
+        self.crd_file_2_btn = Button(master, text='(2) Choose CRD File 2: ', command=lambda: self.get_crd_file_path(2))
+
+        self.compare_crd_btn = Button(master, text='(3) COMPARE FILES ', command=self.compare_crd_files_outliers)
+        self.compare_result_lbl = Label(master, text=' ')
+
+        self.compare_crd_files_lbl.pack()
+        self.tolE_lbl.pack()
+        self.entry_tolE.pack()
+        self.tolN_lbl.pack()
+        self.entry_tolN.pack()
+
+        self.crd_file_1_btn.pack()
+        self.crd_file_2_btn.pack()
+        self.compare_crd_btn.pack()
+        self.compare_result_lbl.pack()
+
+        # Strip all shots except control
+        self.strip_non_control_shots_lbl = Label(master, text='\nSTRIP ALL SHOTS EXCEPT CONTROL:\n')
+        self.strip_non_control_shots_btn = Button(master, text='Choose GSI File to strip',
+                                                  command=self.strip_non_control_shots)
+        self.strip_result_lbl = Label(master, text=' ')
+        self.strip_non_control_shots_lbl.pack()
+        self.strip_non_control_shots_btn.pack()
+        self.strip_result_lbl.pack()
+
+        # Batch process a folder of GSI and coordinate files
+        self.batch_lbl = Label(master, text='\nBATCH PROCESS FOLDER:\n')
+        self.batch_btn = Button(master, text='Choose folder to process', command=self.batch_process_folder)
+        self.batch_result_lbl = Label(master, text=' ')
+        self.batch_lbl.pack()
+        self.batch_btn.pack()
+        self.batch_result_lbl.pack()
+
+        # Progress of whichever task is running in the background
+        self.progress_lbl = Label(master, text=' ')
+        self.cancel_btn = Button(master, text='CANCEL', command=self.cancel_task, state=DISABLED)
+        self.progress_lbl.pack()
+        self.cancel_btn.pack()
+
+    def strip_non_control_shots(self):
+
+        # let user choose GSI file
+        gsi_file_path = tkFileDialog.askopenfilename()
+
+        if not gsi_file_path:
+            return
+
+        self.start_task(self.strip_result_lbl, strip_gsi_file, (gsi_file_path,), lambda control_only_filename: None)
+
+    def batch_process_folder(self):
+
+        # let user choose a folder of GSI and coordinate files
+        directory = tkFileDialog.askdirectory()
+
+        if not directory:
+            return
+
+        self.start_task(self.batch_result_lbl, process_folder, (directory,), self.show_batch_results)
+
+    def show_batch_results(self, results):
+
+        top = Toplevel()
+        top.title("BATCH RESULTS")
+        top.geometry('400x600')
+
+        msg = Message(top, text=format_batch_report(results))
+        msg.pack()
+
+    def update_fixed_file(self):
+
+        if not self.fixed_file_paths:
+            tkMessageBox.showerror("Error", "No fixed files selected - choose the fixed file(s) to update first")
+            return
+
+        if not self.coordinate_file_path:
+            tkMessageBox.showerror("Error", "No coordinate file selected - choose the coordinate file to update from "
+                                            "first")
+            return
+
+        # open up fixed files & update the fixed files' easting/northings from the coordinate file
+        self.start_task(self.fixed_result_lbl, update_fixed_files_from_path,
+                        (self.coordinate_file_path, self.fixed_file_paths), self.show_fixed_file_updates)
+
+    def show_fixed_file_updates(self, fixed_file_updates):
+
+        failed_updates = [fixed_file_update for fixed_file_update in fixed_file_updates if fixed_file_update.error]
+
+        if failed_updates:
+            self.fixed_result_lbl.config(text='ERROR - See Richard')
+            tkMessageBox.showerror("Error", format_change_report(failed_updates))
+
+        top = Toplevel()
+        top.title("FIXED FILE CHANGES")
+        top.geometry('600x600')
+
+        msg = Message(top, text=format_change_report(fixed_file_updates), width=580)
+        msg.pack()
+
+    def compare_crd_files_outliers(self):
+
+        # Tolerances - let user decide in GUI???
+
+        tol_E = float(self.entry_tolE.get())
+        tol_N = float(self.entry_tolN.get())
+
+        print(tol_E, tol_N)
+
+        # open up the two CRD files and compare common values for outliers
+        self.start_task(self.compare_result_lbl, compare_crd_file_paths,
+                        (self.crd_file_path_1, self.crd_file_path_2, tol_E, tol_N), self.show_outliers)
+
+    def show_outliers(self, result):
+        self.comparison_view = ComparisonView(self.master, result)
+
+    def start_task(self, result_lbl, function, args, on_done):
+
+        """ Run function(*args) on a worker thread, showing its progress, then on_done(result) back on the Tk thread """
+
+        if self.task is not None and not self.task.finished:
+            tkMessageBox.showerror("Error", "Please wait for the current task to finish or cancel it")
+            return
+
+        def task_done(result):
+            self.end_task(result_lbl, 'SUCCESS')
+            on_done(result)
+
+        def task_error(ex):
+            print(ex, type(ex))
+            self.end_task(result_lbl, 'ERROR - See Richard')
+            tkMessageBox.showerror("Error", ex)
+
+        def task_cancelled():
+            self.end_task(result_lbl, 'CANCELLED')
+
+        result_lbl.config(text='RUNNING')
+        self.cancel_btn.config(state=NORMAL)
+        self.task = BackgroundTask(self.master, function, args, self.show_progress, task_done, task_error,
+                                   task_cancelled).start()
+
+    def end_task(self, result_lbl, text):
+
+        result_lbl.config(text=text)
+        self.progress_lbl.config(text=' ')
+        self.cancel_btn.config(state=DISABLED)
+
+    def show_progress(self, stage, count, total):
+
+        if total:
+            self.progress_lbl.config(text='{}: {} of {}'.format(stage, count, total))
+        else:
+            self.progress_lbl.config(text='{}: {}'.format(stage, count))
+
+    def cancel_task(self):
+
+        if self.task is not None:
+            self.task.cancel()
+
+    def get_fixed_file_path(self):
+        self.fixed_file_paths = self.master.tk.splitlist(tkFileDialog.askopenfilenames())
+        print(self.fixed_file_paths)
+
+    def get_coordinate_file_path(self):
+        self.coordinate_file_path = tkFileDialog.askopenfilename()
+        print(self.coordinate_file_path)
+
+    def get_crd_file_path(self, file_path_number):
+
+        if file_path_number is 1:
+            self.crd_file_path_1 = tkFileDialog.askopenfilename()
+            print(self.crd_file_path_1)
+        elif file_path_number is 2:
+            self.crd_file_path_2 = tkFileDialog.askopenfilename()
+            print(self.crd_file_path_2)
+        else:
+
+            tkMessageBox.showerror("Error", "No filepath no exists: " + str(file_path_number))
@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+
+"""
+On-disk cache of parsed GSI and coordinate files.
+
+Entries are looked up by file path, size and modification time, and stored under a hash of the file's contents, so a
+file that is touched or copied without changing still gets a cache hit while any change to it is a miss.  The cache
+is kept under max_bytes by removing the least recently used entries.  Only storing an entry writes the index, so
+processes sharing the cache can lose each other's index updates, which costs a cache miss but never leaks a file.
+
+    cache = ParseCache()
+    gsi.format_gsi(filename, cache=cache)
+
+    payload, stamp = cache.lookup(filename, 'gsi')
+    if payload is None:
+        payload = parse(filename)
+        cache.store(filename, 'gsi', payload, stamp)
+    coordinate_file = CoordinateFile(coordinate_file_path, cache=cache)
+"""
+
+import hashlib
+import os
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle  # python 3
+
+from FileUtils import atomic_write
+
+# Change whenever the parsed format of a GSI or coordinate file changes so old entries aren't used
+CACHE_VERSION = 4
+
+DEFAULT_CACHE_DIRECTORY = os.path.join(os.path.expanduser('~'), '.compnet_assist_cache')
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+HASH_BLOCK_SIZE = 1024 * 1024
+INDEX_FILENAME = 'index.pickle'
+
+
+class ParseCache:
+
+    def __init__(self, cache_directory=DEFAULT_CACHE_DIRECTORY, max_bytes=DEFAULT_MAX_BYTES, verify_content=False):
+
+        """
+        verify_content - hash the file on every load rather than trusting an unchanged size and modification time
+        """
+
+        self.cache_directory = cache_directory
+        self.max_bytes = max_bytes
+        self.verify_content = verify_content
+
+    @property
+    def index_filename(self):
+        return os.path.join(self.cache_directory, INDEX_FILENAME)
+
+    def load(self, filename, kind):
+
+        """ Cached result of parsing filename as kind (e.g. 'gsi'), or None if there isn't a valid one """
+
+        return self.lookup(filename, kind)[0]
+
+    def lookup(self, filename, kind):
+
+        """
+        (cached result or None, stamp of the file).  On a miss pass the stamp to store along with the result of
+        parsing the file, so it is stored under the contents the file had before it was parsed
+        """
+
+        try:
+            stat = os.stat(filename)
+            key = self.get_key(filename, kind)
+            entry = self.read_index().get(key)
+
+            if entry is not None and not self.verify_content and \
+                    (entry['size'], entry['mtime']) == (stat.st_size, stat.st_mtime):
+                digest = entry['digest']
+            else:
+                digest = self.hash_file(filename, kind)
+
+        except Exception:
+            return None, None
+
+        try:
+            with open(self.get_entry_filename(digest), 'rb') as f_entry:
+                payload = pickle.load(f_entry)
+
+        except Exception:
+            # missing, corrupt or written by another python version - treat as not cached
+            return None, (stat, digest)
+
+        # an entry file's modification time is when it was last used, so a hit doesn't rewrite the shared index
+        self.touch_entry_file(digest)
+
+        if entry != self.create_entry(stat, digest):
+            self.update_index(key, self.create_entry(stat, digest))
+
+        return payload, (stat, digest)
+
+    def get_stamp(self, filename, kind):
+
+        """ (stat, content hash) of filename - take it before parsing the file, for store """
+
+        return os.stat(filename), self.hash_file(filename, kind)
+
+    def store(self, filename, kind, payload, stamp=None):
+
+        """
+        stamp - from lookup or get_stamp before filename was parsed.  Without one the file is hashed now, which is only
+        right if it can't have changed since it was parsed
+        """
+
+        try:
+            stat, digest = self.get_stamp(filename, kind) if stamp is None else stamp
+            current_stat = os.stat(filename)
+
+            # changed while it was parsed e.g. still being downloaded - the parse may match neither version
+            if (current_stat.st_size, current_stat.st_mtime) != (stat.st_size, stat.st_mtime):
+                return
+
+            if not os.path.isdir(self.cache_directory):
+                os.makedirs(self.cache_directory)
+
+            atomic_write(self.get_entry_filename(digest), pickle.dumps(payload, pickle.HIGHEST_PROTOCOL), 'wb')
+
+            self.update_index(self.get_key(filename, kind), self.create_entry(stat, digest))
+            self.evict()
+
+        except (IOError, OSError):
+            # caching is only an optimisation - carry on without it
+            pass
+
+    def clear(self):
+
+        for digest, size, last_used in self.list_entry_files():
+            self.remove_entry_file(digest)
+
+        self.write_index({})
+
+    def update_index(self, key, entry):
+
+        """ Point key at a new entry, removing the entry file it replaces unless another key still uses it """
+
+        index = self.read_index()
+        previous_entry = index.get(key)
+        index[key] = entry
+        self.write_index(index)
+
+        if previous_entry is not None and previous_entry['digest'] != entry['digest'] and \
+                not any(other['digest'] == previous_entry['digest'] for other in index.values()):
+            self.remove_entry_file(previous_entry['digest'])
+
+    def evict(self):
+
+        """
+        Remove the least recently used entry files until the cache fits in max_bytes.  The files are found by listing
+        the cache directory, so ones an index written by another process has lost track of are removed too
+        """
+
+        entry_files = self.list_entry_files()
+        total_bytes = sum(size for digest, size, last_used in entry_files)
+        removed_digests = set()
+
+        for digest, size, last_used in sorted(entry_files, key=lambda entry_file: entry_file[2]):
+
+            if total_bytes <= self.max_bytes:
+                break
+
+            self.remove_entry_file(digest)
+            removed_digests.add(digest)
+            total_bytes -= size
+
+        if removed_digests:
+            index = self.read_index()
+            self.write_index(dict((key, entry) for key, entry in index.items()
+                                  if entry['digest'] not in removed_digests))
+
+    def list_entry_files(self):
+
+        """ (digest, size, last used time) of every entry file in the cache directory """
+
+        entry_files = []
+
+        try:
+            filenames = os.listdir(self.cache_directory)
+        except OSError:
+            return entry_files
+
+        for filename in filenames:
+
+            if not filename.endswith('.pickle') or filename == INDEX_FILENAME:
+                continue
+
+            try:
+                stat = os.stat(os.path.join(self.cache_directory, filename))
+            except OSError:
+                continue
+
+            entry_files.append((filename[:-len('.pickle')], stat.st_size, stat.st_mtime))
+
+        return entry_files
+
+    def read_index(self):
+
+        try:
+            with open(self.index_filename, 'rb') as f_index:
+                return pickle.load(f_index)
+
+        except Exception:
+            return {}
+
+    def write_index(self, index):
+
+        try:
+            atomic_write(self.index_filename, pickle.dumps(index, pickle.HIGHEST_PROTOCOL), 'wb')
+        except (IOError, OSError):
+            pass
+
+    def get_entry_filename(self, digest):
+        return os.path.join(self.cache_directory, digest + '.pickle')
+
+    def touch_entry_file(self, digest):
+
+        try:
+            os.utime(self.get_entry_filename(digest), None)
+        except OSError:
+            pass
+
+    def remove_entry_file(self, digest):
+
+        try:
+            os.remove(self.get_entry_filename(digest))
+        except OSError:
+            pass
+
+    @staticmethod
+    def get_key(filename, kind):
+        return kind, os.path.abspath(filename)
+
+    @staticmethod
+    def create_entry(stat, digest):
+        return {'size': stat.st_size, 'mtime': stat.st_mtime, 'digest': digest}
+
+    @staticmethod
+    def hash_file(filename, kind):
+
+        file_hash = hashlib.sha1('{}:{}:'.format(CACHE_VERSION, kind).encode('ascii'))
+
+        with open(filename, 'rb') as f:
+            for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+                file_hash.update(block)
+
+        return file_hash.hexdigest()
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+
+"""
+Grid hash spatial index over point coordinates, for matching points by position when their names differ between
+files e.g. CTL3 in a CRD file and CTL03 in an asc file.
+
+Points are bucketed into square cells of cell_size metres, so a query only looks at the cells around it.  Pick a
+cell_size close to the search radius that will be used.
+"""
+
+import math
+
+
+class SpatialIndex:
+
+    def __init__(self, points, eastings, northings, cell_size=1.0):
+
+        self.points = list(points)
+        self.eastings = [float(easting) for easting in eastings]
+        self.northings = [float(northing) for northing in northings]
+        self.cell_size = float(cell_size)
+        self.cells = {}
+
+        for index, (easting, northing) in enumerate(zip(self.eastings, self.northings)):
+            self.cells.setdefault(self.get_cell(easting, northing), []).append(index)
+
+        # extent of the occupied cells
+        if self.cells:
+            self.min_cell = tuple(min(cell[axis] for cell in self.cells) for axis in (0, 1))
+            self.max_cell = tuple(max(cell[axis] for cell in self.cells) for axis in (0, 1))
+
+    @classmethod
+    def from_coordinate_dictionary(cls, coordinate_dictionary, cell_size=1.0, points=None):
+
+        """ Index the points of a CoordinateFile's coordinate dictionary - all of them unless points is given """
+
+        points = list(coordinate_dictionary) if points is None else list(points)
+
+        return cls(points, [coordinate_dictionary[point]['Eastings'] for point in points],
+                   [coordinate_dictionary[point]['Northings'] for point in points], cell_size)
+
+    def __len__(self):
+        return len(self.points)
+
+    def get_cell(self, easting, northing):
+        return int(math.floor(easting / self.cell_size)), int(math.floor(northing / self.cell_size))
+
+    def get_ring(self, cell, radius):
+
+        """ Cells that are exactly radius cells away from cell (a square ring) """
+
+        cell_x, cell_y = cell
+
+        if radius == 0:
+            return [cell]
+
+        ring = []
+
+        for offset in range(-radius, radius + 1):
+            ring.append((cell_x + offset, cell_y - radius))
+            ring.append((cell_x + offset, cell_y + radius))
+
+        for offset in range(-radius + 1, radius):
+            ring.append((cell_x - radius, cell_y + offset))
+            ring.append((cell_x + radius, cell_y + offset))
+
+        return ring
+
+    def get_distance(self, index, easting, northing):
+        return math.hypot(self.eastings[index] - easting, self.northings[index] - northing)
+
+    def within(self, easting, northing, radius):
+
+        """ (distance, point) for every point within radius of easting, northing, nearest first """
+
+        easting, northing = float(easting), float(northing)
+        cell_x, cell_y = self.get_cell(easting, northing)
+        cell_radius = int(math.ceil(radius / self.cell_size))
+        matches = []
+
+        for x in range(cell_x - cell_radius, cell_x + cell_radius + 1):
+            for y in range(cell_y - cell_radius, cell_y + cell_radius + 1):
+                for index in self.cells.get((x, y), ()):
+
+                    distance = self.get_distance(index, easting, northing)
+
+                    if distance <= radius:
+                        matches.append((distance, self.points[index]))
+
+        return sorted(matches)
+
+    def nearest(self, easting, northing, max_distance=None):
+
+        """ (distance, point) of the point nearest to easting, northing, or None if none is within max_distance """
+
+        if not self.points:
+            return None
+
+        easting, northing = float(easting), float(northing)
+        cell = self.get_cell(easting, northing)
+        best = None
+        radius = 0
+
+        # rings beyond this can't hold any point
+        max_radius = max(abs(cell[0] - self.min_cell[0]), abs(cell[0] - self.max_cell[0]),
+                         abs(cell[1] - self.min_cell[1]), abs(cell[1] - self.max_cell[1]))
+
+        if max_distance is not None:
+            max_radius = min(max_radius, int(math.ceil(max_distance / self.cell_size)))
+
+        while radius <= max_radius:
+
+            for ring_cell in self.get_ring(cell, radius):
+                for index in self.cells.get(ring_cell, ()):
+
+                    distance = self.get_distance(index, easting, northing)
+
+                    if best is None or distance < best[0]:
+                        best = (distance, self.points[index])
+
+            # anything in a further ring is at least radius cells away
+            if best is not None and best[0] <= radius * self.cell_size:
+                break
+
+            radius += 1
+
+        if best is None or (max_distance is not None and best[0] > max_distance):
+            return None
+
+        return best
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import tempfile
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+if numpy is not None:
+    from Comparison import compare_coordinate_files, compare_coordinates, compare_epochs, export_comparison_csv
+
+from CoordinateFile import CoordinateFile
+
+FILES_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Files')
+
+
+def get_coordinates(easting, northing, height=None):
+
+    coordinates = {'Eastings': str(easting), 'Northings': str(northing)}
+
+    if height is not None:
+        coordinates['Heights'] = str(height)
+
+    return coordinates
+
+
+EPOCH_1 = {'A': get_coordinates(1000.000, 2000.000, 10.000), 'B': get_coordinates(1100.000, 2100.000),
+           'C': get_coordinates(1200.000, 2200.000)}
+EPOCH_2 = {'A': get_coordinates(1000.020, 2000.000, 10.001), 'B': get_coordinates(1100.000, 2100.003)}
+EPOCH_3 = {'A': get_coordinates(1000.020, 1999.950), 'C': get_coordinates(1200.000, 2200.000)}
+
+
+@unittest.skipIf(numpy is None, 'needs numpy')
+class CompareCoordinatesTest(unittest.TestCase):
+
+    def test_outliers(self):
+
+        result = compare_coordinates(EPOCH_2, EPOCH_1, 0.01, 0.01)
+
+        self.assertEqual(len(result), 2)
+        self.assertEqual([outlier[0] for outlier in result.get_outliers()], ['A'])
+
+        point, delta_e, delta_n, delta_h, radial = result.get_outliers()[0]
+        self.assertAlmostEqual(delta_e, 0.02)
+        self.assertAlmostEqual(delta_h, 0.001)
+        self.assertAlmostEqual(radial, 0.02)
+
+    def test_export_csv(self):
+
+        result = compare_coordinates(EPOCH_2, EPOCH_1, 0.01, 0.01)
+        directory = tempfile.mkdtemp()
+
+        try:
+            filename = os.path.join(directory, 'outliers.csv')
+            self.assertEqual(export_comparison_csv(result, filename, result.get_outlier_indices()), 1)
+
+            with open(filename) as f:
+                lines = f.read().splitlines()
+
+        finally:
+            shutil.rmtree(directory)
+
+        self.assertEqual(lines, ['POINT,MATCHED POINT,dE,dN,dH,RADIAL,OUTLIER', 'A,A,0.020,0.000,0.001,0.020,Y'])
+
+
+@unittest.skipIf(numpy is None, 'needs numpy')
+class MatchToleranceTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.crd_file = CoordinateFile(os.path.join(FILES_DIRECTORY, 'AA9 ARTC_130120.CRD'))
+        self.asc_file = CoordinateFile(os.path.join(FILES_DIRECTORY, 'AA9 ARTC 170220.asc'))
+
+    def compare(self, match_tolerance):
+
+        result = compare_coordinate_files(self.crd_file, self.asc_file, 0.01, 0.01, match_tolerance=match_tolerance)
+
+        pairs = sorted(zip(result.points, result.matched_points))
+        outliers = sorted(outlier[0] for outlier in result.get_outliers())
+
+        return pairs, outliers
+
+    def test_names_only(self):
+
+        pairs, outliers = self.compare(None)
+
+        self.assertEqual(pairs, [(point, point) for point in ('CTL4', 'STN03', 'STN12', 'STN13', 'STN741', 'STN751')])
+        self.assertEqual(outliers, ['STN03', 'STN12', 'STN13', 'STN751'])
+
+    def test_match_tolerance(self):
+
+        names_only = self.compare(None)[0]
+
+        # CTL5 is 8.5mm from CTL05, CTL3 16mm from CTL03 and RO 19mm from STNRO
+        self.assertEqual(self.compare(0.001)[0], names_only)
+        self.assertEqual(self.compare(0.01)[0], sorted(names_only + [('CTL5', 'CTL05')]))
+
+        pairs, outliers = self.compare(0.05)
+
+        self.assertEqual(pairs, sorted(names_only + [('CTL3', 'CTL03'), ('CTL5', 'CTL05'), ('RO', 'STNRO')]))
+        self.assertEqual(outliers, ['CTL3', 'RO', 'STN03', 'STN12', 'STN13', 'STN751'])
+
+
+@unittest.skipIf(numpy is None, 'needs numpy')
+class CompareEpochsTest(unittest.TestCase):
+
+    def test_displacements(self):
+
+        result = compare_epochs([EPOCH_1, EPOCH_2, EPOCH_3], ['1', '2', '3'], 0.01, 0.01)
+
+        self.assertEqual(sorted(result.points), ['A', 'B', 'C'])
+        self.assertEqual([(point, epoch) for point, epoch, delta_e, delta_n, delta_h, radial in
+                          result.get_outliers()], [('A', '2'), ('A', '3')])
+        self.assertEqual([history[0] for history in result.get_history('C')], ['1', '3'])
+        self.assertEqual([result.get_point_index(point) for point in result.points], [0, 1, 2])
+
+    def test_baseline(self):
+
+        result = compare_epochs([EPOCH_1, EPOCH_2, EPOCH_3], ['1', '2', '3'], 0.01, 0.01, baseline=2)
+
+        self.assertEqual([(point, epoch) for point, epoch, delta_e, delta_n, delta_h, radial in
+                          result.get_outliers()], [('A', '1'), ('A', '2')])
+
+    def test_baseline_out_of_range(self):
+
+        for baseline in (-1, 3):
+            self.assertRaises(ValueError, compare_epochs, [EPOCH_1, EPOCH_2, EPOCH_3], ['1', '2', '3'], 0.01, 0.01,
+                              baseline=baseline)
+
+    def test_epoch_count(self):
+        self.assertRaises(ValueError, compare_epochs, [EPOCH_1, EPOCH_2], ['1'], 0.01, 0.01)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from CoordinateFile import CoordinateFile, format_change_report, update_fixed_files
+
+FILES_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Files')
+
+
+class UpdateFixedFilesTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.directory = tempfile.mkdtemp()
+        self.fixed_file_paths = [os.path.join(self.directory, name) for name in ('A.FIX', 'B.FIX')]
+
+        for fixed_file_path in self.fixed_file_paths:
+            shutil.copy(os.path.join(FILES_DIRECTORY, 'AA9 ARTC 030220.FIX'), fixed_file_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_update(self):
+
+        coordinate_file = CoordinateFile(os.path.join(FILES_DIRECTORY, 'AA9 ARTC 170220.asc'))
+        fixed_file_updates = update_fixed_files(self.fixed_file_paths + [os.path.join(self.directory, 'MISSING.FIX')],
+                                                coordinate_file)
+
+        self.assertEqual([fixed_file_update.fixed_file_path for fixed_file_update in fixed_file_updates],
+                         self.fixed_file_paths + [os.path.join(self.directory, 'MISSING.FIX')])
+        self.assertIsNotNone(fixed_file_updates[2].error)
+
+        change = [change for change in fixed_file_updates[0].changes if change.station == 'STN12'][0]
+        self.assertEqual((change.old_easting, change.new_easting), (287562.1624, 287562.1489))
+        self.assertAlmostEqual(change.delta_easting, -0.0135)
+        self.assertAlmostEqual(change.delta_northing, -0.0147)
+
+        with open(self.fixed_file_paths[1]) as f:
+            self.assertIn('89 287562.1489  6215335.6571 "STN12"\n', f.readlines())
+
+        self.assertIn('    STN12:  old 287562.1624  6215335.6718  new 287562.1489  6215335.6571  dE -0.0135  dN -0.0147',
+                      format_change_report(fixed_file_updates).splitlines())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+
+import os
+import unittest
+
+from CoordinateFile import CoordinateFile
+from CoordinateFormats import CoordinateParser, get_coordinate_parser
+from GSIExceptions import UnsupportedCoordinateFileError
+
+FILES_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Files')
+
+
+class CoordinateFormatsTest(unittest.TestCase):
+
+    def load(self, name):
+        return CoordinateFile(os.path.join(FILES_DIRECTORY, name))
+
+    def test_crd(self):
+
+        coordinate_file = self.load('AA9 ARTC_130120.CRD')
+
+        self.assertEqual(coordinate_file.file_format, 'CRD')
+        self.assertEqual(len(coordinate_file.coordinate_dictionary), 578)
+        self.assertEqual(coordinate_file.coordinate_dictionary['STN03'],
+                         {'Eastings': '285968.9412', 'Northings': '6215310.3788'})
+
+    def test_asc(self):
+
+        coordinate_file = self.load('AA9 ARTC 170220.asc')
+
+        self.assertEqual(coordinate_file.file_format, 'ASC')
+        self.assertEqual(len(coordinate_file.coordinate_dictionary), 10)
+        self.assertEqual(coordinate_file.coordinate_dictionary['STN03'],
+                         {'Eastings': '285968.9539', 'Northings': '6215310.3795', 'Heights': '117.3814',
+                          'Description': '170220'})
+
+    def test_std(self):
+
+        coordinate_file = self.load('AA9 ARTC_130120.STD')
+
+        self.assertEqual(coordinate_file.file_format, 'STD')
+        self.assertEqual(len(coordinate_file.coordinate_dictionary), 9)
+        self.assertEqual(coordinate_file.coordinate_dictionary['STN03'],
+                         {'Eastings': '285968.9510', 'Northings': '6215310.3810', 'Std_Dev_Eastings': '0.010',
+                          'Std_Dev_Northings': '0.010'})
+
+    def test_fix(self):
+
+        coordinate_file = self.load('AA9 ARTC 030220.FIX')
+
+        self.assertEqual(coordinate_file.file_format, 'FIX')
+        self.assertEqual(len(coordinate_file.coordinate_dictionary), 16)
+        self.assertEqual(coordinate_file.coordinate_dictionary['STN03'],
+                         {'Eastings': '286925.0180', 'Northings': '6215841.2629'})
+
+    def test_unsupported(self):
+        self.assertRaises(UnsupportedCoordinateFileError, get_coordinate_parser, ['not a coordinate file\n'])
+
+    def test_default_parser(self):
+
+        lines = ['\n', 'CTL01 1000.000 2000.000 30.000\n', 'CTL02 1001.000 2001.000\n', 'END\n']
+
+        self.assertTrue(CoordinateParser.detect(lines))
+        self.assertFalse(CoordinateParser.detect(['END\n']))
+        self.assertEqual(CoordinateParser.parse(lines),
+                         {'CTL01': {'Eastings': '1000.000', 'Northings': '2000.000', 'Heights': '30.000'},
+                          'CTL02': {'Eastings': '1001.000', 'Northings': '2001.000'}})
+
+
+if __name__ == '__main__':
+    unittest.main()
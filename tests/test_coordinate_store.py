@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from CoordinateStore import CoordinateStore
+from GSIExceptions import UnsupportedCoordinateFileError
+
+FILES_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Files')
+
+
+class CoordinateStoreTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.directory = tempfile.mkdtemp()
+        self.database_filename = os.path.join(self.directory, 'project.sqlite')
+
+        for name in ('AA9 ARTC_130120.CRD', 'AA9 ARTC_130120.STD', 'AA9 ARTC 170220.asc'):
+            shutil.copy(os.path.join(FILES_DIRECTORY, name), self.directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def get_path(self, name):
+        return os.path.join(self.directory, name)
+
+    def test_latest_and_history(self):
+
+        with CoordinateStore(self.database_filename) as store:
+
+            self.assertEqual(store.add_file(self.get_path('AA9 ARTC_130120.CRD'), '2020-01-13'), 578)
+            self.assertEqual(store.add_file(self.get_path('AA9 ARTC 170220.asc'), '2020-02-17'), 10)
+            self.assertIsNone(store.add_file(self.get_path('AA9 ARTC 170220.asc')))
+
+            self.assertEqual(store.get_latest('STN03')['Eastings'], '285968.9539')
+            self.assertEqual([(epoch, coordinates['Eastings']) for epoch, path, coordinates in
+                              store.get_history('STN03')], [('2020-01-13', '285968.9412'),
+                                                            ('2020-02-17', '285968.9539')])
+            self.assertEqual(len(store.get_latest_coordinates()), 582)
+            self.assertEqual(len(store.get_latest_coordinates('2020-01-31')), 578)
+
+    def test_standard_deviations(self):
+
+        with CoordinateStore(self.database_filename) as store:
+
+            store.add_file(self.get_path('AA9 ARTC_130120.STD'))
+
+            self.assertEqual(store.get_latest('STN03'), {'Eastings': '285968.9510', 'Northings': '6215310.3810',
+                                                         'Std_Dev_Eastings': '0.010', 'Std_Dev_Northings': '0.010'})
+            self.assertEqual(store.get_history('STN03')[0][2]['Std_Dev_Northings'], '0.010')
+            self.assertEqual(store.get_coordinate_file(self.get_path('AA9 ARTC_130120.STD')).file_format, 'STD')
+
+    def test_unreadable_file_keeps_stored_points(self):
+
+        path = self.get_path('AA9 ARTC_130120.CRD')
+
+        with CoordinateStore(self.database_filename) as store:
+
+            store.add_file(path)
+
+            # still there but can't be read as a file
+            os.remove(path)
+            os.mkdir(path)
+
+            self.assertRaises(IOError, store.add_file, path)
+            self.assertEqual(len(store.get_source_coordinates(path)), 578)
+
+    def test_file_without_points_keeps_stored_points(self):
+
+        path = self.get_path('AA9 ARTC_130120.CRD')
+
+        with open(path) as f:
+            header = [line for line in f if 'DESCRIPTION' in line]
+
+        with CoordinateStore(self.database_filename) as store:
+
+            store.add_file(path)
+
+            with open(path, 'w') as f:
+                f.writelines(header)
+
+            self.assertRaises(UnsupportedCoordinateFileError, store.add_file, path, '2099-01-01')
+            self.assertEqual(len(store.get_source_coordinates(path)), 578)
+
+    def test_database_without_standard_deviation_columns(self):
+
+        connection = sqlite3.connect(self.database_filename)
+        connection.executescript("""
+            CREATE TABLE coordinates (point TEXT NOT NULL, source_id INTEGER NOT NULL, epoch TEXT NOT NULL,
+                                      easting TEXT NOT NULL, northing TEXT NOT NULL, height TEXT, description TEXT);
+        """)
+        connection.close()
+
+        with CoordinateStore(self.database_filename) as store:
+
+            store.add_file(self.get_path('AA9 ARTC_130120.STD'))
+            self.assertEqual(store.get_latest('STN03')['Std_Dev_Eastings'], '0.010')
+
+
+if __name__ == '__main__':
+    unittest.main()
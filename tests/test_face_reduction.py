@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import os
+import shutil
+import tempfile
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from GSI import GSI
+
+if numpy is not None:
+    from FaceReduction import reduce_faces, select_alternate
+
+FILES_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Files')
+
+
+def read_gsi_lines():
+
+    with open(os.path.join(FILES_DIRECTORY, 'TL231019.GSI')) as f:
+        return f.readlines()
+
+
+@unittest.skipIf(numpy is None, 'needs numpy')
+class SelectAlternateTest(unittest.TestCase):
+
+    def test_runs(self):
+
+        candidates = numpy.array([False, True, True, True, False, True, True, False, True], dtype=bool)
+        selected = select_alternate(candidates)
+
+        self.assertEqual(selected.tolist(), [False, True, False, True, False, True, False, False, True])
+
+    def test_empty(self):
+        self.assertEqual(len(select_alternate(numpy.zeros(0, dtype=bool))), 0)
+
+
+@unittest.skipIf(numpy is None, 'needs numpy')
+class ReduceFacesTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.directory = tempfile.mkdtemp()
+        self.gsi_lines = read_gsi_lines()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def reduce(self, lines):
+
+        filename = os.path.join(self.directory, 'FACES.GSI')
+
+        with open(filename, 'w') as f:
+            f.writelines(lines)
+
+        gsi = GSI(logging.getLogger('CompNet Assist'))
+        gsi.format_gsi(filename)
+
+        return reduce_faces(gsi.store)
+
+    def test_sample_file(self):
+
+        reduction = self.reduce(self.gsi_lines)
+
+        self.assertEqual(len(reduction), 65)
+
+        index = [index for index in range(len(reduction))
+                 if (reduction.stations[index], reduction.points[index]) == ('STN01', 'TL03')][0]
+
+        self.assertEqual((reduction.left_rows[index], reduction.right_rows[index]), (8, 7))
+        self.assertAlmostEqual(reduction.collimation_errors[index], -10.0)
+        self.assertAlmostEqual(reduction.index_errors[index], -24.0)
+        self.assertAlmostEqual(reduction.distance_spreads[index], 0.0)
+
+        self.assertIn(('STN01', 'TL03'), [(station, point) for station, point, collimation, index_error, spread
+                                          in reduction.get_outliers()])
+
+    def test_face_runs(self):
+
+        # STN01 setup, then shots to TL03 on face left and face right
+        setup, face_right, face_left = self.gsi_lines[0], self.gsi_lines[7], self.gsi_lines[8]
+
+        # FL, FL, FR - the second face left shot is the one next to the face right shot
+        reduction = self.reduce([setup, face_left, face_left, face_right])
+        self.assertEqual((reduction.left_rows.tolist(), reduction.right_rows.tolist()), ([2], [3]))
+
+        # FL, FR, FL - the last shot is left over
+        reduction = self.reduce([setup, face_left, face_right, face_left])
+        self.assertEqual((reduction.left_rows.tolist(), reduction.right_rows.tolist()), ([1], [2]))
+
+        # FL, FR, FL, FR - two pairs, neither sharing a shot
+        reduction = self.reduce([setup, face_left, face_right, face_left, face_right])
+        self.assertEqual((reduction.left_rows.tolist(), reduction.right_rows.tolist()), ([1, 3], [2, 4]))
+        self.assertEqual(reduction.setups.tolist(), [0, 0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+
+import csv
+import io
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import GSI as gsi_module
+from GSI import GSI
+from ParseCache import ParseCache
+
+TESTS_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+FILES_DIRECTORY = os.path.join(os.path.dirname(TESTS_DIRECTORY), 'Files')
+
+# formatted lines of Files/TL231019.GSI as the original line by line parser formatted them
+BASELINE_FILENAME = os.path.join(TESTS_DIRECTORY, 'data', 'TL231019_formatted.csv')
+BASELINE_CONTROL_POINTS = ['STN01', 'STN02', 'STN03', 'STN04', 'STN05', 'STN06']
+
+
+def read_baseline():
+
+    if sys.version_info[0] < 3:
+        f = open(BASELINE_FILENAME, 'rb')
+    else:
+        f = io.open(BASELINE_FILENAME, encoding='utf-8', newline='')
+
+    with f:
+        rows = list(csv.reader(f))
+
+    return [list(zip(rows[0], row)) for row in rows[1:]]
+
+
+def to_gsi8(line):
+
+    """ GSI-8 version of a GSI-16 line whose values all fit in 8 characters """
+
+    return ' '.join(word[:7] + word[-8:] if word else word for word in line.lstrip('*').split(' '))
+
+
+def to_tenths_of_millimetres(line):
+
+    """ Line with its distance and coordinate words in units of 0.1 mm (units '6') rather than 1 mm ('0') """
+
+    words = line.split(' ')
+
+    for index, word in enumerate(words):
+        if word[:2] in GSI.DISTANCE_WORD_IDS and word[5:7] in ('0+', '0-'):
+            words[index] = word[:5] + '6' + word[6] + word[8:] + '0'
+
+    return ' '.join(words)
+
+
+def get_lines(gsi):
+    return [list(line.items()) for line in gsi.formatted_lines]
+
+
+class ParseBaselineTest(unittest.TestCase):
+
+    """ Parsing TL231019.GSI gives the same formatted lines as the original parser """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.baseline = read_baseline()
+
+    def setUp(self):
+
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, 'TL231019.GSI')
+        shutil.copy(os.path.join(FILES_DIRECTORY, 'TL231019.GSI'), self.filename)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def assert_baseline(self, gsi):
+
+        self.assertEqual(len(gsi.store), len(self.baseline))
+        self.assertEqual(get_lines(gsi), self.baseline)
+        self.assertEqual(gsi.get_control_points(), BASELINE_CONTROL_POINTS)
+
+    def test_sequential(self):
+
+        gsi = GSI(logging.getLogger('CompNet Assist'))
+        gsi.format_gsi(self.filename)
+
+        self.assert_baseline(gsi)
+
+    def test_parallel(self):
+
+        sequential_gsi = GSI(logging.getLogger('CompNet Assist'))
+        sequential_gsi.format_gsi(self.filename)
+
+        # split the small file into parts as a large one would be
+        min_chunk_bytes = gsi_module.MIN_CHUNK_BYTES
+        gsi_module.MIN_CHUNK_BYTES = 4096
+
+        try:
+            gsi = GSI(logging.getLogger('CompNet Assist'))
+            gsi.format_gsi(self.filename, processes=3)
+
+        finally:
+            gsi_module.MIN_CHUNK_BYTES = min_chunk_bytes
+
+        self.assert_baseline(gsi)
+        self.assertEqual(gsi.get_change_points(), sequential_gsi.get_change_points())
+        self.assertEqual(gsi.store.station_setup_rows, sequential_gsi.store.station_setup_rows)
+        self.assertEqual(gsi.store.point_rows, sequential_gsi.store.point_rows)
+
+    def test_gsi8(self):
+
+        self.convert_file(to_gsi8)
+
+        gsi = GSI(logging.getLogger('CompNet Assist'))
+        gsi.format_gsi(self.filename)
+
+        self.assert_baseline(gsi)
+
+    def test_distance_units(self):
+
+        self.convert_file(to_tenths_of_millimetres)
+
+        gsi = GSI(logging.getLogger('CompNet Assist'))
+        gsi.format_gsi(self.filename)
+
+        self.assert_baseline(gsi)
+
+    def convert_file(self, convert_line):
+
+        with open(self.filename) as f:
+            lines = f.read().splitlines()
+
+        converted_lines = [convert_line(line) for line in lines]
+        self.assertNotEqual(converted_lines, lines)
+
+        with open(self.filename, 'w') as f:
+            f.write('\n'.join(converted_lines) + '\n')
+
+    def test_records(self):
+
+        gsi = GSI(logging.getLogger('CompNet Assist'))
+        self.assertEqual([list(record.items()) for record in gsi.iter_records(self.filename)], self.baseline)
+
+    def test_cached(self):
+
+        cache = ParseCache(os.path.join(self.directory, 'cache'))
+        GSI(logging.getLogger('CompNet Assist')).format_gsi(self.filename, cache)
+
+        gsi = GSI(logging.getLogger('CompNet Assist'))
+        gsi.format_gsi(self.filename, cache)
+
+        self.assertIsNotNone(cache.load(self.filename, 'gsi'))
+        self.assert_baseline(gsi)
+
+
+class ColumnValuesTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.gsi = GSI(logging.getLogger('CompNet Assist'))
+        self.gsi.format_gsi(os.path.join(FILES_DIRECTORY, 'TL231019.GSI'))
+
+    def test_same_as_formatted_lines(self):
+
+        for column_name in self.gsi.column_names:
+            self.assertEqual(self.gsi.get_column_values(column_name),
+                             [line[column_name] for line in self.gsi.formatted_lines])
+
+    def test_unknown_column(self):
+        self.assertEqual(self.gsi.get_column_values('Not_A_Column'), [])
+
+    def test_new_store(self):
+
+        point_ids = self.gsi.get_column_values('Point_ID')
+        point_ids.append('changed by the caller')
+
+        self.gsi.build_store(self.gsi.iter_fields(os.path.join(FILES_DIRECTORY, 'TL231019_CONTROL_ONLY.gsi')))
+
+        self.assertEqual(self.gsi.get_column_values('Point_ID'),
+                         [line['Point_ID'] for line in self.gsi.formatted_lines])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import os
+import shutil
+import tempfile
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+if numpy is not None:
+    from GSI import GSI
+    from GSIDecode import get_prism_constants, parse_prism_constant
+
+
+FILES_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Files')
+
+
+@unittest.skipIf(numpy is None, 'needs numpy')
+class ParsePrismConstantTest(unittest.TestCase):
+
+    def test_ppm_and_constant(self):
+        self.assertEqual(parse_prism_constant('12+023'), 23)
+        self.assertEqual(parse_prism_constant('14-034'), -34)
+
+    def test_zero_ppm(self):
+        self.assertEqual(parse_prism_constant('+023'), 23)
+        self.assertEqual(parse_prism_constant('-034'), -34)
+        self.assertEqual(parse_prism_constant('+000'), 0)
+
+    def test_not_a_constant(self):
+        self.assertIsNone(parse_prism_constant(''))
+        self.assertIsNone(parse_prism_constant('12'))
+        self.assertIsNone(parse_prism_constant('12+0x3'))
+
+    def test_file_prism_constants(self):
+
+        # the file's constants with their ppm set to 0
+        with open(os.path.join(FILES_DIRECTORY, 'TL231019.GSI')) as f:
+            contents = f.read().replace('+000000000012+', '+000000000000+').replace('+000000000014+', '+000000000000+')
+
+        directory = tempfile.mkdtemp()
+
+        try:
+            filename = os.path.join(directory, 'ZERO_PPM.GSI')
+
+            with open(filename, 'w') as f:
+                f.write(contents)
+
+            gsi = GSI(logging.getLogger('CompNet Assist'))
+            gsi.format_gsi(filename)
+
+        finally:
+            shutil.rmtree(directory)
+
+        constants = get_prism_constants(gsi.store)
+        present = numpy.array([constant is not None for constant in gsi.store.columns['51']])
+
+        self.assertEqual(int(present.sum()), 130)
+        self.assertFalse(constants.mask[present].any())
+        self.assertEqual(sorted(set(constants.compressed().tolist())), [0, 8, 23])
+
+if __name__ == '__main__':
+    unittest.main()
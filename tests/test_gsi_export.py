@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import os
+import shutil
+import tempfile
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from GSI import GSI
+
+if numpy is not None:
+    from GSIExport import export_csv, export_npz, load_npz, stream_gsi_to_csv
+
+TESTS_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+FILES_DIRECTORY = os.path.join(os.path.dirname(TESTS_DIRECTORY), 'Files')
+
+# formatted lines of Files/TL231019.GSI as the original line by line parser formatted them
+BASELINE_FILENAME = os.path.join(TESTS_DIRECTORY, 'data', 'TL231019_formatted.csv')
+
+
+def read_bytes(filename):
+
+    with open(filename, 'rb') as f:
+        return f.read()
+
+
+@unittest.skipIf(numpy is None, 'needs numpy')
+class GSIExportTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(FILES_DIRECTORY, 'TL231019.GSI')
+
+        self.gsi = GSI(logging.getLogger('CompNet Assist'))
+        self.gsi.format_gsi(self.filename)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_csv(self):
+
+        filename = os.path.join(self.directory, 'TL231019.csv')
+
+        self.assertEqual(export_csv(self.gsi, filename), 136)
+        self.assertEqual(read_bytes(filename), read_bytes(BASELINE_FILENAME))
+
+    def test_stream_csv(self):
+
+        filename = os.path.join(self.directory, 'TL231019.csv')
+
+        self.assertEqual(stream_gsi_to_csv(self.filename, filename), 136)
+        self.assertEqual(read_bytes(filename), read_bytes(BASELINE_FILENAME))
+
+    def test_npz(self):
+
+        filename = os.path.join(self.directory, 'TL231019.npz')
+        export_npz(self.gsi, filename)
+        gsi = load_npz(filename)
+
+        store, loaded_store = self.gsi.store, gsi.store
+
+        self.assertEqual(gsi.filename, self.filename)
+        self.assertEqual(len(loaded_store), len(store))
+        self.assertEqual(loaded_store.word_ids, store.word_ids)
+
+        for word_id in store.word_ids:
+            self.assertEqual(list(loaded_store.columns[word_id]), list(store.columns[word_id]), word_id)
+            self.assertEqual(loaded_store.masks[word_id], store.masks[word_id], word_id)
+
+        self.assertEqual(loaded_store.raw_values, store.raw_values)
+        self.assertEqual(list(loaded_store.station_setup_rows), list(store.station_setup_rows))
+        self.assertEqual(loaded_store.control_points, store.control_points)
+
+        self.assertEqual([list(line.items()) for line in gsi.formatted_lines],
+                         [list(line.items()) for line in self.gsi.formatted_lines])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import os
+import shutil
+import stat
+import tempfile
+import unittest
+
+from GSI import GSI
+from GSIExceptions import OperationCancelledError
+from GSIFilter import GSIFilter, LinePredicate, StationSetupPredicate
+
+FILES_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Files')
+
+
+class CancelAfterPredicate(LinePredicate):
+
+    def __init__(self, line_count):
+        self.line_count = line_count
+
+    def __call__(self, line):
+
+        self.line_count -= 1
+
+        if self.line_count < 0:
+            raise OperationCancelledError()
+
+        return True
+
+
+class GSIFilterTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, 'TL231019.GSI')
+        shutil.copy(os.path.join(FILES_DIRECTORY, 'TL231019.GSI'), self.filename)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def read(self, filename):
+
+        with open(filename) as f:
+            return f.read()
+
+    def test_control_only(self):
+
+        gsi = GSI(logging.getLogger('CompNet Assist'))
+        control_only_filename = gsi.stream_control_only_gsi(self.filename)
+
+        self.assertEqual(self.read(control_only_filename),
+                         self.read(os.path.join(FILES_DIRECTORY, 'TL231019_CONTROL_ONLY.gsi')))
+
+        gsi.format_gsi(self.filename)
+        os.remove(control_only_filename)
+        gsi.create_control_only_gsi()
+
+        self.assertEqual(self.read(control_only_filename),
+                         self.read(os.path.join(FILES_DIRECTORY, 'TL231019_CONTROL_ONLY.gsi')))
+
+    def test_base_predicate_keeps_every_line(self):
+
+        destination_filename = os.path.join(self.directory, 'COPY.GSI')
+        GSIFilter(LinePredicate()).filter(self.filename, destination_filename)
+
+        self.assertEqual(self.read(destination_filename), self.read(self.filename))
+
+        # tests run on one thread so the umask can be read by setting it
+        umask = os.umask(0)
+        os.umask(umask)
+        self.assertEqual(stat.S_IMODE(os.stat(destination_filename).st_mode), 0o666 & ~umask)
+
+    def test_replaced_file_keeps_permissions(self):
+
+        destination_filename = os.path.join(self.directory, 'COPY.GSI')
+
+        with open(destination_filename, 'w') as f:
+            f.write('existing\n')
+
+        os.chmod(destination_filename, 0o640)
+        GSIFilter(LinePredicate()).filter(self.filename, destination_filename)
+
+        self.assertEqual(stat.S_IMODE(os.stat(destination_filename).st_mode), 0o640)
+
+    def test_station_setups(self):
+
+        destination_filename = os.path.join(self.directory, 'SETUPS.GSI')
+        line_count = GSIFilter(StationSetupPredicate(['STN01'])).filter(self.filename, destination_filename)
+
+        lines = self.read(destination_filename).splitlines()
+
+        self.assertEqual(len(lines), line_count)
+        self.assertGreater(line_count, 1)
+        self.assertTrue(lines[0].startswith('*110001+00000000000STN01 84'))
+
+    def test_cancelled_filter_leaves_destination(self):
+
+        destination_filename = os.path.join(self.directory, 'EXISTING.GSI')
+
+        with open(destination_filename, 'w') as f:
+            f.write('existing\n')
+
+        self.assertRaises(OperationCancelledError, GSIFilter(CancelAfterPredicate(50)).filter, self.filename,
+                          destination_filename)
+
+        self.assertEqual(self.read(destination_filename), 'existing\n')
+        self.assertEqual(sorted(os.listdir(self.directory)), ['EXISTING.GSI', 'TL231019.GSI'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import os
+import shutil
+import tempfile
+import unittest
+
+from GSI import GSI
+from GSISetups import SetupIndex
+
+FILES_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Files')
+
+# bytes between cut points, and a prime so cuts fall at every position within a line
+CUT_STEP = 251
+
+
+def get_summary(gsi):
+    return [list(line.items()) for line in gsi.formatted_lines], gsi.get_control_points(), gsi.get_change_points()
+
+
+class CutFileTest(unittest.TestCase):
+
+    """ TL231019.GSI written up to cut points, as if it were still being downloaded """
+
+    @classmethod
+    def setUpClass(cls):
+
+        with open(os.path.join(FILES_DIRECTORY, 'TL231019.GSI'), 'rb') as f:
+            cls.contents = f.read()
+
+    def setUp(self):
+
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, 'DOWNLOADING.GSI')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, end):
+
+        with open(self.filename, 'wb') as f:
+            f.write(self.contents[:end])
+
+    def get_cuts(self):
+
+        line_ends = [position + 1 for position, character in enumerate(bytearray(self.contents)) if character == 10]
+        cuts = set(range(1, len(self.contents), CUT_STEP))
+
+        for line_end in line_ends[::20]:
+            cuts.update((line_end - 2, line_end - 1, line_end, line_end + 1))
+
+        return sorted(cut for cut in cuts if 0 < cut < len(self.contents))
+
+
+class RefreshGSITest(CutFileTest):
+
+    @classmethod
+    def setUpClass(cls):
+
+        super(RefreshGSITest, cls).setUpClass()
+
+        gsi = GSI(logging.getLogger('CompNet Assist'))
+        gsi.format_gsi(os.path.join(FILES_DIRECTORY, 'TL231019.GSI'))
+        cls.expected = get_summary(gsi)
+
+    def test_follow_from_any_cut(self):
+
+        for cut in self.get_cuts():
+
+            self.write(cut)
+
+            gsi = GSI(logging.getLogger('CompNet Assist'))
+            gsi.format_gsi(self.filename, complete_lines_only=True)
+
+            self.assertEqual(len(gsi.store), self.contents[:cut].count(b'\n'), cut)
+
+            self.write(len(self.contents))
+            gsi.refresh_gsi()
+
+            self.assertEqual(get_summary(gsi), self.expected, cut)
+
+    def test_refresh_from_cut_to_cut(self):
+
+        gsi = GSI(logging.getLogger('CompNet Assist'))
+        self.write(0)
+        gsi.format_gsi(self.filename, complete_lines_only=True)
+
+        for cut in self.get_cuts() + [len(self.contents)]:
+
+            self.write(cut)
+            gsi.refresh_gsi()
+
+            self.assertEqual(len(gsi.store), self.contents[:cut].count(b'\n'), cut)
+
+            # formatted a refresh at a time
+            gsi.get_column_values('Horizontal_Angle')
+
+        self.assertEqual(get_summary(gsi), self.expected)
+        self.assertEqual(gsi.get_column_values('Horizontal_Angle'),
+                         [line['Horizontal_Angle'] for line in gsi.formatted_lines])
+
+    def test_replaced_file_is_parsed_again(self):
+
+        gsi = GSI(logging.getLogger('CompNet Assist'))
+        self.write(len(self.contents))
+        gsi.format_gsi(self.filename, complete_lines_only=True)
+
+        self.write(len(self.contents) // 2)
+        gsi.refresh_gsi()
+        self.assertEqual(len(gsi.store), self.contents[:len(self.contents) // 2].count(b'\n'))
+
+        self.write(len(self.contents))
+        gsi.refresh_gsi()
+        self.assertEqual(get_summary(gsi), self.expected)
+
+
+
+class RefreshSetupIndexTest(CutFileTest):
+
+    @classmethod
+    def setUpClass(cls):
+
+        super(RefreshSetupIndexTest, cls).setUpClass()
+        cls.expected = list(SetupIndex(os.path.join(FILES_DIRECTORY, 'TL231019.GSI')))
+
+    def get_setup_line_cuts(self):
+
+        """ Cuts inside every station setup line, including right after ' 8' of the 84 word """
+
+        cuts = set()
+        line_start = 0
+
+        for line in self.contents.splitlines(True):
+
+            setup_word = line.find(b' 84')
+
+            if setup_word != -1:
+                cuts.update((line_start + setup_word + 2, line_start + setup_word + 10, line_start + len(line) - 1))
+
+            line_start += len(line)
+
+        return sorted(cuts)
+
+    def test_follow_from_any_cut(self):
+
+        for cut in self.get_cuts() + self.get_setup_line_cuts():
+
+            self.write(cut)
+
+            setup_index = SetupIndex(self.filename, complete_lines_only=True)
+
+            self.assertEqual(setup_index.line_count, self.contents[:cut].count(b'\n'), cut)
+
+            self.write(len(self.contents))
+            setup_index.refresh()
+
+            self.assertEqual(list(setup_index), self.expected, cut)
+
+    def test_refresh_from_cut_to_cut(self):
+
+        self.write(0)
+        setup_index = SetupIndex(self.filename, complete_lines_only=True)
+
+        for cut in sorted(set(self.get_cuts() + self.get_setup_line_cuts())) + [len(self.contents)]:
+
+            self.write(cut)
+            setup_index.refresh()
+
+            self.assertEqual(setup_index.line_count, self.contents[:cut].count(b'\n'), cut)
+
+        self.assertEqual(list(setup_index), self.expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from ParseCache import ParseCache, INDEX_FILENAME
+
+
+class ParseCacheTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.directory = tempfile.mkdtemp()
+        self.cache_directory = os.path.join(self.directory, 'cache')
+        self.cache = ParseCache(self.cache_directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write_file(self, name, contents):
+
+        filename = os.path.join(self.directory, name)
+
+        with open(filename, 'w') as f:
+            f.write(contents)
+
+        return filename
+
+    def get_entry_files(self):
+        return sorted(filename for filename in os.listdir(self.cache_directory) if filename != INDEX_FILENAME)
+
+    def test_hit_and_miss(self):
+
+        filename = self.write_file('a.GSI', 'line 1\n')
+        self.assertIsNone(self.cache.load(filename, 'gsi'))
+
+        self.cache.store(filename, 'gsi', ['parsed', 1])
+        self.assertEqual(self.cache.load(filename, 'gsi'), ['parsed', 1])
+        self.assertIsNone(self.cache.load(filename, 'crd'))
+
+        self.write_file('a.GSI', 'line 1\nline 2\n')
+        self.assertIsNone(self.cache.load(filename, 'gsi'))
+
+    def test_lookup_stamp(self):
+
+        filename = self.write_file('a.GSI', 'line 1\n')
+        payload, stamp = self.cache.lookup(filename, 'gsi')
+
+        self.assertIsNone(payload)
+        self.assertEqual(stamp[1], self.cache.get_stamp(filename, 'gsi')[1])
+
+        self.cache.store(filename, 'gsi', 'parsed', stamp)
+        self.assertEqual(self.cache.lookup(filename, 'gsi'), ('parsed', stamp))
+
+    def test_file_changed_while_parsed(self):
+
+        filename = self.write_file('a.GSI', 'line 1\n')
+        payload, stamp = self.cache.lookup(filename, 'gsi')
+
+        # e.g. still being downloaded
+        self.write_file('a.GSI', 'line 1\nline 2\n')
+        self.cache.store(filename, 'gsi', 'parse of line 1', stamp)
+
+        self.assertIsNone(self.cache.load(filename, 'gsi'))
+
+    def test_replaced_entry_file_is_removed(self):
+
+        for edit in range(5):
+            filename = self.write_file('a.GSI', 'edit {}\n'.format(edit))
+            self.cache.store(filename, 'gsi', edit)
+
+        self.assertEqual(len(self.get_entry_files()), 1)
+        self.assertEqual(self.cache.load(filename, 'gsi'), 4)
+
+    def test_shared_entry_file_is_kept(self):
+
+        filename_1 = self.write_file('a.GSI', 'same\n')
+        filename_2 = self.write_file('b.GSI', 'same\n')
+        self.cache.store(filename_1, 'gsi', 'same')
+        self.cache.store(filename_2, 'gsi', 'same')
+
+        self.write_file('a.GSI', 'changed\n')
+        self.cache.store(filename_1, 'gsi', 'changed')
+
+        self.assertEqual(len(self.get_entry_files()), 2)
+        self.assertEqual(self.cache.load(filename_2, 'gsi'), 'same')
+
+    def test_hit_does_not_write_index(self):
+
+        filename = self.write_file('a.GSI', 'line 1\n')
+        self.cache.store(filename, 'gsi', 'parsed')
+
+        index_filename = os.path.join(self.cache_directory, INDEX_FILENAME)
+        os.utime(index_filename, (0, 0))
+        self.assertEqual(self.cache.load(filename, 'gsi'), 'parsed')
+
+        self.assertEqual(os.path.getmtime(index_filename), 0)
+
+    def test_evicts_least_recently_used(self):
+
+        filenames = [self.write_file('{}.GSI'.format(number), str(number)) for number in range(3)]
+
+        for number, filename in enumerate(filenames):
+            self.cache.store(filename, 'gsi', 'x' * 1000)
+            os.utime(self.cache.get_entry_filename(self.cache.hash_file(filename, 'gsi')), (number, number))
+
+        # a stray entry file, e.g. from an index update another process lost, is evicted like any other
+        stray_filename = os.path.join(self.cache_directory, 'stray.pickle')
+
+        with open(stray_filename, 'w') as f:
+            f.write('x' * 1000)
+
+        os.utime(stray_filename, (0.5, 0.5))
+
+        # using file 0 makes file 1 the least recently used
+        self.assertIsNotNone(self.cache.load(filenames[0], 'gsi'))
+
+        self.cache.max_bytes = 2500
+        self.cache.evict()
+
+        self.assertIsNotNone(self.cache.load(filenames[0], 'gsi'))
+        self.assertIsNone(self.cache.load(filenames[1], 'gsi'))
+        self.assertIsNotNone(self.cache.load(filenames[2], 'gsi'))
+        self.assertFalse(os.path.exists(stray_filename))
+        self.assertEqual(len(self.get_entry_files()), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
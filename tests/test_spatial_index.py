@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+
+import os
+import unittest
+
+from CoordinateFile import CoordinateFile
+from SpatialIndex import SpatialIndex
+
+FILES_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Files')
+
+# points on and either side of the cell boundaries at 0 and 1 metre
+POINTS = ['A', 'B', 'C', 'D', 'E']
+EASTINGS = [0.0, 1.0, 0.999, -0.001, 2.5]
+NORTHINGS = [0.0, 0.0, 1.0, -0.001, 0.0]
+
+
+class SpatialIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.spatial_index = SpatialIndex(POINTS, EASTINGS, NORTHINGS, 1.0)
+
+    def test_cells(self):
+
+        self.assertEqual(self.spatial_index.get_cell(1.0, 0.0), (1, 0))
+        self.assertEqual(self.spatial_index.get_cell(0.999, 1.0), (0, 1))
+        self.assertEqual(self.spatial_index.get_cell(-0.001, -0.001), (-1, -1))
+
+    def test_nearest_across_boundary(self):
+
+        # the nearest point is in the next cell, not the query's own cell
+        self.assertEqual(self.spatial_index.nearest(0.9999, 0.0)[1], 'B')
+        self.assertEqual(self.spatial_index.nearest(-0.0005, -0.0005)[1], 'D')
+
+        # a point in the query's cell isn't always nearer than one in the next cell
+        distance, point = self.spatial_index.nearest(1.9, 0.0)
+        self.assertEqual(point, 'E')
+        self.assertAlmostEqual(distance, 0.6)
+
+    def test_nearest_max_distance(self):
+
+        self.assertIsNone(self.spatial_index.nearest(5.0, 5.0, 1.0))
+        self.assertEqual(self.spatial_index.nearest(1.5, 0.0, 0.5), (0.5, 'B'))
+        self.assertEqual(self.spatial_index.nearest(10.0, 0.0), (7.5, 'E'))
+
+    def test_within(self):
+
+        # a radius reaching exactly to a point includes it
+        self.assertEqual([point for distance, point in self.spatial_index.within(0.0, 0.0, 1.0)], ['A', 'D', 'B'])
+        self.assertEqual([point for distance, point in self.spatial_index.within(0.5, 0.0, 0.5)], ['A', 'B'])
+        self.assertEqual(self.spatial_index.within(0.5, 0.0, 0.4), [])
+
+        # radius larger than a cell
+        self.assertEqual(sorted(point for distance, point in self.spatial_index.within(0.0, 0.0, 2.5)),
+                         ['A', 'B', 'C', 'D', 'E'])
+
+    def test_cell_sizes_agree(self):
+
+        for cell_size in (0.1, 0.3, 1.0, 10.0):
+
+            spatial_index = SpatialIndex(POINTS, EASTINGS, NORTHINGS, cell_size)
+
+            for easting, northing in ((0.5, 0.5), (1.9, 0.0), (-3.0, 2.0)):
+                self.assertEqual(spatial_index.nearest(easting, northing),
+                                 self.spatial_index.nearest(easting, northing))
+                self.assertEqual(spatial_index.within(easting, northing, 1.5),
+                                 self.spatial_index.within(easting, northing, 1.5))
+
+    def test_empty(self):
+
+        spatial_index = SpatialIndex([], [], [])
+
+        self.assertIsNone(spatial_index.nearest(0.0, 0.0))
+        self.assertEqual(spatial_index.within(0.0, 0.0, 1.0), [])
+
+
+class CoordinateFileSpatialIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.coordinate_file = CoordinateFile(os.path.join(FILES_DIRECTORY, 'AA9 ARTC 170220.asc'))
+
+    def test_cell_size(self):
+
+        spatial_index = self.coordinate_file.get_spatial_index(0.01)
+
+        self.assertIs(self.coordinate_file.get_spatial_index(0.01), spatial_index)
+        self.assertEqual(self.coordinate_file.get_spatial_index(5.0).cell_size, 5.0)
+        self.assertEqual(len(self.coordinate_file.get_spatial_index(5.0)), 10)
+
+    def test_position_fallback(self):
+
+        # CTL3 is CTL03 in this file, 16mm away
+        get_point_coordinates = self.coordinate_file.get_point_coordinates
+
+        self.assertIsNone(get_point_coordinates('CTL3', 286254.9203, 6215385.8145, 0.01))
+        self.assertEqual(get_point_coordinates('CTL3', 286254.9203, 6215385.8145, 0.02),
+                         self.coordinate_file.coordinate_dictionary['CTL03'])
+
+
+if __name__ == '__main__':
+    unittest.main()